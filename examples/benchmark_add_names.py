@@ -0,0 +1,89 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This compares adding names to a Namespace one at a time with getChild, as
+NameSync used to do, against adding them in one batch with addNames. The names
+are URI strings in random order, and an onNameAdded callback is registered on
+the root. Run it with optional name counts (default 10000 100000 1000000).
+"""
+
+import sys
+import time
+import random
+from pyndn import Name
+from pycnl import Namespace
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def makeNames(nNames):
+    names = ["/ndn/app/user" + str(i % 100) + "/file" + str(i // 100)
+             for i in range(nNames)]
+    random.shuffle(names)
+    return names
+
+def addOneAtATime(names):
+    root = Namespace("/ndn/app")
+    count = [0]
+    def onNameAdded(namespace, addedNamespace, callbackId):
+        count[0] += 1
+    root.addOnNameAdded(onNameAdded)
+
+    for name in names:
+        root.getChild(Name(name))
+    return count[0]
+
+def addInBatch(names):
+    root = Namespace("/ndn/app")
+    count = [0]
+    def onNameAdded(namespace, addedNamespace, callbackId):
+        count[0] += 1
+    root.addOnNameAdded(onNameAdded)
+
+    root.addNames(names)
+    return count[0]
+
+def main():
+    if len(sys.argv) > 1:
+        counts = [int(arg) for arg in sys.argv[1:]]
+    else:
+        counts = [10000, 100000, 1000000]
+
+    for nNames in counts:
+        names = makeNames(nNames)
+
+        startTime = time.time()
+        nAdded = addOneAtATime(names)
+        oneAtATimeSeconds = time.time() - startTime
+
+        startTime = time.time()
+        nBatchAdded = addInBatch(names)
+        batchSeconds = time.time() - startTime
+
+        if nAdded != nNames or nBatchAdded != nNames:
+            dump("Error: expected", nNames, "names, got", nAdded, "and",
+                 nBatchAdded)
+        dump("Names:", nNames, "getChild loop:", round(oneAtATimeSeconds, 3),
+             "s, addNames:", round(batchSeconds, 3), "s")
+
+main()
@@ -0,0 +1,97 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This compares the fixed Interest pipeline of SegmentStream with congestion
+control when fetching over a thin and a fat simulated bottleneck link (see
+memory_face.py). It shows the simulated fetch time (or the error if the stream
+stops with an error), the number of dropped packets, the number of fast and
+timeout retransmissions and the smoothed round-trip time measured by the
+RttEstimator of the face. Run it with an optional segment count (default 5000).
+"""
+
+import sys
+from pycnl import Namespace, SegmentStream, RttEstimator
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def fetch(nSegments, bandwidth, queueLimit, pipelineSize):
+    """
+    Fetch with the fixed pipelineSize, or with congestion control if
+    pipelineSize is None. Return the face, the SegmentStream and the maximum
+    window size.
+    """
+    producer = SegmentProducer("/ndn/benchmark/%FD%00", bytearray(nSegments), 1)
+    face = MemoryFace(
+      producer.onInterest, delay = 20.0, bandwidth = bandwidth,
+      queueLimit = queueLimit)
+    namespace = Namespace("/ndn/benchmark/%FD%00")
+    namespace.setFace(face)
+
+    segmentStream = SegmentStream(namespace)
+    if pipelineSize == None:
+        segmentStream.congestionControl = True
+    else:
+        segmentStream.interestPipelineSize = pipelineSize
+
+    finished = [False]
+    maxWindowSize = [0]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            finished[0] = True
+        maxWindowSize[0] = max(maxWindowSize[0], segmentStream.windowSize)
+
+    def onError(segmentStream, message, callbackId):
+        finished[0] = True
+
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.addOnError(onError)
+    segmentStream.start()
+    face.run(lambda: finished[0])
+    return face, segmentStream, maxWindowSize[0]
+
+def main():
+    nSegments = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    links = [("thin", 200, 10), ("fat", 20000, 200)]
+    for linkName, bandwidth, queueLimit in links:
+        for pipelineSize in [8, 64, None]:
+            face, segmentStream, maxWindowSize = fetch(
+              nSegments, bandwidth, queueLimit, pipelineSize)
+            mode = ("congestion control" if pipelineSize == None
+                    else "pipeline " + str(pipelineSize))
+            seconds = round(face.getNowMilliseconds() / 1000.0, 2)
+            if segmentStream.getErrorMessage() == None:
+                result = str(seconds) + " s,"
+            else:
+                result = "error after " + str(seconds) + " s,"
+            dump(linkName, "link,", mode + ":", result, "dropped",
+                 face.getDropCount(), "max window", maxWindowSize,
+                 "fast retransmits", segmentStream.getFastRetransmitCount(),
+                 "timeout retransmits",
+                 segmentStream.getTimeoutRetransmitCount(), "SRTT",
+                 round(RttEstimator.getFaceRttEstimator(face).smoothedRtt, 1),
+                 "ms")
+
+main()
@@ -0,0 +1,58 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This times the lookup of the Face and TransformContent which a deep Namespace
+node inherits from the root, as done on every expressInterest and setData. Run
+it with an optional number of lookups (default 1000000).
+"""
+
+import sys
+import time
+from pyndn import Name
+from pycnl import Namespace
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def main():
+    nLookups = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    for depth in [5, 20, 50]:
+        root = Namespace("/root")
+        # Any object will do since the Face is not used.
+        root.setFace(object())
+        name = Name("/root")
+        for i in range(depth):
+            name.append("component" + str(i))
+        leaf = root.getChild(name)
+
+        startTime = time.time()
+        for i in range(nLookups):
+            leaf._getFace()
+            leaf._getTransformContent()
+        seconds = time.time() - startTime
+
+        dump("Depth", depth, ":", round(nLookups / seconds),
+             "Face and TransformContent lookups per second")
+
+main()
@@ -0,0 +1,80 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This compares fetching with SegmentStream over one of two simulated links and
+over both links with Namespace.setFaces, which stripes the segment Interests
+over the faces by their round-trip time and loss (see memory_face.py). It shows
+the simulated throughput and the number of Interests sent on each face. Run it
+with an optional segment count (default 20000).
+"""
+
+import sys
+from pycnl import Namespace, SegmentStream
+from memory_face import MemoryFace, SimulatedClock, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def fetch(nSegments, links):
+    """
+    Fetch over a MemoryFace for each (delay, bandwidth) in links. Return the
+    simulated seconds and the faces.
+    """
+    producer = SegmentProducer("/ndn/benchmark/%FD%00", nSegments, 1)
+    clock = SimulatedClock()
+    faces = []
+    for delay, bandwidth in links:
+        face = MemoryFace(
+          producer.onInterest, delay = delay, bandwidth = bandwidth,
+          queueLimit = 100, clock = clock)
+        faces.append(face)
+
+    namespace = Namespace("/ndn/benchmark/%FD%00")
+    namespace.setFaces(faces)
+    segmentStream = SegmentStream(namespace)
+    segmentStream.congestionControl = True
+    segmentStream.maxWindowSize = 1024
+
+    finished = [False]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            finished[0] = True
+
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.start()
+    faces[0].run(lambda: finished[0])
+    return clock.getNowMilliseconds() / 1000.0, faces
+
+def main():
+    nSegments = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    linkA = (20.0, 4000)
+    linkB = (80.0, 2000)
+    for name, links in [
+          ("link A", [linkA]), ("link B", [linkB]),
+          ("links A and B", [linkA, linkB])]:
+        seconds, faces = fetch(nSegments, links)
+        dump(name + ":", int(nSegments / seconds), "segments/s, Interests",
+             [face.getInterestCount() for face in faces])
+
+main()
@@ -0,0 +1,96 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This measures the memory used per Namespace node when adding segment leaf nodes
+under a versioned prefix, with and without making the full name of each leaf. Run
+it with an optional node count argument (default 100000). It also fetches
+segments with SegmentStream from a local in-memory producer (see memory_face.py)
+and counts the fetched leaves which kept a full name, which should be none.
+"""
+
+import sys
+import gc
+import tracemalloc
+from pyndn import Name
+from pycnl import Namespace, SegmentStream
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def measureBytesPerNode(nNodes, getNames):
+    """
+    Add nNodes segment children to a fresh Namespace and return the number of
+    bytes allocated per child node. The name components are made in advance so
+    that only the memory of the name tree is measured.
+    """
+    components = [Name.Component.fromSegment(i) for i in range(nNodes)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    prefix = Namespace("/ndn/edu/ucla/remap/demo/video/%FD%00")
+    for component in components:
+        child = prefix[component]
+        if getNames:
+            child.getName()
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return float(after - before) / nNodes
+
+def countFetchedNames(nSegments):
+    """
+    Fetch nSegments segments with SegmentStream and return the number of
+    segment nodes which have a full name.
+    """
+    prefix = "/ndn/edu/ucla/remap/demo/video/%FD%00"
+    producer = SegmentProducer(prefix, nSegments * 100, 100)
+    face = MemoryFace(producer.onInterest)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    finished = [False]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            finished[0] = True
+
+    segmentStream = SegmentStream(namespace)
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.start()
+    face.run(lambda: finished[0])
+
+    return len([component for component in namespace.getChildComponents()
+                if namespace[component]._name != None])
+
+def main():
+    nNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    dump("Nodes:", nNodes)
+    dump("Bytes per node:", round(measureBytesPerNode(nNodes, False), 1))
+    dump("Bytes per node after getName():",
+         round(measureBytesPerNode(nNodes, True), 1))
+    dump("Fetched leaves with a full name:", countFetchedNames(1000), "of 1000")
+
+main()
@@ -0,0 +1,74 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This measures the time for SegmentStream to fetch all the segments of an
+object from a local in-memory producer (see memory_face.py), so that the time
+is the overhead of the library. Run it with optional segment counts (default
+10000 100000 1000000).
+"""
+
+import sys
+import time
+from pycnl import Namespace, SegmentStream
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def fetch(nSegments, segmentSize):
+    producer = SegmentProducer(
+      "/ndn/benchmark/%FD%00", bytearray(nSegments * segmentSize), segmentSize)
+    face = MemoryFace(producer.onInterest)
+    namespace = Namespace("/ndn/benchmark/%FD%00")
+    namespace.setFace(face)
+
+    count = [0]
+    finished = [False]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            finished[0] = True
+        else:
+            count[0] += 1
+
+    segmentStream = SegmentStream(namespace)
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.start()
+    face.run(lambda: finished[0])
+    return count[0]
+
+def main():
+    if len(sys.argv) > 1:
+        counts = [int(arg) for arg in sys.argv[1:]]
+    else:
+        counts = [10000, 100000, 1000000]
+
+    for nSegments in counts:
+        startTime = time.time()
+        nFetched = fetch(nSegments, 8)
+        seconds = time.time() - startTime
+
+        dump("Segments:", nSegments, "fetched:", nFetched,
+             "time:", round(seconds, 3), "s,",
+             int(nFetched / seconds), "segments/s")
+
+main()
@@ -0,0 +1,96 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This compares the time and peak memory of SegmentedContent when it assembles
+the content from a list of segments, when it copies each segment into a
+preallocated buffer (see SegmentedContent.setPreallocate) and when it copies
+each segment into a memory-mapped temporary file (see
+SegmentedContent.setMemoryMap), fetching from a local in-memory producer (see
+memory_face.py). (The resident memory includes the pages of the memory-mapped
+file in the page cache, which the operating system can write out and free.)
+Each measurement runs in a new process so that the peak resident memory is
+separate. All three modes use setPruneSegments(True) so that the segment nodes
+don't hold the content after it is copied. Run it with optional object sizes in
+megabytes (default 100 1024).
+"""
+
+import sys
+import subprocess
+import resource
+import time
+from pyndn.util import Blob
+from pycnl import Namespace, SegmentedContent
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def fetch(megabytes, mode):
+    producer = SegmentProducer(
+      "/ndn/benchmark/%FD%00", megabytes * 1024 * 1024, 8192)
+    def onInterest(interest):
+        data = producer.onInterest(interest)
+        if data != None:
+            # Copy the content like decoding from the network, since the
+            # producer shares one buffer for all segments.
+            data.setContent(Blob(bytearray(data.getContent().toBuffer()), False))
+        return data
+
+    face = MemoryFace(onInterest)
+    namespace = Namespace("/ndn/benchmark/%FD%00")
+    namespace.setFace(face)
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.setPreallocate(mode == "preallocate")
+    segmentedContent.setMemoryMap(mode == "memory-map")
+    segmentedContent.setPruneSegments(True)
+    segmentedContent.getSegmentStream().interestPipelineSize = 64
+
+    finished = [False]
+    def onContentSet(namespace, contentNamespace, callbackId):
+        if contentNamespace == namespace:
+            finished[0] = True
+    namespace.addOnContentSet(onContentSet)
+
+    startTime = time.time()
+    segmentedContent.start()
+    face.run(lambda: finished[0])
+    seconds = time.time() - startTime
+    # On Linux, ru_maxrss is in kilobytes.
+    peakMegabytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    dump(megabytes, "MB,", mode, "time:", round(seconds, 2), "s, peak RSS:",
+         peakMegabytes, "MB")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "fetch":
+        fetch(int(sys.argv[2]), sys.argv[3])
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] if len(sys.argv) > 1 else [100, 1024]
+    for megabytes in sizes:
+        for mode in ["list", "preallocate", "memory-map"]:
+            # Flush so that the output is in order with the child process.
+            sys.stdout.flush()
+            subprocess.call(
+              [sys.executable, __file__, "fetch", str(megabytes), mode])
+
+main()
@@ -0,0 +1,87 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This streams a large object from a local in-memory producer (see
+memory_face.py) through SegmentStream with setReleaseDeliveredSegments(True)
+and prints the peak resident memory after each tenth of the object, which
+should stay flat. Run it with an optional object size in megabytes (default
+1024) and segment size in bytes (default 8192). For example, use 10240 to
+stream 10 GB, which takes a while. Add "keep" as a third argument to keep the
+delivered segments and see the memory grow.
+"""
+
+import sys
+import resource
+import time
+from pycnl import Namespace, SegmentStream
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+def getPeakRssMegabytes():
+    # On Linux, ru_maxrss is in kilobytes.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    segmentSize = int(sys.argv[2]) if len(sys.argv) > 2 else 8192
+    releaseDeliveredSegments = not (len(sys.argv) > 3 and sys.argv[3] == "keep")
+
+    contentSize = megabytes * 1024 * 1024
+    # Don't hold the content. The producer makes each segment as needed.
+    producer = SegmentProducer("/ndn/benchmark/%FD%00", contentSize, segmentSize)
+    face = MemoryFace(producer.onInterest)
+    namespace = Namespace("/ndn/benchmark/%FD%00")
+    namespace.setFace(face)
+
+    nSegments = producer.getSegmentCount()
+    reportInterval = max(1, nSegments // 10)
+    receivedBytes = [0]
+    count = [0]
+    finished = [False]
+    startTime = time.time()
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            finished[0] = True
+            return
+
+        receivedBytes[0] += segmentNamespace.content.size()
+        count[0] += 1
+        if count[0] % reportInterval == 0:
+            dump("Received", receivedBytes[0] // (1024 * 1024), "MB,",
+                 "peak RSS", getPeakRssMegabytes(), "MB,",
+                 "time", round(time.time() - startTime, 1), "s")
+
+    segmentStream = SegmentStream(namespace)
+    segmentStream.releaseDeliveredSegments = releaseDeliveredSegments
+    segmentStream.interestPipelineSize = 64
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.start()
+    face.run(lambda: finished[0])
+
+    dump("Streamed", receivedBytes[0], "bytes in", count[0], "segments,",
+         "release delivered segments", releaseDeliveredSegments,
+         "peak RSS", getPeakRssMegabytes(), "MB")
+
+main()
@@ -0,0 +1,298 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This module defines MemoryFace, which has the Face methods used by Namespace
+but answers Interests from a local in-memory producer on a simulated clock,
+SimulatedClock, which can be shared by several MemoryFace objects, and
+SegmentProducer, which makes segment Data packets. The benchmark examples use
+these to fetch without a network.
+"""
+
+import heapq
+import random
+from pyndn import Name, Data, Interest
+from pyndn.util import Blob
+from pycnl import RttEstimator
+
+class SimulatedClock(object):
+    def __init__(self):
+        """
+        Create a SimulatedClock at time 0 with no events.
+        """
+        self._now = 0.0
+        # A heap of (time, sequence number, callback).
+        self._events = []
+        self._sequenceNumber = 0
+
+    def callLater(self, delayMilliseconds, callback):
+        """
+        Call callback() after the given delay on the simulated clock.
+        """
+        self._sequenceNumber += 1
+        heapq.heappush(
+          self._events,
+          (self._now + delayMilliseconds, self._sequenceNumber, callback))
+
+    def processEvents(self):
+        """
+        Advance the simulated clock to the next event and call it.
+
+        :return: False if there are no more events.
+        :rtype: bool
+        """
+        if len(self._events) == 0:
+            return False
+        time, sequenceNumber, callback = heapq.heappop(self._events)
+        self._now = max(self._now, time)
+        callback()
+        return True
+
+    def getNowMilliseconds(self):
+        """
+        Get the time on the simulated clock.
+        """
+        return self._now
+
+class MemoryFace(object):
+    def __init__(
+          self, onInterest, delay = 0.0, lossRate = 0.0, seed = 0,
+          bandwidth = None, queueLimit = None, clock = None):
+        """
+        Create a MemoryFace which answers Interests by calling onInterest.
+        This sets the RttEstimator of the face (see
+        RttEstimator.getFaceRttEstimator) to one which measures round-trip
+        times on the simulated clock.
+
+        :param onInterest: This calls onInterest(interest) which returns the
+          Data packet, or None for no answer so that the Interest times out.
+        :type onInterest: function object
+        :param float delay: (optional) The simulated round-trip time in
+          milliseconds. If omitted, use 0.
+        :param float lossRate: (optional) The probability from 0 to 1 that an
+          Interest is dropped so that it times out. If omitted, use 0.
+        :param int seed: (optional) The random seed for lossRate.
+        :param float bandwidth: (optional) The number of Data packets per
+          second of a simulated bottleneck link, or None for no limit. A Data
+          packet waits in the link queue until the previous one is sent.
+        :param int queueLimit: (optional) The maximum number of Data packets in
+          the link queue, or None for no limit. A Data packet which arrives when
+          the queue is full is dropped so that the Interest times out.
+        :param SimulatedClock clock: (optional) The clock for the events of
+          this face, to share it with other MemoryFace objects. If omitted,
+          create a new one.
+        """
+        self._onInterest = onInterest
+        self._delay = delay
+        self._lossRate = lossRate
+        self._random = random.Random(seed)
+        self._bandwidth = bandwidth
+        self._queueLimit = queueLimit
+        # The simulated time when the link finishes sending the queued packets.
+        self._linkFreeTime = 0.0
+        self._clock = clock if clock != None else SimulatedClock()
+        RttEstimator.setFaceRttEstimator(self, RttEstimator(clock = self._clock))
+        # The key is the pending Interest ID and the value is True.
+        self._pendingInterests = {}
+        self._lastPendingInterestId = 0
+        # The set of Interest name URIs which are dropped the next time.
+        self._dropOnce = set()
+        self._interestCount = 0
+        self._dropCount = 0
+
+    def expressInterest(
+          self, name, interestTemplate, onData, onTimeout = None,
+          onNetworkNack = None):
+        """
+        Express an Interest for the name with the options in interestTemplate,
+        like Face.expressInterest(name, interestTemplate, ...).
+
+        :return: The pending Interest ID which can be used in
+          removePendingInterest.
+        :rtype: int
+        """
+        interest = Interest(interestTemplate)
+        interest.setName(name)
+        self._lastPendingInterestId += 1
+        pendingInterestId = self._lastPendingInterestId
+        self._pendingInterests[pendingInterestId] = True
+        self._interestCount += 1
+
+        uri = None
+        if len(self._dropOnce) > 0:
+            uri = name.toUri()
+        data = None
+        if uri != None and uri in self._dropOnce:
+            self._dropOnce.remove(uri)
+            self._dropCount += 1
+        elif self._lossRate > 0 and self._random.random() < self._lossRate:
+            self._dropCount += 1
+        else:
+            data = self._onInterest(interest)
+
+        delay = self._delay
+        if data != None and self._bandwidth != None:
+            now = self._clock.getNowMilliseconds()
+            sendTime = 1000.0 / self._bandwidth
+            queueTime = max(0.0, self._linkFreeTime - now)
+            if (self._queueLimit != None and
+                queueTime >= self._queueLimit * sendTime):
+                # The queue is full.
+                data = None
+                self._dropCount += 1
+            else:
+                self._linkFreeTime = now + queueTime + sendTime
+                delay += queueTime + sendTime
+
+        if data != None:
+            def onAnswer():
+                if self._pendingInterests.pop(pendingInterestId, None):
+                    onData(interest, data)
+            self.callLater(delay, onAnswer)
+        else:
+            lifetime = interest.getInterestLifetimeMilliseconds()
+            if lifetime == None:
+                lifetime = 4000.0
+            def onExpire():
+                if (self._pendingInterests.pop(pendingInterestId, None) and
+                    onTimeout != None):
+                    onTimeout(interest)
+            self.callLater(lifetime, onExpire)
+
+        return pendingInterestId
+
+    def removePendingInterest(self, pendingInterestId):
+        """
+        Remove the pending Interest so that its callbacks are not called.
+
+        :param int pendingInterestId: The ID returned from expressInterest.
+        """
+        self._pendingInterests.pop(pendingInterestId, None)
+
+    def callLater(self, delayMilliseconds, callback):
+        """
+        Call callback() after the given delay on the simulated clock.
+        """
+        self._clock.callLater(delayMilliseconds, callback)
+
+    def dropOnce(self, name):
+        """
+        Drop the next Interest for the name so that it times out.
+
+        :param Name name: The Interest name.
+        """
+        self._dropOnce.add(Name(name).toUri())
+
+    def processEvents(self):
+        """
+        Advance the simulated clock to the next event and call it. If the
+        clock is shared, this calls the events of the other faces too.
+
+        :return: False if there are no more events.
+        :rtype: bool
+        """
+        return self._clock.processEvents()
+
+    def run(self, isDone):
+        """
+        Call processEvents until isDone() returns True or there are no events.
+        """
+        while not isDone():
+            if not self.processEvents():
+                break
+
+    def getNowMilliseconds(self):
+        """
+        Get the time on the simulated clock.
+        """
+        return self._clock.getNowMilliseconds()
+
+    def getClock(self):
+        return self._clock
+
+    def getInterestCount(self):
+        return self._interestCount
+
+    def getDropCount(self):
+        return self._dropCount
+
+class SegmentProducer(object):
+    def __init__(self, prefix, content, segmentSize, setFinalBlockId = True):
+        """
+        Create a SegmentProducer to answer Interests for segments of content
+        under prefix. An Interest for prefix with ChildSelector 1 gets the last
+        segment. Use onInterest as the MemoryFace onInterest.
+
+        :param prefix: The name prefix of the segments.
+        :type prefix: Name or str
+        :param content: The content to split into segments. If this is an int,
+          it is the size of content of zero bytes which is made as needed so
+          that a very large object is not held in memory.
+        :type content: bytes or bytearray or int
+        :param int segmentSize: The maximum content size of each segment.
+        :param bool setFinalBlockId: (optional) If True (the default), set the
+          FinalBlockId of each segment.
+        """
+        self._prefix = Name(prefix)
+        self._segmentSize = segmentSize
+        self._setFinalBlockId = setFinalBlockId
+        if type(content) is int:
+            self._content = None
+            self._contentSize = content
+            # Share one block of zeros for the content of all the segments.
+            self._zeros = bytearray(segmentSize)
+        else:
+            self._content = content
+            self._contentSize = len(content)
+        self._nSegments = max(
+          1, (self._contentSize + segmentSize - 1) // segmentSize)
+
+    def getSegmentCount(self):
+        return self._nSegments
+
+    def onInterest(self, interest):
+        name = interest.getName()
+        if (name.size() == self._prefix.size() and
+            interest.getChildSelector() == 1):
+            segmentNumber = self._nSegments - 1
+        elif (name.size() == self._prefix.size() + 1 and
+              name[-1].isSegment()):
+            segmentNumber = name[-1].toSegment()
+            if segmentNumber >= self._nSegments:
+                return None
+        else:
+            return None
+        if not self._prefix.isPrefixOf(name):
+            return None
+
+        data = Data(Name(self._prefix).appendSegment(segmentNumber))
+        begin = segmentNumber * self._segmentSize
+        if self._content == None:
+            size = min(self._segmentSize, self._contentSize - begin)
+            if size == self._segmentSize:
+                data.setContent(Blob(self._zeros, False))
+            else:
+                data.setContent(Blob(self._zeros[:size], False))
+        else:
+            data.setContent(Blob(
+              self._content[begin:begin + self._segmentSize], False))
+        if self._setFinalBlockId:
+            data.getMetaInfo().setFinalBlockId(
+              Name.Component.fromSegment(self._nSegments - 1))
+        return data
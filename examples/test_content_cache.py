@@ -0,0 +1,136 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests ContentCache by setting the Data of leaf nodes directly, without a
+Face. It checks that the least recently used content is evicted when the total
+size is more than the maximum, that getContent() counts as a use, that a pinned
+node is not evicted until it is unpinned, and that setPruneEvicted removes
+evicted nodes from the tree.
+"""
+
+from pyndn import Name, Data
+from pycnl import Namespace, ContentCache
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = Name("/ndn/test/cache")
+
+def setLeafData(namespace, component):
+    """
+    Set the Data of the child with the component and 100 bytes of content.
+
+    :return: The child Namespace.
+    :rtype: Namespace
+    """
+    child = namespace[component]
+    data = Data(Name(prefix).append(component))
+    data.setContent(bytearray(100))
+    child.setData(data)
+    return child
+
+def isHeld(namespace):
+    """
+    Check if the namespace has content. Use _content since getContent() counts
+    as a use of the node.
+    """
+    return not namespace._content.isNull()
+
+def makeCache(nLeaves):
+    """
+    Make a Namespace with a ContentCache whose maximum is the size of nLeaves
+    leaf nodes from setLeafData.
+
+    :return: A tuple of the Namespace and the ContentCache.
+    :rtype: tuple
+    """
+    namespace = Namespace(prefix)
+    contentCache = ContentCache(namespace, 1000000)
+    setLeafData(namespace, "size")
+    leafSize = contentCache.getTotalBytes()
+    namespace.removeChild("size")
+    contentCache.setMaxBytes(nLeaves * leafSize)
+    return namespace, contentCache
+
+def testLeastRecentlyUsed():
+    namespace, contentCache = makeCache(2)
+    a = setLeafData(namespace, "a")
+    b = setLeafData(namespace, "b")
+    # Use a so that b is the least recently used.
+    a.getContent()
+    c = setLeafData(namespace, "c")
+    # Evicted content is a miss.
+    b.getContent()
+
+    ok = (isHeld(a) and not isHeld(b) and b._data == None and isHeld(c) and
+          contentCache.getEvictionCount() == 1 and
+          contentCache.getTotalBytes() <= contentCache.getMaxBytes() and
+          contentCache.getHitCount() == 1 and contentCache.getMissCount() == 1)
+    dump("Least recently used", "ok" if ok else "FAILED:", "evictions",
+         contentCache.getEvictionCount(), "hits", contentCache.getHitCount(),
+         "misses", contentCache.getMissCount())
+    return ok
+
+def testPin():
+    namespace, contentCache = makeCache(2)
+    a = namespace["a"]
+    # Pin before the content is set.
+    contentCache.pin(a)
+    setLeafData(namespace, "a")
+    for component in ["b", "c", "d"]:
+        setLeafData(namespace, component)
+    isKeptWhilePinned = isHeld(a) and contentCache.isPinned(a)
+
+    contentCache.unpin(a)
+    # Now a is the most recently used.
+    setLeafData(namespace, "e")
+    isKeptAfterUnpin = isHeld(a)
+    setLeafData(namespace, "f")
+
+    ok = (isKeptWhilePinned and isKeptAfterUnpin and
+          not contentCache.isPinned(a) and not isHeld(a) and
+          contentCache.getTotalBytes() <= contentCache.getMaxBytes())
+    dump("Pin", "ok" if ok else "FAILED:", "kept while pinned",
+         isKeptWhilePinned, "evictions", contentCache.getEvictionCount())
+    return ok
+
+def testPruneEvicted():
+    namespace, contentCache = makeCache(2)
+    contentCache.setPruneEvicted(True)
+    for component in ["a", "b", "c", "d"]:
+        setLeafData(namespace, component)
+
+    ok = ([component.toEscapedString()
+           for component in namespace.getChildComponents()] == ["c", "d"] and
+          namespace.findChild("a") == None)
+    dump("Prune evicted", "ok" if ok else "FAILED:", "children",
+         namespace.getChildCount())
+    return ok
+
+def main():
+    ok = testLeastRecentlyUsed()
+    ok = testPin() and ok
+    ok = testPruneEvicted() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
@@ -0,0 +1,132 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests Namespace.isPending() and how Namespace.expressInterest aggregates
+calls for the same node while an Interest is pending, using a local in-memory
+producer (see memory_face.py) on a simulated clock. It checks that only one
+Interest is sent, that the callbacks of each call are called when the Data
+packet is received or on the final timeout, and that isPending() is True only
+while the Interest is outstanding.
+"""
+
+from pyndn import Name, Data
+from pycnl import Namespace
+from memory_face import MemoryFace
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = Name("/ndn/test/pending")
+
+def onInterest(interest):
+    """
+    Answer an Interest for prefix/data, but not prefix/missing.
+    """
+    if interest.getName()[-1].toEscapedString() != "data":
+        return None
+    data = Data(interest.getName())
+    data.setContent("hello")
+    return data
+
+def testData():
+    face = MemoryFace(onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+    dataNamespace = namespace["data"]
+
+    onDataCount = [0]
+    def onData(namespace, data):
+        onDataCount[0] += 1
+
+    isPendingBefore = dataNamespace.isPending()
+    for i in range(3):
+        dataNamespace.expressInterest(None, None, None, None, onData)
+    isPendingWhileSent = dataNamespace.isPending()
+    face.run(lambda: not dataNamespace.content.isNull())
+
+    ok = (not isPendingBefore and isPendingWhileSent and
+          not dataNamespace.isPending() and onDataCount[0] == 3 and
+          face.getInterestCount() == 1 and
+          dataNamespace.content.toRawStr() == "hello")
+    dump("Aggregate until Data", "ok" if ok else "FAILED:", "Interests",
+         face.getInterestCount(), "onData calls", onDataCount[0])
+    return ok
+
+def testTimeout():
+    face = MemoryFace(onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+    missingNamespace = namespace["missing"]
+
+    onTimeoutCounts = [0, 0]
+    def onTimeout0(namespace):
+        onTimeoutCounts[0] += 1
+    def onTimeout1(namespace):
+        onTimeoutCounts[1] += 1
+
+    missingNamespace.expressInterest(None, onTimeout0)
+    missingNamespace.expressInterest(None, onTimeout1)
+    isPendingWhileSent = missingNamespace.isPending()
+    while face.processEvents():
+        pass
+
+    # The Interest is sent once and retransmitted maxRetries times, but not
+    # sent again for the second call.
+    ok = (isPendingWhileSent and not missingNamespace.isPending() and
+          onTimeoutCounts == [1, 1] and face.getInterestCount() == 4)
+    dump("Aggregate until final timeout", "ok" if ok else "FAILED:",
+         "Interests", face.getInterestCount(), "onTimeout calls",
+         onTimeoutCounts)
+    return ok
+
+def testExpressAgain():
+    """
+    Check that expressInterest after the Data is received sends a new
+    Interest.
+    """
+    face = MemoryFace(onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+    dataNamespace = namespace["data"]
+
+    dataNamespace.expressInterest()
+    while face.processEvents():
+        pass
+    dataNamespace.expressInterest()
+    isPendingAgain = dataNamespace.isPending()
+    while face.processEvents():
+        pass
+
+    ok = (isPendingAgain and not dataNamespace.isPending() and
+          face.getInterestCount() == 2)
+    dump("Express again after Data", "ok" if ok else "FAILED:", "Interests",
+         face.getInterestCount())
+    return ok
+
+def main():
+    ok = testData()
+    ok = testTimeout() and ok
+    ok = testExpressAgain() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
@@ -0,0 +1,112 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests Namespace.removeChild and pruneSubtree. It checks that a removed
+child becomes the root of a separate tree which keeps its name and children,
+that a ContentCache forgets the content of the removed nodes, that
+pruneSubtree keeps the content of the node, and that SegmentedContent with
+setPruneSegments(True) leaves no segment nodes after fetching from a local
+in-memory producer (see memory_face.py).
+"""
+
+from pyndn import Name, Data
+from pycnl import Namespace, ContentCache, SegmentedContent
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = Name("/ndn/test/remove")
+
+def setData(namespace):
+    """
+    Set the Data of the namespace with 100 bytes of content.
+    """
+    data = Data(namespace.getName())
+    data.setContent(bytearray(100))
+    namespace.setData(data)
+
+def testRemoveChild():
+    namespace = Namespace(prefix)
+    contentCache = ContentCache(namespace, 1000000)
+    setData(namespace["b"])
+    bBytes = contentCache.getTotalBytes()
+    child = namespace["a"]
+    setData(child["1"])
+    setData(child["2"])
+
+    removed = namespace.removeChild("a")
+    ok = (removed is child and not namespace.hasChild("a") and
+          namespace.hasChild("b") and child.getParent() == None and
+          child.getName().equals(Name(prefix).append("a")) and
+          child.getChildCount() == 2 and
+          child["1"].getName().equals(Name(prefix).append("a").append("1")) and
+          # Only the content of b remains in the cache.
+          contentCache.getTotalBytes() == bBytes and
+          namespace.removeChild("missing") == None)
+    dump("Remove child", "ok" if ok else "FAILED:", "children",
+         namespace.getChildCount(), "cache bytes", contentCache.getTotalBytes())
+    return ok
+
+def testPruneSubtree():
+    namespace = Namespace(prefix)
+    contentCache = ContentCache(namespace, 1000000)
+    setData(namespace)
+    nodeBytes = contentCache.getTotalBytes()
+    setData(namespace["a"]["1"])
+    setData(namespace["b"])
+
+    namespace.pruneSubtree()
+    childCount = namespace.getChildCount()
+    ok = (childCount == 0 and not namespace.hasChild("a") and
+          not namespace.content.isNull() and
+          contentCache.getTotalBytes() == nodeBytes and
+          # Adding a child again makes a new node.
+          namespace["a"].content.isNull())
+    dump("Prune subtree", "ok" if ok else "FAILED:", "children", childCount,
+         "cache bytes", contentCache.getTotalBytes())
+    return ok
+
+def testPruneSegments():
+    contentPrefix = "/ndn/test/remove/content/%FD%00"
+    producer = SegmentProducer(contentPrefix, 1000, 10)
+    face = MemoryFace(producer.onInterest, 10.0)
+    namespace = Namespace(contentPrefix)
+    namespace.setFace(face)
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.setPruneSegments(True)
+    segmentedContent.start()
+    face.run(lambda: not namespace.content.isNull())
+
+    ok = namespace.content.size() == 1000 and namespace.getChildCount() == 0
+    dump("Prune segments", "ok" if ok else "FAILED:", "children",
+         namespace.getChildCount())
+    return ok
+
+def main():
+    ok = testRemoveChild()
+    ok = testPruneSubtree() and ok
+    ok = testPruneSegments() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
@@ -0,0 +1,165 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests how SegmentStream discovers the final segment with the
+ChildSelector Interest when the segments have no FinalBlockId, using a local
+in-memory producer (see memory_face.py) on a simulated clock. It checks that the
+whole object is fetched when the last segment was already received before the
+reply to the ChildSelector Interest, when the reply is not a segment, when the
+reply is not the final segment (for example from a cache which has only the
+first segments), and with random loss.
+"""
+
+from pyndn import Name, Data, Interest
+from pycnl import Namespace, SegmentStream, SegmentedContent
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = "/ndn/test/discovery/%FD%00"
+nSegments = 100
+
+def fetch(face, namespace, probeFinalSegment = False):
+    """
+    Fetch the segments with SegmentStream and return the number of segments and
+    the final segment number.
+    """
+    count = [0]
+    isFinished = [False]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            isFinished[0] = True
+        else:
+            count[0] += 1
+
+    segmentStream = SegmentStream(namespace)
+    segmentStream.probeFinalSegment = probeFinalSegment
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.start()
+    face.run(lambda: isFinished[0])
+
+    return count[0], segmentStream.finalSegmentNumber
+
+def check(description, count, finalSegmentNumber):
+    ok = count == nSegments and finalSegmentNumber == nSegments - 1
+    dump(description, "ok" if ok else "FAILED:", "segments", count,
+         "final segment", finalSegmentNumber)
+    return ok
+
+def testLastSegmentFirst():
+    """
+    Fetch the last segment before starting, so that the reply to the
+    ChildSelector Interest is a segment which already has content.
+    """
+    producer = SegmentProducer(prefix, nSegments * 10, 10, False)
+    face = MemoryFace(producer.onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    lastSegment = namespace[Name.Component.fromSegment(nSegments - 1)]
+    lastSegment.expressInterest()
+    face.run(lambda: not lastSegment.content.isNull())
+
+    count, finalSegmentNumber = fetch(face, namespace)
+    return check("Last segment first", count, finalSegmentNumber)
+
+def testNotSegmentReply():
+    """
+    The producer answers the ChildSelector Interest with Data which is not a
+    segment.
+    """
+    producer = SegmentProducer(prefix, nSegments * 10, 10, False)
+    def onInterest(interest):
+        if interest.getChildSelector() == 1:
+            return Data(Name(prefix).append("_meta"))
+        return producer.onInterest(interest)
+
+    face = MemoryFace(onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    count, finalSegmentNumber = fetch(face, namespace)
+    return check("Reply not a segment", count, finalSegmentNumber)
+
+def testReplyNotFinal():
+    """
+    The producer answers the ChildSelector Interest with segment 5 of 20, like
+    a cache which has only the first segments. Check that the stream and
+    SegmentedContent still get all the segments.
+    """
+    nCachedSegments = 6
+    nAllSegments = 20
+    segmentSize = 10
+    producer = SegmentProducer(
+      prefix, nAllSegments * segmentSize, segmentSize, False)
+    cachedName = Name(prefix).appendSegment(nCachedSegments - 1)
+    def onInterest(interest):
+        if interest.getChildSelector() == 1:
+            return producer.onInterest(Interest(cachedName))
+        return producer.onInterest(interest)
+
+    face = MemoryFace(onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+    count, finalSegmentNumber = fetch(face, namespace)
+    ok = count == nAllSegments and finalSegmentNumber == nAllSegments - 1
+
+    face = MemoryFace(onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.start()
+    face.run(lambda: not namespace.content.isNull() or
+             segmentedContent.getErrorMessage() != None)
+    contentSize = namespace.content.size()
+    ok = ok and contentSize == nAllSegments * segmentSize
+
+    dump("Reply not the final segment", "ok" if ok else "FAILED:", "segments",
+         count, "final segment", finalSegmentNumber, "content size",
+         contentSize)
+    return ok
+
+def testLoss(probeFinalSegment):
+    producer = SegmentProducer(prefix, nSegments * 10, 10, False)
+    ok = True
+    for seed in range(10):
+        face = MemoryFace(producer.onInterest, 10.0, 0.2, seed)
+        namespace = Namespace(prefix)
+        namespace.setFace(face)
+
+        count, finalSegmentNumber = fetch(face, namespace, probeFinalSegment)
+        if not check("20% loss, seed " + str(seed) + ", probe " +
+                     str(probeFinalSegment), count, finalSegmentNumber):
+            ok = False
+    return ok
+
+def main():
+    ok = testLastSegmentFirst()
+    ok = testNotSegmentReply() and ok
+    ok = testReplyNotFinal() and ok
+    ok = testLoss(False) and ok
+    ok = testLoss(True) and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
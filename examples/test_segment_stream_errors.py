@@ -0,0 +1,141 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests that SegmentStream stops with an error when the producer never
+answers the Interest for one segment, using a local in-memory producer (see
+memory_face.py) on a simulated clock. It checks that onError is called, that the
+number of Interests is bounded, that iterSegments raises the error and that
+SegmentedContent calls its onError instead of setting the content.
+"""
+
+from pyndn import Name
+from pycnl import Namespace, SegmentStream, SegmentedContent
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = "/ndn/test/missing/%FD%00"
+nSegments = 100
+missingSegmentNumber = 50
+
+def makeFace(setFinalBlockId):
+    """
+    Make a MemoryFace for a producer which never answers the Interest for
+    missingSegmentNumber.
+    """
+    producer = SegmentProducer(prefix, nSegments * 10, 10, setFinalBlockId)
+    missingName = Name(prefix).appendSegment(missingSegmentNumber)
+    def onInterest(interest):
+        if interest.getName().equals(missingName):
+            return None
+        return producer.onInterest(interest)
+
+    return MemoryFace(onInterest, 10.0)
+
+def testOnError(setFinalBlockId):
+    face = makeFace(setFinalBlockId)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    count = [0]
+    isFinished = [False]
+    errorMessage = [None]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            isFinished[0] = True
+        else:
+            count[0] += 1
+
+    def onError(segmentStream, message, callbackId):
+        errorMessage[0] = message
+
+    segmentStream = SegmentStream(namespace)
+    segmentStream.addOnSegment(onSegment)
+    segmentStream.addOnError(onError)
+    segmentStream.start()
+    face.run(lambda: isFinished[0] or errorMessage[0] != None)
+
+    # Check that no Interests are still pending after the error.
+    while face.processEvents():
+        pass
+    interestCount = face.getInterestCount()
+
+    ok = (errorMessage[0] != None and not isFinished[0] and
+          count[0] == missingSegmentNumber and
+          segmentStream.getErrorMessage() == errorMessage[0] and
+          interestCount < 10 * nSegments)
+    dump("onError, FinalBlockId", setFinalBlockId, "ok" if ok else "FAILED:",
+         "segments", count[0], "Interests", interestCount)
+    dump("  ", errorMessage[0])
+    return ok
+
+def testIterSegments():
+    face = makeFace(True)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    count = 0
+    try:
+        for segmentNamespace in SegmentStream(namespace).iterSegments(0):
+            count += 1
+        ok = False
+    except RuntimeError:
+        ok = count == missingSegmentNumber
+    dump("iterSegments raises", "ok" if ok else "FAILED", count)
+    return ok
+
+def testSegmentedContent():
+    face = makeFace(True)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    isContentSet = [False]
+    errorMessage = [None]
+    def onContentSet(namespace, contentNamespace, callbackId):
+        if contentNamespace is namespace:
+            isContentSet[0] = True
+
+    def onError(segmentedContent, message, callbackId):
+        errorMessage[0] = message
+
+    namespace.addOnContentSet(onContentSet)
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.addOnError(onError)
+    segmentedContent.start()
+    face.run(lambda: isContentSet[0] or errorMessage[0] != None)
+
+    ok = (errorMessage[0] != None and not isContentSet[0] and
+          segmentedContent.getErrorMessage() == errorMessage[0] and
+          namespace.content.isNull())
+    dump("SegmentedContent onError", "ok" if ok else "FAILED")
+    return ok
+
+def main():
+    ok = testOnError(True)
+    ok = testOnError(False) and ok
+    ok = testIterSegments() and ok
+    ok = testSegmentedContent() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
@@ -0,0 +1,76 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2016-2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests fetching segments in order with SegmentStream.iterSegments, and with
+SegmentStream.aiterSegments on asyncio using a ThreadsafeFace, instead of an
+onSegment callback and a processEvents loop.
+"""
+
+import sys
+from pyndn import Face
+from pycnl import Namespace, SegmentStream
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = "/ndn/edu/ucla/remap/demo/ndn-js-test/named-data.net/project/ndn-ar2011.html/%FDX%DC5B"
+
+def fetchWithGenerator():
+    page = Namespace(prefix)
+    page.setFace(Face("memoria.ndn.ucla.edu"))
+
+    totalSize = 0
+    for segmentNamespace in SegmentStream(page).iterSegments():
+        totalSize += segmentNamespace.content.size()
+    dump("iterSegments got content size", totalSize)
+
+def fetchWithAsyncIterator():
+    import asyncio
+    from pyndn.threadsafe_face import ThreadsafeFace
+
+    loop = asyncio.get_event_loop()
+    page = Namespace(prefix)
+    page.setFace(ThreadsafeFace(loop, "memoria.ndn.ucla.edu"))
+    segmentIterator = SegmentStream(page).aiterSegments()
+
+    def fetch(totalSize):
+        future = segmentIterator.__anext__()
+        def onSegment(future):
+            if isinstance(future.exception(), StopAsyncIteration):
+                dump("aiterSegments got content size", totalSize)
+                loop.stop()
+            else:
+                fetch(totalSize + future.result().content.size())
+        future.add_done_callback(onSegment)
+
+    # In Python 3.5 or later, you can use:
+    # async for segmentNamespace in segmentIterator: ...
+    fetch(0)
+    loop.run_forever()
+
+def main():
+    fetchWithGenerator()
+    if sys.version_info >= (3, 5):
+        fetchWithAsyncIterator()
+
+main()
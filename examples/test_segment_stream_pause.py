@@ -0,0 +1,171 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests SegmentStream pause(), resume() and setMaxBufferedBytes, using a
+local in-memory producer (see memory_face.py) on a simulated clock. It checks
+that no new Interests are sent while paused, including the Interests to find
+the final segment when the segments have no FinalBlockId, that resume()
+supplies all the segments in order, and that the buffered bytes stay bounded
+while an earlier segment is missing.
+"""
+
+from pyndn import Name
+from pycnl import Namespace, SegmentStream
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = "/ndn/test/pause/%FD%00"
+segmentSize = 10
+pipelineSize = 32
+
+class Fetcher(object):
+    """
+    Fetcher makes a SegmentStream for a MemoryFace and records the segment
+    numbers supplied to onSegment, where None is the "end of stream".
+    """
+    def __init__(self, nSegments, setFinalBlockId):
+        producer = SegmentProducer(
+          prefix, nSegments * segmentSize, segmentSize, setFinalBlockId)
+        # The set of URIs of the Interests sent to the producer.
+        self.interestUris = set()
+        def onInterest(interest):
+            self.interestUris.add(interest.getName().toUri())
+            return producer.onInterest(interest)
+        self.face = MemoryFace(onInterest, 10.0)
+        namespace = Namespace(prefix)
+        namespace.setFace(self.face)
+        self.segmentStream = SegmentStream(namespace)
+        self.segmentStream.addOnSegment(self._onSegment)
+        self.segmentNumbers = []
+        # If not None, pause when this segment number is supplied.
+        self.pauseAt = None
+
+    def _onSegment(self, segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            self.segmentNumbers.append(None)
+        else:
+            segmentNumber = segmentNamespace.getName()[-1].toSegment()
+            self.segmentNumbers.append(segmentNumber)
+            if segmentNumber == self.pauseAt:
+                segmentStream.pause()
+
+    def isFinished(self):
+        return len(self.segmentNumbers) > 0 and self.segmentNumbers[-1] == None
+
+    def runWhilePaused(self):
+        """
+        Process all events. Return True if no Interests were sent for new
+        names (but outstanding Interests may be retransmitted) and onSegment
+        was not called.
+        """
+        interestUris = set(self.interestUris)
+        segmentCount = len(self.segmentNumbers)
+        while self.face.processEvents():
+            pass
+        return (self.interestUris == interestUris and
+                len(self.segmentNumbers) == segmentCount)
+
+def testPauseResume(setFinalBlockId, probeFinalSegment, pauseAt):
+    nSegments = 100
+    fetcher = Fetcher(nSegments, setFinalBlockId)
+    fetcher.segmentStream.probeFinalSegment = probeFinalSegment
+    fetcher.pauseAt = pauseAt
+    fetcher.segmentStream.start()
+    fetcher.face.run(lambda: fetcher.segmentStream.isPaused())
+
+    ok = fetcher.runWhilePaused() and fetcher.segmentNumbers[-1] == pauseAt
+    if not ok:
+        dump("  FAILED: Interests or segments while paused")
+    fetcher.segmentStream.resume()
+    fetcher.face.run(fetcher.isFinished)
+    ok = (fetcher.segmentNumbers == list(range(nSegments)) + [None] and
+          fetcher.segmentStream.finalSegmentNumber == nSegments - 1 and ok)
+    dump("Pause at", pauseAt, "FinalBlockId", setFinalBlockId, "probe",
+         probeFinalSegment, "ok" if ok else "FAILED")
+    return ok
+
+def testPauseBeforeStart():
+    """
+    Pause before start() with no FinalBlockId, so that start() doesn't send the
+    ChildSelector Interest until resume().
+    """
+    nSegments = 100
+    fetcher = Fetcher(nSegments, False)
+    fetcher.segmentStream.pause()
+    fetcher.segmentStream.start()
+    ok = fetcher.runWhilePaused() and fetcher.face.getInterestCount() == 0
+
+    fetcher.segmentStream.resume()
+    fetcher.face.run(fetcher.isFinished)
+    ok = (fetcher.segmentNumbers == list(range(nSegments)) + [None] and ok)
+    dump("Pause before start", "ok" if ok else "FAILED")
+    return ok
+
+def fetchWithMissingSegment(maxBufferedBytes):
+    """
+    Fetch where the first Interest for segment 10 is dropped, so that the
+    later segments are buffered until it is retransmitted after the timeout.
+    Return the maximum buffered bytes and the segment numbers.
+    """
+    fetcher = Fetcher(1000, True)
+    fetcher.face.dropOnce(Name(prefix).appendSegment(10))
+    fetcher.segmentStream.interestPipelineSize = pipelineSize
+    fetcher.segmentStream.fastRetransmitThreshold = 0
+    fetcher.segmentStream.maxBufferedBytes = maxBufferedBytes
+    fetcher.segmentStream.start()
+
+    maxBuffered = 0
+    while not fetcher.isFinished():
+        maxBuffered = max(
+          maxBuffered, fetcher.segmentStream.getBufferedBytes())
+        if not fetcher.face.processEvents():
+            break
+    return maxBuffered, fetcher.segmentNumbers
+
+def testMaxBufferedBytes():
+    maxBufferedBytes = 100
+    unlimitedBuffered, segmentNumbers = fetchWithMissingSegment(None)
+    maxBuffered, limitedSegmentNumbers = fetchWithMissingSegment(
+      maxBufferedBytes)
+
+    # The buffer can still grow by the segments whose Interests are
+    # outstanding when it reaches the maximum.
+    bound = maxBufferedBytes + pipelineSize * segmentSize
+    ok = (maxBuffered <= bound and unlimitedBuffered > bound and
+          segmentNumbers == list(range(1000)) + [None] and
+          limitedSegmentNumbers == segmentNumbers)
+    dump("maxBufferedBytes", maxBufferedBytes, "ok" if ok else "FAILED:",
+         "max buffered", maxBuffered, "without limit", unlimitedBuffered)
+    return ok
+
+def main():
+    ok = testPauseResume(True, False, 20)
+    ok = testPauseResume(False, False, 20) and ok
+    ok = testPauseResume(False, True, 1) and ok
+    ok = testPauseBeforeStart() and ok
+    ok = testMaxBufferedBytes() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
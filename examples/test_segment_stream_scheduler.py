@@ -0,0 +1,111 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests SegmentStreamScheduler with two SegmentStream objects which fetch
+from local in-memory producers (see memory_face.py) on a shared simulated
+clock. It checks that the outstanding Interests never exceed the budget, that
+the Interests are shared in proportion to the weights of the streams, and that
+a stream with a higher priority goes first.
+"""
+
+from pycnl import Namespace, SegmentStream, SegmentStreamScheduler
+from memory_face import MemoryFace, SimulatedClock, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefixes = ["/ndn/test/scheduler/a/%FD%00", "/ndn/test/scheduler/b/%FD%00"]
+nSegments = 1000
+budget = 16
+
+def fetch(weights, priorities):
+    """
+    Fetch with a stream for each prefix, added to a SegmentStreamScheduler
+    with the given weights and priorities. Check the budget after each event.
+
+    :return: A tuple of True if the budget was never exceeded, and the list of
+      the number of Interests of each stream before the first stream finished.
+    :rtype: tuple
+    """
+    clock = SimulatedClock()
+    scheduler = SegmentStreamScheduler(budget)
+    streams = []
+    for i in range(len(prefixes)):
+        producer = SegmentProducer(prefixes[i], nSegments, 1)
+        face = MemoryFace(producer.onInterest, 10.0, clock = clock)
+        namespace = Namespace(prefixes[i])
+        namespace.setFace(face)
+
+        segmentStream = SegmentStream(namespace)
+        # Use a window larger than the budget so that the streams compete.
+        segmentStream.interestPipelineSize = 2 * budget
+        segmentStream.setSegmentCountHint(nSegments)
+        scheduler.addStream(segmentStream, weights[i], priorities[i])
+        streams.append((segmentStream, face))
+
+    finishedCount = [0]
+    firstCounts = [None]
+    def onSegment(segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            finishedCount[0] += 1
+            if firstCounts[0] == None:
+                firstCounts[0] = [face.getInterestCount()
+                                  for segmentStream, face in streams]
+
+    for segmentStream, face in streams:
+        segmentStream.addOnSegment(onSegment)
+        segmentStream.start()
+
+    isWithinBudget = True
+    while finishedCount[0] < len(streams):
+        if scheduler.getOutstandingInterestCount() > budget:
+            isWithinBudget = False
+        if not clock.processEvents():
+            break
+    return isWithinBudget, firstCounts[0]
+
+def testWeights():
+    isWithinBudget, interestCounts = fetch([1.0, 3.0], [0, 0])
+    ratio = float(interestCounts[1]) / interestCounts[0]
+    ok = isWithinBudget and 2.5 <= ratio <= 3.5
+    dump("Weights 1 and 3", "ok" if ok else "FAILED:", "within budget",
+         isWithinBudget, "Interests", interestCounts, "ratio", round(ratio, 2))
+    return ok
+
+def testPriority():
+    isWithinBudget, interestCounts = fetch([1.0, 1.0], [0, 1])
+    # The low priority stream only sends Interests when it starts, before the
+    # high priority stream, and when the high priority stream has sent
+    # Interests for all its segments, so at most the budget each time.
+    ok = (isWithinBudget and interestCounts[1] == nSegments and
+          interestCounts[0] <= 2 * budget)
+    dump("Priority", "ok" if ok else "FAILED:", "within budget",
+         isWithinBudget, "Interests", interestCounts)
+    return ok
+
+def main():
+    ok = testWeights()
+    ok = testPriority() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
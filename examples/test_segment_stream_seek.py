@@ -0,0 +1,148 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests SegmentStream start(interestCount, fromSegment), fetchRange and
+seek, using a local in-memory producer (see memory_face.py) on a simulated
+clock. It checks the segment numbers supplied to onSegment for a backward seek,
+a forward seek and a seek after the stream finished, and that fetchRange
+doesn't request segments past the end of the range.
+"""
+
+from pycnl import Namespace, SegmentStream
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = "/ndn/test/seek/%FD%00"
+nSegments = 100
+
+class Fetcher(object):
+    """
+    Fetcher makes a SegmentStream for a MemoryFace and records the segment
+    numbers supplied to onSegment, where None is the "end of stream".
+    """
+    def __init__(self):
+        producer = SegmentProducer(prefix, nSegments * 10, 10)
+        # The set of segment numbers of the Interests sent to the producer.
+        self.requestedSegments = set()
+        def onInterest(interest):
+            if interest.getName()[-1].isSegment():
+                self.requestedSegments.add(interest.getName()[-1].toSegment())
+            return producer.onInterest(interest)
+        self.face = MemoryFace(onInterest, 10.0)
+
+        namespace = Namespace(prefix)
+        namespace.setFace(self.face)
+        self.segmentStream = SegmentStream(namespace)
+        self.segmentStream.addOnSegment(self._onSegment)
+        self.segmentNumbers = []
+
+    def _onSegment(self, segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace == None:
+            self.segmentNumbers.append(None)
+        else:
+            self.segmentNumbers.append(
+              segmentNamespace.getName()[-1].toSegment())
+
+    def runUntil(self, count):
+        """
+        Process events until count values are supplied to onSegment, or the
+        "end of stream".
+        """
+        self.face.run(lambda: len(self.segmentNumbers) >= count or
+                      (len(self.segmentNumbers) > 0 and
+                       self.segmentNumbers[-1] == None))
+
+    def runToEnd(self):
+        self.face.run(lambda: len(self.segmentNumbers) > 0 and
+                      self.segmentNumbers[-1] == None)
+
+def check(description, segmentNumbers, expected):
+    ok = segmentNumbers == expected
+    if ok:
+        dump(description, "ok")
+    else:
+        dump(description, "FAILED: segments", segmentNumbers)
+    return ok
+
+def testStartFromSegment():
+    fetcher = Fetcher()
+    fetcher.segmentStream.start(1, 30)
+    fetcher.runToEnd()
+    return check("start from segment 30", fetcher.segmentNumbers,
+                 list(range(30, nSegments)) + [None])
+
+def testFetchRange():
+    fetcher = Fetcher()
+    fetcher.segmentStream.fetchRange(10, 20)
+    fetcher.runToEnd()
+    ok = check("fetchRange(10, 20)", fetcher.segmentNumbers,
+               list(range(10, 20)) + [None])
+    if not all(10 <= n < 20 for n in fetcher.requestedSegments):
+        dump("  FAILED: requested segments outside the range",
+             sorted(fetcher.requestedSegments))
+        ok = False
+    return ok
+
+def testSeek(fromCount, toSegment):
+    """
+    Fetch until fromCount segments are supplied, then seek to toSegment and
+    fetch to the end.
+    """
+    fetcher = Fetcher()
+    fetcher.segmentStream.start()
+    fetcher.runUntil(fromCount)
+    beforeSeek = fetcher.segmentNumbers
+    fetcher.segmentNumbers = []
+    fetcher.segmentStream.seek(toSegment)
+    fetcher.runToEnd()
+
+    ok = beforeSeek == list(range(len(beforeSeek)))
+    if not ok:
+        dump("  FAILED: segments before the seek", beforeSeek)
+    direction = "back" if toSegment < len(beforeSeek) else "forward"
+    return check(
+      "Seek " + direction + " from " + str(len(beforeSeek)) + " to " +
+      str(toSegment), fetcher.segmentNumbers,
+      list(range(toSegment, nSegments)) + [None]) and ok
+
+def testSeekAfterFinish():
+    fetcher = Fetcher()
+    fetcher.segmentStream.start()
+    fetcher.runToEnd()
+    fetcher.segmentNumbers = []
+    fetcher.segmentStream.seek(90)
+    fetcher.runToEnd()
+    return check("Seek after finish to 90", fetcher.segmentNumbers,
+                 list(range(90, nSegments)) + [None])
+
+def main():
+    ok = testStartFromSegment()
+    ok = testFetchRange() and ok
+    ok = testSeek(60, 20) and ok
+    ok = testSeek(10, 50) and ok
+    ok = testSeekAfterFinish() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
@@ -0,0 +1,189 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This tests what the consumer of SegmentedContent sees when the content can't be
+completed, using a local in-memory producer (see memory_face.py) on a simulated
+clock. When writing to the sink fails, when the digest of a segment does not
+match (see SegmentedContent.setExpectedSegmentDigests), or when there are fewer
+segments than expected segment digests, it checks that onError is called
+instead of the onContentSet callback and that the SegmentStream stops sending
+Interests. It also checks that the content is set when the digests match.
+"""
+
+import hashlib
+from pycnl import Namespace, SegmentedContent
+from memory_face import MemoryFace, SegmentProducer
+
+def dump(*list):
+    result = ""
+    for element in list:
+        result += (element if type(element) is str else str(element)) + " "
+    print(result)
+
+prefix = "/ndn/test/content/%FD%00"
+nSegments = 100
+segmentSize = 10
+
+class FailingSink(object):
+    """
+    FailingSink is a writable stream which raises IOError after writing
+    maxWriteCount times, like a full disk.
+    """
+    def __init__(self, maxWriteCount):
+        self._maxWriteCount = maxWriteCount
+        self.writeCount = 0
+
+    def write(self, buffer):
+        if self.writeCount >= self._maxWriteCount:
+            raise IOError("No space left on device")
+        self.writeCount += 1
+
+def fetch(segmentedContent, face):
+    """
+    Start the segmentedContent and process events until it is done.
+
+    :return: A tuple of True if the onContentSet callback was called for the
+      content, and the message given to onError or None.
+    :rtype: tuple
+    """
+    isContentSet = [False]
+    errorMessage = [None]
+    def onContentSet(namespace, contentNamespace, callbackId):
+        if contentNamespace is namespace:
+            isContentSet[0] = True
+
+    def onError(segmentedContent, message, callbackId):
+        errorMessage[0] = message
+
+    segmentedContent.getNamespace().addOnContentSet(onContentSet)
+    segmentedContent.addOnError(onError)
+    segmentedContent.start()
+    face.run(lambda: isContentSet[0] or errorMessage[0] != None)
+    return isContentSet[0], errorMessage[0]
+
+def testSinkWriteError():
+    producer = SegmentProducer(prefix, nSegments * segmentSize, segmentSize)
+    face = MemoryFace(producer.onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    sink = FailingSink(20)
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.setSink(sink)
+    isContentSet, errorMessage = fetch(segmentedContent, face)
+
+    interestCount = face.getInterestCount()
+    # Check that the stream doesn't send more Interests.
+    while face.processEvents():
+        pass
+
+    ok = (not isContentSet and errorMessage != None and
+          segmentedContent.getErrorMessage() == errorMessage and
+          segmentedContent.getSegmentStream().getErrorMessage() != None and
+          face.getInterestCount() == interestCount and
+          interestCount < nSegments and namespace.content.isNull())
+    dump("Sink write error", "ok" if ok else "FAILED:", "Interests",
+         interestCount)
+    dump("  ", errorMessage)
+    return ok
+
+def testSegmentDigestMismatch():
+    content = bytearray(range(256)) * 4
+    producer = SegmentProducer(prefix, content, segmentSize)
+    face = MemoryFace(producer.onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    badSegmentNumber = 30
+    segmentDigests = makeSegmentDigests(content)
+    segmentDigests[badSegmentNumber] = bytearray(32)
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.setExpectedSegmentDigests(segmentDigests)
+    isContentSet, errorMessage = fetch(segmentedContent, face)
+
+    interestCount = face.getInterestCount()
+    # Check that the outstanding Interests were cancelled and that the stream
+    # doesn't send more Interests.
+    while face.processEvents():
+        pass
+
+    ok = (not isContentSet and errorMessage != None and
+          segmentedContent.getDigestVerified() == False and
+          segmentedContent.getErrorMessage() == errorMessage and
+          face.getInterestCount() == interestCount and
+          interestCount < len(segmentDigests) and namespace.content.isNull())
+    dump("Segment digest mismatch", "ok" if ok else "FAILED:", "Interests",
+         interestCount)
+    dump("  ", errorMessage)
+    return ok
+
+def makeSegmentDigests(content):
+    return [hashlib.sha256(content[i:i + segmentSize]).digest()
+            for i in range(0, len(content), segmentSize)]
+
+def testDigestsMatch():
+    content = bytearray(range(256)) * 4
+    producer = SegmentProducer(prefix, content, segmentSize)
+    face = MemoryFace(producer.onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.setExpectedDigest(hashlib.sha256(content).digest())
+    segmentedContent.setExpectedSegmentDigests(makeSegmentDigests(content))
+    isContentSet, errorMessage = fetch(segmentedContent, face)
+
+    ok = (isContentSet and errorMessage == None and
+          segmentedContent.getDigestVerified() == True and
+          namespace.content.toBytes() == bytes(content))
+    dump("Digests match", "ok" if ok else "FAILED")
+    return ok
+
+def testMoreSegmentDigests():
+    """
+    The content has fewer segments than the expected segment digests, for
+    example because the content was cut short.
+    """
+    content = bytearray(range(256)) * 4
+    producer = SegmentProducer(prefix, content[:600], segmentSize)
+    face = MemoryFace(producer.onInterest, 10.0)
+    namespace = Namespace(prefix)
+    namespace.setFace(face)
+
+    segmentedContent = SegmentedContent(namespace)
+    segmentedContent.setExpectedSegmentDigests(makeSegmentDigests(content))
+    isContentSet, errorMessage = fetch(segmentedContent, face)
+
+    ok = (not isContentSet and errorMessage != None and
+          segmentedContent.getDigestVerified() == False and
+          segmentedContent.getErrorMessage() == errorMessage and
+          namespace.content.isNull())
+    dump("More segment digests than segments", "ok" if ok else "FAILED")
+    dump("  ", errorMessage)
+    return ok
+
+def main():
+    ok = testSinkWriteError()
+    ok = testSegmentDigestMismatch() and ok
+    ok = testDigestsMatch() and ok
+    ok = testMoreSegmentDigests() and ok
+    dump("All tests passed" if ok else "Some tests FAILED")
+
+main()
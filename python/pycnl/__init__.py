@@ -17,15 +17,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # A copy of the GNU Lesser General Public License is in the file COPYING.
 
-from pycnl import nac_consumer_handler, namespace, segment_stream, segmented_content
-__all__ = ['nac_consumer_handler', 'namespace', 'segment_stream', 'segmented_content']
+from pycnl import content_cache, nac_consumer_handler, namespace, rtt_estimator, segment_stream, segment_stream_scheduler, segmented_content
+__all__ = ['content_cache', 'nac_consumer_handler', 'namespace', 'rtt_estimator', 'segment_stream', 'segment_stream_scheduler', 'segmented_content']
 
 import sys as _sys
 
 try:
+    from pycnl.content_cache import *
     from pycnl.nac_consumer_handler import *
     from pycnl.namespace import *
+    from pycnl.rtt_estimator import *
     from pycnl.segment_stream import *
+    from pycnl.segment_stream_scheduler import *
     from pycnl.segmented_content import *
     from pycnl.name_sync_handler import *
 except ImportError:
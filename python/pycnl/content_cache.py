@@ -0,0 +1,306 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This module defines the ContentCache class which attaches to a Namespace node
+to limit the memory used by the content of leaf nodes in its subtree.
+"""
+
+from collections import OrderedDict
+from pycnl.namespace import Namespace
+
+class ContentCache(object):
+    def __init__(self, namespace, maxBytes):
+        """
+        Create a ContentCache object to attach to the given namespace. When the
+        content is set for a leaf node in the subtree and the total size of the
+        content of the leaf nodes is more than maxBytes, this evicts the Data
+        packet and content of the least recently used leaf nodes (except pinned
+        nodes). An evicted node has isNull() content and None data, so that it
+        can be fetched again with expressInterest. Calling getContent() or
+        getData() on a leaf node counts as a use. (The content of a node which
+        has children when the content is set, such as the content assembled by
+        SegmentedContent, is not managed.)
+
+        :param Namespace namespace: The Namespace node at the root of the
+          subtree.
+        :param int maxBytes: The maximum total size in bytes of the content of
+          leaf nodes in the subtree.
+        """
+        self._namespace = namespace
+        self._maxBytes = maxBytes
+        self._pruneEvicted = False
+        # The key is the leaf Namespace and the value is its size in bytes, in
+        # order from least to most recently used. This does not include pinned
+        # nodes.
+        self._sizes = OrderedDict()
+        # The key is the pinned leaf Namespace and the value is the pin count.
+        self._pinCounts = {}
+        # The key is the pinned leaf Namespace with content, and the value is
+        # its size in bytes.
+        self._pinnedSizes = {}
+        # The set of Namespace nodes whose content was evicted.
+        self._evicted = set()
+        self._totalBytes = 0
+        self._hitCount = 0
+        self._missCount = 0
+        self._evictionCount = 0
+
+        namespace._setContentCache(self)
+
+    def getNamespace(self):
+        """
+        Get the Namespace object given to the constructor.
+
+        :return: The Namespace object given to the constructor.
+        :rtype: Namespace
+        """
+        return self._namespace
+
+    def getMaxBytes(self):
+        """
+        Get the maximum total size of the content of leaf nodes in the subtree.
+
+        :return: The maximum size in bytes.
+        :rtype: int
+        """
+        return self._maxBytes
+
+    def setMaxBytes(self, maxBytes):
+        """
+        Set the maximum total size of the content of leaf nodes in the subtree.
+        If the total size is now more than maxBytes, this evicts content.
+
+        :param int maxBytes: The maximum size in bytes.
+        """
+        self._maxBytes = maxBytes
+        self._evict(None)
+
+    def getPruneEvicted(self):
+        """
+        Get the prune evicted flag. See setPruneEvicted().
+
+        :return: True if evicted nodes are removed from the tree.
+        :rtype: bool
+        """
+        return self._pruneEvicted
+
+    def setPruneEvicted(self, pruneEvicted):
+        """
+        Set the prune evicted flag. If True, when the content of a leaf node is
+        evicted, also remove the node from its parent so that the name tree
+        does not keep growing. If False (the default), keep the node in the
+        tree without its content.
+
+        :param bool pruneEvicted: True to remove evicted nodes from the tree.
+        """
+        self._pruneEvicted = pruneEvicted
+
+    def getTotalBytes(self):
+        """
+        Get the total size of the content of leaf nodes held in the subtree,
+        including pinned nodes.
+
+        :return: The total size in bytes.
+        :rtype: int
+        """
+        return self._totalBytes
+
+    def getHitCount(self):
+        """
+        Get the number of times getContent() or getData() was called on a leaf
+        node whose content is held.
+
+        :return: The hit count.
+        :rtype: int
+        """
+        return self._hitCount
+
+    def getMissCount(self):
+        """
+        Get the number of times getContent() or getData() was called on a leaf
+        node whose content was evicted.
+
+        :return: The miss count.
+        :rtype: int
+        """
+        return self._missCount
+
+    def getEvictionCount(self):
+        """
+        Get the number of times the content of a leaf node was evicted.
+
+        :return: The eviction count.
+        :rtype: int
+        """
+        return self._evictionCount
+
+    def pin(self, namespace):
+        """
+        Pin the namespace node so that its content is not evicted until unpin
+        is called the same number of times. A handler such as SegmentStream
+        uses this to keep the content which it has not yet delivered. You can
+        pin a node before its content is set.
+
+        :param Namespace namespace: The leaf Namespace node to pin.
+        """
+        if namespace in self._pinCounts:
+            self._pinCounts[namespace] += 1
+            return
+
+        self._pinCounts[namespace] = 1
+        size = self._sizes.pop(namespace, None)
+        if size != None:
+            self._pinnedSizes[namespace] = size
+
+    def unpin(self, namespace):
+        """
+        Undo one call to pin. When the pin count is zero, the content of the
+        node can be evicted again. If the node is not pinned, do nothing.
+
+        :param Namespace namespace: The leaf Namespace node to unpin.
+        """
+        pinCount = self._pinCounts.get(namespace)
+        if pinCount == None:
+            return
+        if pinCount > 1:
+            self._pinCounts[namespace] = pinCount - 1
+            return
+
+        del self._pinCounts[namespace]
+        size = self._pinnedSizes.pop(namespace, None)
+        if size != None:
+            # Treat it as the most recently used.
+            self._sizes[namespace] = size
+            self._evict(namespace)
+
+    def isPinned(self, namespace):
+        """
+        Check if the namespace node is pinned.
+
+        :param Namespace namespace: The Namespace node to check.
+        :return: True if the node is pinned.
+        :rtype: bool
+        """
+        return namespace in self._pinCounts
+
+    def _onContentSet(self, namespace):
+        """
+        This is called by Namespace when the content of a node in the subtree is
+        set, before calling the onContentSet callbacks. Add the node as the most
+        recently used and evict other nodes as needed.
+
+        :param Namespace namespace: The Namespace node whose content was set.
+        """
+        if namespace._children != None and len(namespace._children) > 0:
+            # Only manage leaf nodes.
+            return
+
+        self._evicted.discard(namespace)
+        # In case the content is replaced, remove the previous size.
+        self._totalBytes -= self._sizes.pop(namespace, 0)
+        self._totalBytes -= self._pinnedSizes.pop(namespace, 0)
+
+        size = ContentCache._getSize(namespace)
+        self._totalBytes += size
+        if namespace in self._pinCounts:
+            self._pinnedSizes[namespace] = size
+        else:
+            self._sizes[namespace] = size
+        self._evict(namespace)
+
+    def _onAccess(self, namespace):
+        """
+        This is called by Namespace getContent() and getData() to update the
+        counters and make the node the most recently used.
+
+        :param Namespace namespace: The Namespace node which was accessed.
+        """
+        size = self._sizes.pop(namespace, None)
+        if size != None:
+            self._hitCount += 1
+            # Move to the end as the most recently used.
+            self._sizes[namespace] = size
+        elif namespace in self._pinnedSizes:
+            self._hitCount += 1
+        elif namespace in self._evicted:
+            self._missCount += 1
+
+    def _forget(self, namespace):
+        """
+        This is called by Namespace when the node is removed from the tree.
+        Stop managing its content.
+
+        :param Namespace namespace: The removed Namespace node.
+        """
+        self._totalBytes -= self._sizes.pop(namespace, 0)
+        self._totalBytes -= self._pinnedSizes.pop(namespace, 0)
+        self._pinCounts.pop(namespace, None)
+        self._evicted.discard(namespace)
+
+    def _evict(self, keepNamespace):
+        """
+        Evict the least recently used nodes until the total size is not more
+        than the maximum, or only keepNamespace and pinned nodes are left.
+
+        :param Namespace keepNamespace: The node not to evict, or None.
+        """
+        while self._totalBytes > self._maxBytes and len(self._sizes) > 0:
+            namespace, size = self._sizes.popitem(False)
+            if namespace is keepNamespace:
+                # Don't evict the content that was just set.
+                self._sizes[namespace] = size
+                break
+
+            namespace._data = None
+            namespace._content = Namespace._nullBlob
+            self._totalBytes -= size
+            self._evictionCount += 1
+
+            parent = namespace._parent
+            if (self._pruneEvicted and parent != None and
+                (namespace._children == None or len(namespace._children) == 0)):
+                parent.removeChild(namespace._component)
+            else:
+                self._evicted.add(namespace)
+
+    @staticmethod
+    def _getSize(namespace):
+        """
+        Get the number of bytes held by the Data packet and content of the
+        namespace node. This counts the Data wire encoding (which usually shares
+        memory with the Data content) and the content if it is not the Data
+        content, e.g. if it is decrypted.
+
+        :param Namespace namespace: The Namespace node.
+        :return: The size in bytes.
+        :rtype: int
+        """
+        size = 0
+        data = namespace._data
+        if data != None:
+            dataContent = data.getContent()
+            size = max(dataContent.size(), data.getDefaultWireEncoding().size())
+            if namespace._content.buf() is dataContent.buf():
+                return size
+
+        return size + namespace._content.size()
+
+    namespace = property(getNamespace)
+    maxBytes = property(getMaxBytes, setMaxBytes)
@@ -49,7 +49,7 @@ class NacConsumerHandler(object):
           face, keyChain, groupName, consumerName, database)
 
         # TODO: Use a way to set the callback which is better than setting the member.
-        namespace._transformContent = self._transformContent
+        namespace._setTransformContent(self._transformContent)
 
     def addDecryptionKey(self, keyName, keyBlob):
         """
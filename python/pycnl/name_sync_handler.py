@@ -179,11 +179,10 @@ class NameSyncHandler(object):
                 try:
                     # Set this False to prevent onNameAdded from re-announcing.
                     self.enableAnnounce_ = False
-                    for item in content['names']:
-                        self._namespace.getChild(Name(item))
+                    self._namespace.addNames(content['names'])
                 finally:
                     self.enableAnnounce_ = True
-            except Exception, e:
+            except Exception as e:
                 print("got exception loading json from data packet: "+data.getContent().toRawStr())
         
 
@@ -27,9 +27,21 @@ import threading
 import logging
 from pyndn import Name, Interest
 from pyndn.util import Blob
-from pyndn.util import ExponentialReExpress
+from pycnl.rtt_estimator import RttEstimator
 
 class Namespace(object):
+    # A name tree can have millions of leaf nodes (e.g. segments), so use slots
+    # and create the containers for children and callbacks only when needed.
+    __slots__ = (
+      '_parent', '_component', '_name', '_depth', '_children',
+      '_sortedChildrenKeys', '_data', '_content', '_face', '_faces',
+      '_onNameAddedCallbacks', '_onNamesAddedCallbacks',
+      '_onContentSetCallbacks', '_transformContent',
+      '_contentCache', '_listenerGeneration', '_listenerNamespace',
+      '_inheritedGeneration', '_inheritedFace', '_inheritedFaces',
+      '_inheritedTransformContent', '_inheritedContentCache',
+      '_pendingInterest')
+
     def __init__(self, name):
         """
         Create a Namespace object with the given name, and with no parent. This
@@ -39,34 +51,103 @@ class Namespace(object):
         :param Name name: The name of this root node in the namespace. This
           makes a copy of the name.
         """
-        self._name = Name(name)
-        self._parent = None
-        # The dictionary key is a Name.Component. The value is the child Namespace.
-        self._children = {}
+        name = Name(name)
+        self._initialize(
+          None, name[-1] if name.size() > 0 else None, name, name.size())
+
+    def _initialize(self, parent, component, name, depth):
+        """
+        Set the members of a new Namespace. This is called by the constructor
+        for a root node and by _createChild for a child node.
+
+        :param Namespace parent: The parent node, or None for the root.
+        :param Name.Component component: The last name component of this node,
+          or None if this is a root with an empty name.
+        :param Name name: The full name of this node, or None to make it from
+          the parent's name when getName() is first called.
+        :param int depth: The number of components in the full name.
+        """
+        self._parent = parent
+        self._component = component
+        # The full name is only created by getName() for a child node.
+        self._name = name
+        self._depth = depth
+        # The dictionary key is a Name.Component. The value is the child
+        # Namespace. This is None until the first child is added.
+        self._children = None
         # The keys of _children in sorted order, kept in sync with _children.
         # (We don't use OrderedDict because it doesn't sort keys on insert.)
-        self._sortedChildrenKeys = []
+        # This is a _SortedComponents, or None until the first child is added.
+        self._sortedChildrenKeys = None
         self._data = None
-        self._content = Blob()
+        self._content = Namespace._nullBlob
         self._face = None
-        # The dictionary key is the callback ID. The value is the onNameAdded function.
-        self._onNameAddedCallbacks = {}
-        # The dictionary key is the callback ID. The value is the onContentSet function.
-        self._onContentSetCallbacks = {}
+        # The list of Faces from setFaces, or None.
+        self._faces = None
+        # The dictionary key is the callback ID. The value is the onNameAdded
+        # function. This is None until a callback is added.
+        self._onNameAddedCallbacks = None
+        # The dictionary key is the callback ID. The value is the onNamesAdded
+        # function. This is None until a callback is added.
+        self._onNamesAddedCallbacks = None
+        # The dictionary key is the callback ID. The value is the onContentSet
+        # function. This is None until a callback is added.
+        self._onContentSetCallbacks = None
         self._transformContent = None
+        # The ContentCache which is attached to this node, or None.
+        self._contentCache = None
+        # _listenerNamespace caches the result of _getListenerNamespace(). It is
+        # valid while _listenerGeneration equals Namespace._lastListenerGeneration.
+        self._listenerGeneration = -1
+        self._listenerNamespace = None
+        # _inheritedFace, _inheritedFaces, _inheritedTransformContent and
+        # _inheritedContentCache cache the results of _getFace(), _getFaces(),
+        # _getTransformContent() and _getContentCache(). They are valid while
+        # _inheritedGeneration equals Namespace._lastInheritedGeneration.
+        self._inheritedGeneration = -1
+        self._inheritedFace = None
+        self._inheritedFaces = None
+        self._inheritedTransformContent = None
+        self._inheritedContentCache = None
+        # The _PendingInterest while an Interest sent by expressInterest is
+        # outstanding, otherwise None.
+        self._pendingInterest = None
 
     def getName(self):
         """
         Get the name of this node in the name tree. This includes the name
         components of parent nodes. To get the name component of just this node,
-        use getName()[-1].
+        use getName()[-1]. A child node only stores its own name component, so
+        the first call makes the full name from the parent's name and keeps it.
 
         :return: The name of this namespace. NOTE: You must not change the
           name - if you need to change it then make a copy.
         :rtype: Name
         """
+        if self._name == None:
+            self._name = Name(self._parent.getName()).append(self._component)
         return self._name
 
+    def _makeName(self):
+        """
+        Make the full name of this node without keeping it in this node or its
+        parents, for example for the name of an Interest. Start from the
+        nearest node which already has its full name.
+
+        :return: A new Name.
+        :rtype: Name
+        """
+        components = []
+        namespace = self
+        while namespace._name is None:
+            components.append(namespace._component)
+            namespace = namespace._parent
+
+        name = Name(namespace._name)
+        for component in reversed(components):
+            name.append(component)
+        return name
+
     def getParent(self):
         """
         Get the parent namespace.
@@ -100,7 +181,7 @@ class Namespace(object):
         if not isinstance(component, Name.Component):
             component = Name.Component(component)
 
-        return component in self._children
+        return self._children != None and component in self._children
 
     def getChild(self, nameOrComponent):
         """
@@ -122,7 +203,7 @@ class Namespace(object):
         """
         if isinstance(nameOrComponent, Name):
             descendantName = nameOrComponent
-            if not self._name.isPrefixOf(descendantName):
+            if not self._isPrefixOf(descendantName):
                 raise RuntimeError(
                   "The name of this node is not a prefix of the descendant name")
 
@@ -130,14 +211,15 @@ class Namespace(object):
             # We know descendantNamespace is a prefix, so we can just go by
             # component count instead of a full compare.
             descendantNamespace = self
-            while descendantNamespace._name.size() < descendantName.size():
-                nextComponent = descendantName[descendantNamespace._name.size()]
-                if nextComponent in descendantNamespace._children:
-                    descendantNamespace = descendantNamespace._children[nextComponent]
+            nComponents = descendantName.size()
+            while descendantNamespace._depth < nComponents:
+                nextComponent = descendantName[descendantNamespace._depth]
+                children = descendantNamespace._children
+                if children != None and nextComponent in children:
+                    descendantNamespace = children[nextComponent]
                 else:
                     # Only fire the callbacks for the leaf node.
-                    isLeaf = (
-                      descendantNamespace._name.size() == descendantName.size() - 1)
+                    isLeaf = (descendantNamespace._depth == nComponents - 1)
                     descendantNamespace = descendantNamespace._createChild(
                       nextComponent, isLeaf)
 
@@ -147,11 +229,215 @@ class Namespace(object):
             if not isinstance(component, Name.Component):
                 component = Name.Component(component)
 
-            if component in self._children:
+            if self._children != None and component in self._children:
                 return self._children[component]
             else:
                 return self._createChild(component, True)
 
+    def findChild(self, nameOrComponent):
+        """
+        Find a child (or descendant) without creating it. Unlike getChild, this
+        does not add nodes to the tree and does not call callbacks.
+
+        :param nameOrComponent: If this is a Name, find the descendant node
+          with the name. Otherwise, this is the name component of the immediate
+          child.
+        :type nameOrComponent: Name or Name.Component or value for the
+          Name.Component constructor
+        :return: The child Namespace object, or None if it is not in the tree
+          or if the name of this Namespace node is not a prefix of the given
+          Name. If nameOrComponent is a Name which equals the name of this
+          Namespace, then just return this Namespace.
+        :rtype: Namespace
+        """
+        if isinstance(nameOrComponent, Name):
+            descendantName = nameOrComponent
+            if not self._isPrefixOf(descendantName):
+                return None
+
+            descendantNamespace = self
+            nComponents = descendantName.size()
+            while descendantNamespace._depth < nComponents:
+                children = descendantNamespace._children
+                if children == None:
+                    return None
+                descendantNamespace = children.get(
+                  descendantName[descendantNamespace._depth])
+                if descendantNamespace == None:
+                    return None
+
+            return descendantNamespace
+        else:
+            component = nameOrComponent
+            if not isinstance(component, Name.Component):
+                component = Name.Component(component)
+
+            if self._children == None:
+                return None
+            return self._children.get(component)
+
+    def longestPrefixMatch(self, name):
+        """
+        Find the deepest node in the tree at or below this node whose name is a
+        prefix of the given name, without creating nodes. For example, a
+        producer can use this to find the node which should answer an incoming
+        Interest.
+
+        :param Name name: The name to match.
+        :return: The Namespace node with the longest matching name, or None if
+          the name of this Namespace node is not a prefix of the given name.
+        :rtype: Namespace
+        """
+        if not self._isPrefixOf(name):
+            return None
+
+        namespace = self
+        nComponents = name.size()
+        while namespace._depth < nComponents:
+            children = namespace._children
+            if children == None:
+                break
+            child = children.get(name[namespace._depth])
+            if child == None:
+                break
+            namespace = child
+
+        return namespace
+
+    def addNames(self, names):
+        """
+        Add many descendant names at once. This has the same result as calling
+        getChild(name) for each name, but first it adds all the nodes, then it
+        merges the new name components of each parent node into its sorted
+        child components in one pass, then it calls the callbacks. As with
+        getChild, callbacks are only called for the node of each given name
+        (not for intermediate nodes) and only if the node is new. Each
+        onNameAdded callback is called once per added name, and each
+        onNamesAdded callback is called once for the whole batch.
+
+        :param names: The descendant names, each of which must have the name of
+          this node as a prefix.
+        :type names: iterable of Name or URI str
+        :return: A list of the new Namespace nodes for the given names, in the
+          order of names. This does not include intermediate nodes.
+        :rtype: list of Namespace
+        :raises RuntimeError: If the name of this Namespace node is not a prefix
+          of one of the names. In this case, no names are added.
+        """
+        # Parse and check all the names before changing the tree. The
+        # dictionary key is the URI text between slashes and the value is its
+        # parsed Name, so that common prefixes are only parsed once.
+        parsedSegments = {}
+        descendantNames = []
+        for name in names:
+            if not isinstance(name, Name):
+                name = Namespace._parseUri(name, parsedSegments)
+            if not self._isPrefixOf(name):
+                raise RuntimeError(
+                  "The name of this node is not a prefix of the descendant name")
+            descendantNames.append(name)
+
+        # Add the nodes, but only add to the parent's _children for now. The
+        # dictionary key is the parent Namespace and the value is the list of
+        # new name components to add to its _sortedChildrenKeys.
+        newComponents = {}
+        addedNamespaces = []
+        for descendantName in descendantNames:
+            descendantNamespace = self
+            nComponents = descendantName.size()
+            isNew = False
+            while descendantNamespace._depth < nComponents:
+                nextComponent = descendantName[descendantNamespace._depth]
+                children = descendantNamespace._children
+                if children != None and nextComponent in children:
+                    descendantNamespace = children[nextComponent]
+                    isNew = False
+                else:
+                    if descendantNamespace in newComponents:
+                        newComponents[descendantNamespace].append(nextComponent)
+                    else:
+                        newComponents[descendantNamespace] = [nextComponent]
+                    descendantNamespace = descendantNamespace._addChildNode(
+                      nextComponent)
+                    isNew = True
+
+            if isNew:
+                addedNamespaces.append(descendantNamespace)
+
+        for parent, components in newComponents.items():
+            components.sort()
+            parent._sortedChildrenKeys.update(components)
+
+        # Group the added nodes by the node with the callbacks, keeping the
+        # order in which we first visit each node with callbacks.
+        listenerNamespaces = []
+        # The dictionary key is the Namespace with callbacks. The value is the
+        # list of added Namespace nodes to pass to the callbacks.
+        addedByListener = {}
+        for addedNamespace in addedNamespaces:
+            namespace = addedNamespace._getParentListenerNamespace()
+            while namespace != None:
+                if namespace in addedByListener:
+                    addedByListener[namespace].append(addedNamespace)
+                else:
+                    listenerNamespaces.append(namespace)
+                    addedByListener[namespace] = [addedNamespace]
+                namespace = namespace._getParentListenerNamespace()
+
+        for namespace in listenerNamespaces:
+            namespace._fireOnNameAdded(addedByListener[namespace])
+
+        return addedNamespaces
+
+    def removeChild(self, component):
+        """
+        Remove the child with the given name component, and its subtree, from
+        this node. The removed child keeps its own children, content and name,
+        and becomes the root of a separate tree. Any content of the removed
+        nodes is no longer managed by a ContentCache of this tree. This does
+        not call callbacks.
+
+        :param component: The name component of the child.
+        :type component: Name.Component or value for the Name.Component constructor
+        :return: The removed child, or None if there is no such child.
+        :rtype: Namespace
+        """
+        if not isinstance(component, Name.Component):
+            component = Name.Component(component)
+
+        if self._children == None:
+            return None
+        child = self._children.pop(component, None)
+        if child == None:
+            return None
+        self._sortedChildrenKeys.remove(component)
+
+        if self._detachChild(child):
+            Namespace._invalidateListenerNamespaces()
+            Namespace._invalidateInherited()
+
+        return child
+
+    def pruneSubtree(self):
+        """
+        Remove all the children of this node, as with removeChild, so that the
+        subtree can be freed. This node keeps its content and callbacks.
+        """
+        if self._children == None:
+            return
+
+        children = self._children
+        self._children = None
+        self._sortedChildrenKeys = None
+        hasGrandchildren = False
+        for child in children.values():
+            if self._detachChild(child):
+                hasGrandchildren = True
+
+        if hasGrandchildren:
+            Namespace._invalidateListenerNamespaces()
+            Namespace._invalidateInherited()
+
     def getChildComponents(self):
         """
         Get a list of the name component of all child nodes.
@@ -160,7 +446,71 @@ class Namespace(object):
           This remains the same if child nodes are added or deleted.
         :rtype: list of Name.Component
         """
-        return self._sortedChildrenKeys[:]
+        if self._sortedChildrenKeys == None:
+            return []
+        return self._sortedChildrenKeys.toList()
+
+    def iterChildComponents(self, fromComponent = None, toComponent = None):
+        """
+        Iterate over the name component of the child nodes in sorted order,
+        without copying the list of components. You must not add or remove
+        child nodes while iterating. If you need to do that, use
+        getChildComponents() which returns a fresh list.
+
+        :param fromComponent: (optional) The first name component to include.
+          If omitted or None, start with the first child.
+        :type fromComponent: Name.Component or value for the Name.Component
+          constructor
+        :param toComponent: (optional) Stop before this name component. If
+          omitted or None, continue through the last child.
+        :type toComponent: Name.Component or value for the Name.Component
+          constructor
+        :return: An iterator over the sorted name components of the children
+          in the range.
+        :rtype: iterator of Name.Component
+        """
+        if self._sortedChildrenKeys == None:
+            return iter(())
+
+        if (fromComponent != None and
+            not isinstance(fromComponent, Name.Component)):
+            fromComponent = Name.Component(fromComponent)
+        if toComponent != None and not isinstance(toComponent, Name.Component):
+            toComponent = Name.Component(toComponent)
+        return self._sortedChildrenKeys.iterRange(fromComponent, toComponent)
+
+    def getChildCount(self):
+        """
+        Get the number of child nodes.
+
+        :return: The number of child nodes.
+        :rtype: int
+        """
+        if self._sortedChildrenKeys == None:
+            return 0
+        return len(self._sortedChildrenKeys)
+
+    def getFirstChildComponent(self):
+        """
+        Get the name component of the first child in sorted order.
+
+        :return: The first name component, or None if there are no children.
+        :rtype: Name.Component
+        """
+        if self._sortedChildrenKeys == None:
+            return None
+        return self._sortedChildrenKeys.first()
+
+    def getLastChildComponent(self):
+        """
+        Get the name component of the last child in sorted order.
+
+        :return: The last name component, or None if there are no children.
+        :rtype: Name.Component
+        """
+        if self._sortedChildrenKeys == None:
+            return None
+        return self._sortedChildrenKeys.last()
 
     def setData(self, data):
         """
@@ -179,7 +529,7 @@ class Namespace(object):
         if self._data != None:
             # We already have an attached object.
             return
-        if not data.name.equals(self._name):
+        if not self._nameEquals(data.name):
             raise RuntimeError(
               "The Data packet name does not equal the name of this Namespace node.")
 
@@ -204,6 +554,9 @@ class Namespace(object):
         :return: The Data packet object, or None if not set.
         :rtype: Data
         """
+        contentCache = self._getContentCache()
+        if contentCache != None:
+            contentCache._onAccess(self)
         return self._data
 
     def getContent(self):
@@ -215,6 +568,9 @@ class Namespace(object):
         :return: The content Blob, or an isNull Blob if not set.
         :rtype: Blob
         """
+        contentCache = self._getContentCache()
+        if contentCache != None:
+            contentCache._onAccess(self)
         return self._content
 
     def addOnNameAdded(self, onNameAdded):
@@ -235,9 +591,40 @@ class Namespace(object):
         :rtype: int
         """
         callbackId = Namespace.getNextCallbackId()
+        if self._onNameAddedCallbacks == None:
+            self._onNameAddedCallbacks = {}
+        if not self._hasCallbacks():
+            Namespace._invalidateListenerNamespaces()
         self._onNameAddedCallbacks[callbackId] = onNameAdded
         return callbackId
 
+    def addOnNamesAdded(self, onNamesAdded):
+        """
+        Add an onNamesAdded callback. This is like addOnNameAdded, except that
+        when addNames adds a batch of names at this node or any children, this
+        calls onNamesAdded once with all of them. When a single name is added,
+        for example by getChild, this calls onNamesAdded with a list of one.
+
+        :param onNamesAdded: This calls
+          onNamesAdded(namespace, addedNamespaces, callbackId)
+          where namespace is this Namespace, addedNamespaces is the list of the
+          Namespace of each added name, and callbackId is the callback ID
+          returned by this method.
+          NOTE: The library will log any exceptions raised by this callback, but
+          for better error handling the callback should catch and properly
+          handle any exceptions.
+        :type onNamesAdded: function object
+        :return: The callback ID which you can use in removeCallback().
+        :rtype: int
+        """
+        callbackId = Namespace.getNextCallbackId()
+        if self._onNamesAddedCallbacks == None:
+            self._onNamesAddedCallbacks = {}
+        if not self._hasCallbacks():
+            Namespace._invalidateListenerNamespaces()
+        self._onNamesAddedCallbacks[callbackId] = onNamesAdded
+        return callbackId
+
     def addOnContentSet(self, onContentSet):
         """
         Add an onContentSet callback. When the content has been set for this
@@ -260,6 +647,10 @@ class Namespace(object):
         :rtype: int
         """
         callbackId = Namespace.getNextCallbackId()
+        if self._onContentSetCallbacks == None:
+            self._onContentSetCallbacks = {}
+        if not self._hasCallbacks():
+            Namespace._invalidateListenerNamespaces()
         self._onContentSetCallbacks[callbackId] = onContentSet
         return callbackId
 
@@ -274,36 +665,252 @@ class Namespace(object):
         a Face object, it is replaced.
         """
         self._face = face
+        self._faces = None
+        Namespace._invalidateInherited()
+
+    def setFaces(self, faces):
+        """
+        Set multiple Faces, for example to different forwarders, for this and
+        child nodes (unless a child node has a different Face). expressInterest
+        uses the first Face unless it is given another one. A handler such as
+        SegmentStream can spread its Interests over all the Faces.
+
+        :param faces: The Face objects. If this Namespace object already has
+          one or more Face objects, they are replaced.
+        :type faces: list of Face
+        :raises RuntimeError: If faces is empty.
+        """
+        faces = list(faces)
+        if len(faces) == 0:
+            raise RuntimeError("Namespace.setFaces: The list of faces is empty")
+
+        self._face = faces[0]
+        self._faces = faces
+        Namespace._invalidateInherited()
 
-    def expressInterest(self, interestTemplate = None):
+    def expressInterest(
+          self, interestTemplate = None, onTimeout = None, onRetransmit = None,
+          face = None, onData = None):
         """
-        Call expressInterest on this (or a parent's) Face where the interest
-        name is the name of this Namespace node. When the Data packet is
-        received this calls setData, so you should use a callback with
-        addOnContentSet. This uses ExponentialReExpress to re-express a timed-out
-        interest with longer lifetimes.
-        TODO: How to alert the application on a final interest timeout?
+        Call expressInterest on this (or a parent's) Face, or the given face,
+        where the interest name is the name of this Namespace node. When the
+        Data packet is received this calls setData, so you should use a
+        callback with addOnContentSet. The Interest lifetime is the
+        retransmission timeout of the RttEstimator for the Face (see
+        RttEstimator.getFaceRttEstimator) which is updated with the round-trip
+        time of each Data packet. On a timeout or network Nack, this backs off
+        the retransmission timeout and sends the Interest again, up to the
+        estimator's maxRetries, then calls onTimeout. If an Interest sent by a
+        previous call is still pending (see isPending), then this does not send
+        another Interest (even to a different face) but also calls the given
+        onTimeout, onRetransmit and onData.
         TODO: Replace this by a mechanism for requesting a Data object which is
         more general than a Face network operation.
         :raises RuntimeError: If a Face object has not been set for this or a
           parent Namespace node.
 
         :param Interest interestTemplate: (optional) The interest template for
-          expressInterest. If omitted, just use a default interest lifetime.
+          expressInterest. If it has an interest lifetime, use it for each
+          transmission instead of the retransmission timeout. If omitted, use
+          a default Interest.
+        :param onTimeout: (optional) On the final timeout, this calls
+          onTimeout(namespace) where namespace is this Namespace node. If
+          omitted, don't call it.
+          NOTE: The library will log any exceptions raised by this callback, but
+          for better error handling the callback should catch and properly
+          handle any exceptions.
+        :type onTimeout: function object
+        :param onRetransmit: (optional) Before retransmitting after a timeout
+          or network Nack, this calls onRetransmit(namespace) where namespace
+          is this Namespace node. A handler can use this as a loss signal for
+          congestion control. If omitted, don't call it.
+          NOTE: The library will log any exceptions raised by this callback, but
+          for better error handling the callback should catch and properly
+          handle any exceptions.
+        :type onRetransmit: function object
+        :param Face face: (optional) The Face to use for the Interest and its
+          retransmissions, for example one of the Faces from setFaces. If
+          omitted or None, use the Face of this or a parent node.
+        :param onData: (optional) After the Data packet is received and set
+          with setData, this calls onData(namespace, data) where namespace is
+          this Namespace node and data is the Data packet. This is called even
+          if setData does nothing because the node for the Data name already
+          has a Data packet, for example when an Interest with a ChildSelector
+          gets the Data of a child which was already fetched. If omitted, don't
+          call it.
+          NOTE: The library will log any exceptions raised by this callback, but
+          for better error handling the callback should catch and properly
+          handle any exceptions.
+        :type onData: function object
         """
-        face = self._getFace()
+        if face == None:
+            face = self._getFace()
         if face == None:
             raise ValueError("A Face object has not been set for this or a parent.")
 
+        pendingInterest = self._pendingInterest
+        if pendingInterest == None:
+            if interestTemplate == None:
+                interestTemplate = Interest()
+            pendingInterest = Namespace._PendingInterest(
+              face, RttEstimator.getFaceRttEstimator(face), interestTemplate)
+            self._pendingInterest = pendingInterest
+            pendingInterest.addRequest(onTimeout, onRetransmit, onData)
+            self._transmitInterest(pendingInterest)
+        else:
+            # Aggregate with the outstanding Interest.
+            pendingInterest.addRequest(onTimeout, onRetransmit, onData)
+
+    def isPending(self):
+        """
+        Check if an Interest sent by expressInterest for this node is
+        outstanding, i.e. neither the Data packet nor the final timeout has
+        been received.
+
+        :return: True if an Interest is pending.
+        :rtype: bool
+        """
+        return self._pendingInterest != None
+
+    def _transmitInterest(self, pendingInterest):
+        """
+        Send the Interest for pendingInterest, which must be
+        self._pendingInterest, and increment its transmit count.
+
+        :param Namespace._PendingInterest pendingInterest: The pending Interest.
+        """
+        interest = Interest(pendingInterest.interestTemplate)
+        if interest.getInterestLifetimeMilliseconds() == None:
+            interest.setInterestLifetimeMilliseconds(
+              pendingInterest.rttEstimator.getRto())
+        pendingInterest.transmitCount += 1
+        transmitCount = pendingInterest.transmitCount
+
+        def isCurrent():
+            return (self._pendingInterest is pendingInterest and
+                    pendingInterest.transmitCount == transmitCount)
+
         def onData(interest, data):
-            self[data.name].setData(data)
+            if not isCurrent():
+                return
+            if transmitCount == 1:
+                # Karn's rule: Only measure if there was no retransmission.
+                pendingInterest.rttEstimator.addMeasurement(
+                  pendingInterest.rttEstimator.getNowMilliseconds() -
+                  pendingInterest.sendTime)
+            # Clear the pending state first so that an onContentSet callback
+            # can express the Interest again.
+            self._pendingInterest = None
+            if data.name.size() == self._depth:
+                # setData checks that the name is equal.
+                self.setData(data)
+            else:
+                self[data.name].setData(data)
+
+            for onDataCallback in pendingInterest.onDataCallbacks:
+                try:
+                    onDataCallback(self, data)
+                except:
+                    logging.exception("Error in onData")
+
+        def onLoss():
+            if isCurrent():
+                self._onInterestLoss(pendingInterest)
+
+        def onTimeout(interest):
+            onLoss()
 
-        if interestTemplate == None:
-            interestTemplate = Interest()
-            interestTemplate.setInterestLifetimeMilliseconds(4000)
-        face.expressInterest(
-          self._name, interestTemplate, onData,
-          ExponentialReExpress.makeOnTimeout(face, onData, None))
+        def onNetworkNack(interest, networkNack):
+            if isCurrent():
+                # Wait for the Interest lifetime so that retransmitting after a
+                # Nack doesn't flood the network.
+                pendingInterest.pendingInterestId = None
+                pendingInterest.face.callLater(
+                  interest.getInterestLifetimeMilliseconds(), onLoss)
+
+        pendingInterest.sendTime = (
+          pendingInterest.rttEstimator.getNowMilliseconds())
+        pendingInterest.pendingInterestId = pendingInterest.face.expressInterest(
+          self._makeName(), interest, onData, onTimeout, onNetworkNack)
+
+    def _cancelInterest(self, onTimeout = None, onRetransmit = None,
+                        onData = None):
+        """
+        Undo one call to expressInterest, for example when a handler no longer
+        needs the Data. When all the calls aggregated into the pending
+        Interest are undone, remove it from the Face so that isPending()
+        returns False. This does not call the onTimeout callbacks.
+
+        :param onTimeout: (optional) The onTimeout given to expressInterest, to
+          remove it from the callbacks.
+        :type onTimeout: function object
+        :param onRetransmit: (optional) The onRetransmit given to
+          expressInterest, to remove it from the callbacks.
+        :type onRetransmit: function object
+        :param onData: (optional) The onData given to expressInterest, to
+          remove it from the callbacks.
+        :type onData: function object
+        """
+        pendingInterest = self._pendingInterest
+        if pendingInterest == None:
+            return
+
+        pendingInterest.removeRequest(onTimeout, onRetransmit, onData)
+        if pendingInterest.requestCount > 0:
+            return
+
+        if pendingInterest.pendingInterestId != None:
+            pendingInterest.face.removePendingInterest(
+              pendingInterest.pendingInterestId)
+        self._pendingInterest = None
+
+    def _retransmitInterest(self):
+        """
+        If an Interest sent by expressInterest is pending, retransmit it now
+        without waiting for the timeout, for example when a handler detects
+        that it was lost because later Interests were answered. This does not
+        back off the retransmission timeout, but counts toward maxRetries.
+
+        :return: True if the Interest was retransmitted, False if it is not
+          pending.
+        :rtype: bool
+        """
+        pendingInterest = self._pendingInterest
+        if pendingInterest == None:
+            return False
+
+        if pendingInterest.pendingInterestId != None:
+            pendingInterest.face.removePendingInterest(
+              pendingInterest.pendingInterestId)
+        self._transmitInterest(pendingInterest)
+        return True
+
+    def _onInterestLoss(self, pendingInterest):
+        """
+        This is called on the timeout or network Nack of the Interest for
+        pendingInterest, which must be self._pendingInterest. Call the
+        onRetransmit callbacks and retransmit or, if there are no retries left,
+        clear the pending state and call the onTimeout callbacks.
+
+        :param Namespace._PendingInterest pendingInterest: The pending Interest.
+        """
+        rttEstimator = pendingInterest.rttEstimator
+        rttEstimator.backoffRto()
+        if pendingInterest.transmitCount <= rttEstimator.getMaxRetries():
+            for onRetransmit in pendingInterest.onRetransmitCallbacks:
+                try:
+                    onRetransmit(self)
+                except:
+                    logging.exception("Error in onRetransmit")
+            self._transmitInterest(pendingInterest)
+            return
+
+        self._pendingInterest = None
+        for onTimeout in pendingInterest.onTimeoutCallbacks:
+            try:
+                onTimeout(self)
+            except:
+                logging.exception("Error in onTimeout")
 
     def _getFace(self):
         """
@@ -312,13 +919,22 @@ class Namespace(object):
         :return: The Face, or None if not set on this or any parent.
         :rtype: Face
         """
-        namespace = self
-        while namespace != None:
-            if namespace._face != None:
-                return namespace._face
-            namespace = namespace._parent
+        if self._inheritedGeneration != Namespace._lastInheritedGeneration:
+            self._updateInherited()
+        return self._inheritedFace
+
+    def _getFaces(self):
+        """
+        Get the Faces set by setFaces, or the Face set by setFace, on this or
+        the nearest parent Namespace node with a Face.
 
-        return None
+        :return: The list of Faces, or an empty list if not set on this or any
+          parent.
+        :rtype: list of Face
+        """
+        if self._inheritedGeneration != Namespace._lastInheritedGeneration:
+            self._updateInherited()
+        return self._inheritedFaces
 
     def _getTransformContent(self):
         """
@@ -328,13 +944,95 @@ class Namespace(object):
           any parent.
         :rtype: function object
         """
+        if self._inheritedGeneration != Namespace._lastInheritedGeneration:
+            self._updateInherited()
+        return self._inheritedTransformContent
+
+    def _setTransformContent(self, transformContent):
+        """
+        Set the TransformContent callback which setData uses for this and child
+        nodes (unless a child node has a different TransformContent).
+
+        :param transformContent: The TransformContent callback, or None to use
+          the one from a parent.
+        :type transformContent: function object
+        """
+        self._transformContent = transformContent
+        Namespace._invalidateInherited()
+
+    def _getContentCache(self):
+        """
+        Get the ContentCache attached to this or a parent Namespace node.
+
+        :return: The ContentCache, or None if not attached to this or any
+          parent.
+        :rtype: ContentCache
+        """
+        if self._inheritedGeneration != Namespace._lastInheritedGeneration:
+            self._updateInherited()
+        return self._inheritedContentCache
+
+    def _setContentCache(self, contentCache):
+        """
+        Attach the ContentCache to this node so that it manages the content of
+        this and child nodes (unless a child node has a different ContentCache).
+        This is called by the ContentCache constructor.
+
+        :param ContentCache contentCache: The ContentCache.
+        """
+        self._contentCache = contentCache
+        Namespace._invalidateInherited()
+
+    def _updateInherited(self):
+        """
+        Update _inheritedFace, _inheritedFaces, _inheritedTransformContent and
+        _inheritedContentCache of this node and of each ancestor whose cached
+        values are not valid, starting from the nearest ancestor whose cached
+        values are valid.
+        """
+        generation = Namespace._lastInheritedGeneration
+        namespaces = []
         namespace = self
-        while namespace != None:
-            if namespace._transformContent != None:
-                return namespace._transformContent
+        while namespace != None and namespace._inheritedGeneration != generation:
+            namespaces.append(namespace)
             namespace = namespace._parent
 
-        return None
+        if namespace != None:
+            face = namespace._inheritedFace
+            faces = namespace._inheritedFaces
+            transformContent = namespace._inheritedTransformContent
+            contentCache = namespace._inheritedContentCache
+        else:
+            face = None
+            faces = []
+            transformContent = None
+            contentCache = None
+
+        for namespace in reversed(namespaces):
+            if namespace._face != None:
+                face = namespace._face
+                # All nodes which inherit this Face share the same list.
+                faces = (namespace._faces if namespace._faces != None
+                         else [face])
+            if namespace._transformContent != None:
+                transformContent = namespace._transformContent
+            if namespace._contentCache != None:
+                contentCache = namespace._contentCache
+            namespace._inheritedFace = face
+            namespace._inheritedFaces = faces
+            namespace._inheritedTransformContent = transformContent
+            namespace._inheritedContentCache = contentCache
+            namespace._inheritedGeneration = generation
+
+    @staticmethod
+    def _invalidateInherited():
+        """
+        Invalidate the cached result of _getFace(), _getFaces(),
+        _getTransformContent() and _getContentCache() in all nodes. Call this
+        after setting the Face, TransformContent or ContentCache of a node, or
+        after detaching a node from its parent.
+        """
+        Namespace._lastInheritedGeneration += 1
 
     def removeCallback(self, callbackId):
         """
@@ -344,8 +1042,18 @@ class Namespace(object):
         :param int callbackId: The callback ID returned, for example, from
           addOnNameAdded.
         """
-        self._onNameAddedCallbacks.pop(callbackId, None)
-        self._onContentSetCallbacks.pop(callbackId, None)
+        if not self._hasCallbacks():
+            return
+
+        if self._onNameAddedCallbacks != None:
+            self._onNameAddedCallbacks.pop(callbackId, None)
+        if self._onNamesAddedCallbacks != None:
+            self._onNamesAddedCallbacks.pop(callbackId, None)
+        if self._onContentSetCallbacks != None:
+            self._onContentSetCallbacks.pop(callbackId, None)
+
+        if not self._hasCallbacks():
+            Namespace._invalidateListenerNamespaces()
 
     def __getitem__(self, key):
         """
@@ -369,30 +1077,231 @@ class Namespace(object):
         :return: The child Namespace object.
         :rtype: Namespace
         """
-        child = Namespace(Name(self._name).append(component))
-        child._parent = self
-        self._children[component] = child
+        child = self._addChildNode(component)
 
         # Keep _sortedChildrenKeys synced with _children.
-        bisect.insort(self._sortedChildrenKeys, component)
+        self._sortedChildrenKeys.add(component)
 
         if fireCallbacks:
-            namespace = self
-            while namespace:
-                namespace._fireOnNameAdded(child)
-                namespace = namespace._parent
+            # Only visit the nodes which have callbacks.
+            addedNamespaces = [child]
+            namespace = self._getListenerNamespace()
+            while namespace != None:
+                namespace._fireOnNameAdded(addedNamespaces)
+                namespace = namespace._getParentListenerNamespace()
 
         return child
 
-    def _fireOnNameAdded(self, addedNamespace):
-        # Copy the keys before iterating since callbacks can change the list.
-        for id in list(self._onNameAddedCallbacks.keys()):
-            # A callback on a previous pass may have removed this callback, so check.
-            if id in self._onNameAddedCallbacks:
-                try:
-                    self._onNameAddedCallbacks[id](self, addedNamespace, id)
-                except:
-                    logging.exception("Error in onNameAdded")
+    def _addChildNode(self, component):
+        """
+        Create the child with the given name component and add it to
+        _children, but not to _sortedChildrenKeys. The caller must add the
+        component to _sortedChildrenKeys.
+
+        :param Name.Component component: The name component of the child.
+        :return: The child Namespace object.
+        :rtype: Namespace
+        """
+        child = Namespace.__new__(Namespace)
+        child._initialize(self, component, None, self._depth + 1)
+        if self._children == None:
+            self._children = {}
+            self._sortedChildrenKeys = Namespace._SortedComponents()
+        self._children[component] = child
+
+        return child
+
+    @staticmethod
+    def _parseUri(uri, parsedSegments):
+        """
+        Parse the URI into a Name, the same as Name(uri), but reuse the
+        components parsed from the same text between slashes in other URIs.
+
+        :param str uri: The URI to parse.
+        :param dict parsedSegments: The dictionary key is the URI text between
+          slashes and the value is the Name with its parsed components. This
+          adds new entries.
+        :return: The new Name.
+        :rtype: Name
+        """
+        uri = uri.strip()
+        if not uri.startswith('/') or uri.startswith('//'):
+            # Let the Name constructor handle a scheme or authority.
+            return Name(uri)
+
+        name = Name()
+        for segment in uri[1:].split('/'):
+            components = parsedSegments.get(segment)
+            if components == None:
+                components = Name('/' + segment)
+                parsedSegments[segment] = components
+            name.append(components)
+
+        return name
+
+    def _detachChild(self, child):
+        """
+        Make the child the root of a separate tree, after it has been removed
+        from _children and _sortedChildrenKeys. If the child has children, the
+        caller must invalidate the cached listener and inherited values of all
+        nodes.
+
+        :param Namespace child: The removed child.
+        :return: True if the child has children.
+        :rtype: bool
+        """
+        # Tell the ContentCache of each node to forget it while the node still
+        # has its ancestors.
+        namespaces = [child]
+        while len(namespaces) > 0:
+            namespace = namespaces.pop()
+            contentCache = namespace._getContentCache()
+            if contentCache != None:
+                contentCache._forget(namespace)
+            if namespace._children != None:
+                namespaces.extend(namespace._children.values())
+
+        # Make the full name while the child still has its parent.
+        child.getName()
+        child._parent = None
+        if child._children == None:
+            # Only the child has cached values from its old ancestors.
+            child._listenerGeneration = -1
+            child._inheritedGeneration = -1
+            return False
+        else:
+            return True
+
+    def _isPrefixOf(self, name):
+        """
+        Check if the name of this node is a prefix of the given name. This
+        compares the name component of each node up to the nearest node which
+        already has its full name, so that it doesn't need to make the name.
+
+        :param Name name: The name to check.
+        :return: True if the name of this node is a prefix of name.
+        :rtype: bool
+        """
+        if name.size() < self._depth:
+            return False
+
+        namespace = self
+        while namespace._name is None:
+            if not namespace._component.equals(name[namespace._depth - 1]):
+                return False
+            namespace = namespace._parent
+
+        return namespace._name.isPrefixOf(name)
+
+    def _nameEquals(self, name):
+        """
+        Check if the name of this node equals the given name, without making
+        the full name of this node.
+
+        :param Name name: The name to check.
+        :return: True if the name of this node equals name.
+        :rtype: bool
+        """
+        return name.size() == self._depth and self._isPrefixOf(name)
+
+    def _hasCallbacks(self):
+        """
+        Check if this node has any onNameAdded, onNamesAdded or onContentSet
+        callbacks.
+
+        :return: True if this node has callbacks.
+        :rtype: bool
+        """
+        return (bool(self._onNameAddedCallbacks) or
+                bool(self._onNamesAddedCallbacks) or
+                bool(self._onContentSetCallbacks))
+
+    def _getListenerNamespace(self):
+        """
+        Get the nearest node which has callbacks, starting from this node and
+        going up to the root. The result is cached in this node and the nodes
+        up to the result until a node gains its first callback or loses its
+        last one, so that firing events doesn't need to visit every ancestor.
+
+        :return: This node or the nearest ancestor with callbacks, or None if
+          there is none.
+        :rtype: Namespace
+        """
+        generation = Namespace._lastListenerGeneration
+        if self._listenerGeneration == generation:
+            return self._listenerNamespace
+
+        # Go up to a node with callbacks or with a valid cached result.
+        result = None
+        namespace = self
+        while namespace != None:
+            if namespace._listenerGeneration == generation:
+                result = namespace._listenerNamespace
+                break
+            if namespace._hasCallbacks():
+                result = namespace
+                break
+            namespace = namespace._parent
+
+        # Cache the result in the nodes that we visited.
+        node = self
+        while node is not namespace:
+            node._listenerGeneration = generation
+            node._listenerNamespace = result
+            node = node._parent
+        if namespace != None:
+            namespace._listenerGeneration = generation
+            namespace._listenerNamespace = result
+
+        return result
+
+    def _getParentListenerNamespace(self):
+        """
+        Get the nearest node with callbacks above this node.
+
+        :return: The nearest ancestor with callbacks, or None if there is none.
+        :rtype: Namespace
+        """
+        if self._parent == None:
+            return None
+        return self._parent._getListenerNamespace()
+
+    @staticmethod
+    def _invalidateListenerNamespaces():
+        """
+        Invalidate the cached result of _getListenerNamespace() in all nodes.
+        Call this before a node gains its first callback or after it loses its
+        last one.
+        """
+        Namespace._lastListenerGeneration += 1
+
+    def _fireOnNameAdded(self, addedNamespaces):
+        """
+        Call each onNameAdded callback for each of the addedNamespaces, then
+        call each onNamesAdded callback once with the list.
+
+        :param list of Namespace addedNamespaces: The added Namespace nodes.
+        """
+        if self._onNameAddedCallbacks:
+            for addedNamespace in addedNamespaces:
+                # Copy the keys before iterating since callbacks can change the list.
+                for id in list(self._onNameAddedCallbacks.keys()):
+                    # A callback on a previous pass may have removed this callback, so check.
+                    if id in self._onNameAddedCallbacks:
+                        try:
+                            self._onNameAddedCallbacks[id](self, addedNamespace, id)
+                        except:
+                            logging.exception("Error in onNameAdded")
+
+        if self._onNamesAddedCallbacks:
+            # Copy the keys before iterating since callbacks can change the list.
+            for id in list(self._onNamesAddedCallbacks.keys()):
+                # A callback on a previous pass may have removed this callback, so check.
+                if id in self._onNamesAddedCallbacks:
+                    try:
+                        self._onNamesAddedCallbacks[id](self, addedNamespaces, id)
+                    except:
+                        logging.exception("Error in onNamesAdded")
 
     def _onContentTransformed(self, data, content):
         """
@@ -407,13 +1316,20 @@ class Namespace(object):
         self._data = data
         self._content = content
 
-        # Fire callbacks.
-        namespace = self
-        while namespace:
+        contentCache = self._getContentCache()
+        if contentCache != None:
+            # This may evict the content of other nodes.
+            contentCache._onContentSet(self)
+
+        # Fire callbacks, only visiting the nodes which have callbacks.
+        namespace = self._getListenerNamespace()
+        while namespace != None:
             namespace._fireOnContentSet(self)
-            namespace = namespace._parent
+            namespace = namespace._getParentListenerNamespace()
 
     def _fireOnContentSet(self, contentNamespace):
+        if not self._onContentSetCallbacks:
+            return
         # Copy the keys before iterating since callbacks can change the list.
         for id in list(self._onContentSetCallbacks.keys()):
             # A callback on a previous pass may have removed this callback, so check.
@@ -437,6 +1353,238 @@ class Namespace(object):
             Namespace._lastCallbackId += 1
             return Namespace._lastCallbackId
 
+    class _PendingInterest(object):
+        """
+        _PendingInterest holds the state of an outstanding Interest sent by
+        Namespace.expressInterest, shared by all the calls which are aggregated
+        into it.
+        """
+        __slots__ = (
+          'face', 'rttEstimator', 'interestTemplate', 'pendingInterestId',
+          'transmitCount', 'sendTime', 'requestCount', 'onTimeoutCallbacks',
+          'onRetransmitCallbacks', 'onDataCallbacks')
+
+        def __init__(self, face, rttEstimator, interestTemplate):
+            self.face = face
+            self.rttEstimator = rttEstimator
+            self.interestTemplate = interestTemplate
+            # The pending Interest ID from Face.expressInterest, or None if the
+            # Face already removed the Interest, e.g. after a network Nack.
+            self.pendingInterestId = None
+            self.transmitCount = 0
+            # The time in milliseconds of the latest transmission.
+            self.sendTime = 0.0
+            # The number of expressInterest calls aggregated into this.
+            self.requestCount = 0
+            self.onTimeoutCallbacks = []
+            self.onRetransmitCallbacks = []
+            self.onDataCallbacks = []
+
+        def addRequest(self, onTimeout, onRetransmit, onData):
+            self.requestCount += 1
+            if onTimeout != None:
+                self.onTimeoutCallbacks.append(onTimeout)
+            if onRetransmit != None:
+                self.onRetransmitCallbacks.append(onRetransmit)
+            if onData != None:
+                self.onDataCallbacks.append(onData)
+
+        def removeRequest(self, onTimeout, onRetransmit, onData):
+            self.requestCount -= 1
+            if onTimeout in self.onTimeoutCallbacks:
+                self.onTimeoutCallbacks.remove(onTimeout)
+            if onRetransmit in self.onRetransmitCallbacks:
+                self.onRetransmitCallbacks.remove(onRetransmit)
+            if onData in self.onDataCallbacks:
+                self.onDataCallbacks.remove(onData)
+
+    class _SortedComponents(object):
+        """
+        _SortedComponents holds name components in sorted order as a list of
+        sorted sublists, each with at most 2 * _LOAD_FACTOR components. Adding
+        a component does a binary search of the last component of each sublist
+        and then of one sublist, so it needs O(log n) comparisons instead of
+        the O(n) of moving the items in one long list.
+        """
+        __slots__ = ('_lists', '_maxes', '_size')
+
+        _LOAD_FACTOR = 500
+        # update() merges if the number of components to add times this is at
+        # least the current size. (This is about log2 of a large node's size.)
+        _MERGE_FACTOR = 16
+
+        def __init__(self):
+            # The sorted sublists. None of them is empty.
+            self._lists = []
+            # The last (largest) component of each sublist.
+            self._maxes = []
+            self._size = 0
+
+        def __len__(self):
+            return self._size
+
+        def add(self, component):
+            """
+            Add the component in sorted order. This does not check if the
+            component is already present.
+
+            :param Name.Component component: The component to add.
+            """
+            lists = self._lists
+            maxes = self._maxes
+            if len(maxes) == 0:
+                lists.append([component])
+                maxes.append(component)
+                self._size = 1
+                return
+
+            i = bisect.bisect_right(maxes, component)
+            if i == len(maxes):
+                # This is the new largest. Appending is the common case for
+                # segments which are added in order.
+                i -= 1
+                lists[i].append(component)
+                maxes[i] = component
+            else:
+                bisect.insort(lists[i], component)
+            self._size += 1
+
+            sublist = lists[i]
+            if len(sublist) > 2 * Namespace._SortedComponents._LOAD_FACTOR:
+                # Split the sublist in half.
+                half = sublist[Namespace._SortedComponents._LOAD_FACTOR:]
+                del sublist[Namespace._SortedComponents._LOAD_FACTOR:]
+                maxes[i] = sublist[-1]
+                lists.insert(i + 1, half)
+                maxes.insert(i + 1, half[-1])
+
+        def update(self, components):
+            """
+            Add the sorted list of components. This does not check if a
+            component is already present. If there are many components compared
+            to the current size, this merges all the components in one pass,
+            otherwise it adds each one.
+
+            :param list of Name.Component components: The components to add,
+              in sorted order.
+            """
+            if len(components) == 0:
+                return
+            if len(components) * Namespace._SortedComponents._MERGE_FACTOR < self._size:
+                for component in components:
+                    self.add(component)
+                return
+
+            # Sorting two sorted runs is a linear merge.
+            allComponents = self.toList()
+            allComponents.extend(components)
+            allComponents.sort()
+
+            loadFactor = Namespace._SortedComponents._LOAD_FACTOR
+            self._lists = [allComponents[i:i + loadFactor]
+                           for i in range(0, len(allComponents), loadFactor)]
+            self._maxes = [sublist[-1] for sublist in self._lists]
+            self._size = len(allComponents)
+
+        def remove(self, component):
+            """
+            Remove the component. If it is not present, do nothing.
+
+            :param Name.Component component: The component to remove.
+            """
+            i = bisect.bisect_left(self._maxes, component)
+            if i == len(self._maxes):
+                return
+            sublist = self._lists[i]
+            j = bisect.bisect_left(sublist, component)
+            if j == len(sublist) or sublist[j] != component:
+                return
+
+            del sublist[j]
+            self._size -= 1
+            if len(sublist) == 0:
+                del self._lists[i]
+                del self._maxes[i]
+            elif j == len(sublist):
+                self._maxes[i] = sublist[-1]
+
+        def first(self):
+            """
+            Get the first component.
+
+            :return: The first component, or None if empty.
+            :rtype: Name.Component
+            """
+            return self._lists[0][0] if self._size > 0 else None
+
+        def last(self):
+            """
+            Get the last component.
+
+            :return: The last component, or None if empty.
+            :rtype: Name.Component
+            """
+            return self._maxes[-1] if self._size > 0 else None
+
+        def toList(self):
+            """
+            Get a new list of all the components in sorted order.
+
+            :return: A fresh list of the components.
+            :rtype: list of Name.Component
+            """
+            result = []
+            for sublist in self._lists:
+                result.extend(sublist)
+            return result
+
+        def iterRange(self, fromComponent, toComponent):
+            """
+            Iterate over the components c where fromComponent <= c and
+            c < toComponent, without copying.
+
+            :param Name.Component fromComponent: The first component to include,
+              or None to start at the first component.
+            :param Name.Component toComponent: The component to stop before, or
+              None to continue through the last component.
+            :return: A generator of the components in sorted order.
+            """
+            lists = self._lists
+            # Find the start and end positions before yielding anything.
+            if fromComponent == None:
+                iList, iComponent = 0, 0
+            else:
+                iList, iComponent = self._position(fromComponent)
+            if toComponent == None:
+                endList, endComponent = len(lists), 0
+            else:
+                endList, endComponent = self._position(toComponent)
+
+            while (iList < endList or
+                   (iList == endList and iComponent < endComponent)):
+                sublist = lists[iList]
+                stop = len(sublist) if iList < endList else endComponent
+                while iComponent < stop:
+                    yield sublist[iComponent]
+                    iComponent += 1
+                iList += 1
+                iComponent = 0
+
+        def _position(self, component):
+            """
+            Get the position of the first component which is not less than the
+            given component.
+
+            :return: (iList, iComponent) where iList is the index in _lists and
+              iComponent is the index in the sublist. If all components are
+              less, return (len(_lists), 0).
+            :rtype: (int, int)
+            """
+            iList = bisect.bisect_left(self._maxes, component)
+            if iList == len(self._lists):
+                return iList, 0
+            return iList, bisect.bisect_left(self._lists[iList], component)
+
     name = property(getName)
     parent = property(getParent)
     data = property(getData)
@@ -444,3 +1592,7 @@ class Namespace(object):
 
     _lastCallbackId = 0
     _lastCallbackIdLock = threading.Lock()
+    _lastListenerGeneration = 0
+    _lastInheritedGeneration = 0
+    # All nodes without content share this null Blob.
+    _nullBlob = Blob()
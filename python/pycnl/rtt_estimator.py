@@ -0,0 +1,272 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This module defines the RttEstimator class which estimates the round-trip time
+of Interests sent on a Face to compute the retransmission timeout used by
+Namespace.expressInterest.
+"""
+
+import weakref
+from pyndn.util.common import Common
+
+class RttEstimator(object):
+    def __init__(self, initialRto = 1000.0, minRto = 200.0, maxRto = 60000.0,
+                 maxRetries = 3, clock = None):
+        """
+        Create an RttEstimator with the given options. This computes the
+        retransmission timeout (RTO) from the smoothed round-trip time (SRTT)
+        and the round-trip time variation (RTTVAR) as described in RFC 6298.
+        Usually you don't create an RttEstimator but use the one shared by all
+        Namespace nodes with the same Face. See getFaceRttEstimator().
+
+        :param float initialRto: (optional) The RTO in milliseconds before the
+          first measurement. If omitted, use 1000.
+        :param float minRto: (optional) The minimum RTO in milliseconds. If
+          omitted, use 200.
+        :param float maxRto: (optional) The maximum RTO in milliseconds,
+          including after backoffRto(). If omitted, use 60000.
+        :param int maxRetries: (optional) The number of times that
+          Namespace.expressInterest retransmits an Interest before calling the
+          final onTimeout. If omitted, use 3.
+        :param clock: (optional) An object whose getNowMilliseconds() returns
+          the current time in milliseconds, used to measure round-trip times
+          (see getNowMilliseconds). For example, a Face on a simulated clock
+          should give its clock so that the measurements are in simulated
+          time. If omitted, use the system clock.
+        """
+        self._initialRto = float(initialRto)
+        self._minRto = float(minRto)
+        self._maxRto = float(maxRto)
+        self._maxRetries = maxRetries
+        self._clock = clock if clock != None else Common
+        self._smoothedRtt = None
+        self._rttVariation = None
+        self._rto = self._clamp(self._initialRto)
+        self._measurementCount = 0
+        self._lossCount = 0
+        # The time in milliseconds of the last backoff, or None.
+        self._backoffTime = None
+
+    # RFC 6298 smoothing factors and variance multiplier.
+    ALPHA = 1.0 / 8
+    BETA = 1.0 / 4
+    K = 4
+
+    def addMeasurement(self, rttMilliseconds):
+        """
+        Update the SRTT, RTTVAR and RTO with a new round-trip time sample. By
+        Karn's rule, only call this for an Interest which was not
+        retransmitted, since the Data packet may answer an earlier
+        transmission. This resets any backoff from backoffRto().
+
+        :param float rttMilliseconds: The measured round-trip time in
+          milliseconds.
+        """
+        rtt = float(rttMilliseconds)
+        if self._smoothedRtt == None:
+            self._smoothedRtt = rtt
+            self._rttVariation = rtt / 2
+        else:
+            self._rttVariation = ((1 - RttEstimator.BETA) * self._rttVariation +
+              RttEstimator.BETA * abs(self._smoothedRtt - rtt))
+            self._smoothedRtt = ((1 - RttEstimator.ALPHA) * self._smoothedRtt +
+              RttEstimator.ALPHA * rtt)
+
+        self._rto = self._clamp(
+          self._smoothedRtt + RttEstimator.K * self._rttVariation)
+        self._backoffTime = None
+        self._measurementCount += 1
+
+    def backoffRto(self):
+        """
+        Double the RTO (up to the maximum) and count a loss. Call this when an
+        Interest times out or is answered by a network Nack. Since many
+        Interests can be outstanding at once, this only doubles the RTO once
+        for losses within half of the RTO, so that a burst of timeouts doesn't
+        raise it to the maximum. (A retransmitted Interest times out after the
+        full RTO, so its next timeout still backs off.)
+        """
+        self._lossCount += 1
+        now = self._clock.getNowMilliseconds()
+        if (self._backoffTime != None and
+            now - self._backoffTime < self._rto / 2):
+            # Already backed off for this burst.
+            return
+
+        self._rto = self._clamp(self._rto * 2)
+        self._backoffTime = now
+
+    def getNowMilliseconds(self):
+        """
+        Get the current time from the clock given to the constructor.
+        Namespace.expressInterest uses this to measure the round-trip time
+        given to addMeasurement.
+
+        :return: The current time in milliseconds.
+        :rtype: float
+        """
+        return self._clock.getNowMilliseconds()
+
+    def getRto(self):
+        """
+        Get the current retransmission timeout.
+
+        :return: The RTO in milliseconds.
+        :rtype: float
+        """
+        return self._rto
+
+    def getSmoothedRtt(self):
+        """
+        Get the smoothed round-trip time.
+
+        :return: The SRTT in milliseconds, or None if there are no measurements
+          yet.
+        :rtype: float
+        """
+        return self._smoothedRtt
+
+    def getRttVariation(self):
+        """
+        Get the round-trip time variation.
+
+        :return: The RTTVAR in milliseconds, or None if there are no
+          measurements yet.
+        :rtype: float
+        """
+        return self._rttVariation
+
+    def getMinRto(self):
+        """
+        Get the minimum RTO.
+
+        :return: The minimum RTO in milliseconds.
+        :rtype: float
+        """
+        return self._minRto
+
+    def setMinRto(self, minRto):
+        """
+        Set the minimum RTO.
+
+        :param float minRto: The minimum RTO in milliseconds.
+        """
+        self._minRto = float(minRto)
+        self._rto = self._clamp(self._rto)
+
+    def getMaxRto(self):
+        """
+        Get the maximum RTO.
+
+        :return: The maximum RTO in milliseconds.
+        :rtype: float
+        """
+        return self._maxRto
+
+    def setMaxRto(self, maxRto):
+        """
+        Set the maximum RTO.
+
+        :param float maxRto: The maximum RTO in milliseconds.
+        """
+        self._maxRto = float(maxRto)
+        self._rto = self._clamp(self._rto)
+
+    def getMaxRetries(self):
+        """
+        Get the number of times that Namespace.expressInterest retransmits an
+        Interest before calling the final onTimeout.
+
+        :return: The maximum number of retransmissions.
+        :rtype: int
+        """
+        return self._maxRetries
+
+    def setMaxRetries(self, maxRetries):
+        """
+        Set the number of times that Namespace.expressInterest retransmits an
+        Interest before calling the final onTimeout.
+
+        :param int maxRetries: The maximum number of retransmissions.
+        :raises RuntimeError: If maxRetries is negative.
+        """
+        if maxRetries < 0:
+            raise RuntimeError("The maxRetries must not be negative")
+        self._maxRetries = maxRetries
+
+    def getMeasurementCount(self):
+        """
+        Get the number of round-trip time samples given to addMeasurement.
+
+        :return: The measurement count.
+        :rtype: int
+        """
+        return self._measurementCount
+
+    def getLossCount(self):
+        """
+        Get the number of calls to backoffRto.
+
+        :return: The loss count.
+        :rtype: int
+        """
+        return self._lossCount
+
+    @staticmethod
+    def getFaceRttEstimator(face):
+        """
+        Get the RttEstimator shared by all Namespace nodes which use the given
+        Face, creating it with the default options if needed. You can use this
+        to change the options of the estimator for a Face.
+
+        :param Face face: The Face object.
+        :return: The RttEstimator for the Face.
+        :rtype: RttEstimator
+        """
+        estimator = RttEstimator._faceRttEstimators.get(face)
+        if estimator == None:
+            estimator = RttEstimator()
+            RttEstimator._faceRttEstimators[face] = estimator
+        return estimator
+
+    @staticmethod
+    def setFaceRttEstimator(face, estimator):
+        """
+        Set the RttEstimator shared by all Namespace nodes which use the given
+        Face, replacing any existing one.
+
+        :param Face face: The Face object.
+        :param RttEstimator estimator: The RttEstimator for the Face.
+        """
+        RttEstimator._faceRttEstimators[face] = estimator
+
+    def _clamp(self, rto):
+        return min(max(rto, self._minRto), self._maxRto)
+
+    # The key is the Face and the value is its RttEstimator. Use weak keys so
+    # that this does not keep a Face alive.
+    _faceRttEstimators = weakref.WeakKeyDictionary()
+
+    rto = property(getRto)
+    smoothedRtt = property(getSmoothedRtt)
+    rttVariation = property(getRttVariation)
+    minRto = property(getMinRto, setMinRto)
+    maxRto = property(getMaxRto, setMaxRto)
+    maxRetries = property(getMaxRetries, setMaxRetries)
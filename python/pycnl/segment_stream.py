@@ -23,8 +23,12 @@ to fetch and return child segment packets in order.
 """
 
 import logging
+import heapq
+import time
+from collections import deque
 from pyndn import Name, Interest
 from pycnl.namespace import Namespace
+from pycnl.rtt_estimator import RttEstimator
 
 class SegmentStream(object):
     def __init__(self, namespace):
@@ -37,11 +41,83 @@ class SegmentStream(object):
         """
         self._namespace = namespace
         self._maxRetrievedSegmentNumber = -1
-        self._didRequestFinalSegment = False
         self._finalSegmentNumber = None
+        # The last segment number of the range from fetchRange, or None.
+        self._lastRangeSegmentNumber = None
+        self._isStarted = False
+        self._isFinished = False
+        self._isPaused = False
+        self._releaseDeliveredSegments = False
+        self._maxBufferedBytes = None
+        # The total content size of _receivedSegments.
+        self._bufferedBytes = 0
+        # True while the ChildSelector Interest to discover the final segment
+        # is pending.
+        self._isDiscoveryPending = False
+        # True if start() was called while paused, so that resume() sends the
+        # ChildSelector Interest.
+        self._isDiscoveryDeferred = False
+        self._probeFinalSegment = False
+        # The highest received segment number, and the lowest segment number
+        # known to be missing (which timed out) if the final segment is not
+        # known yet. The final segment is in between.
+        self._highestReceivedSegmentNumber = -1
+        self._missingSegmentNumber = None
+        # The segment number of the outstanding probe Interest, or None.
+        self._probeSegmentNumber = None
         self._interestPipelineSize = 8
+        self._useCongestionControl = False
+        self._minWindowSize = 1
+        self._maxWindowSize = 256
+        # The congestion window, which is a float for additive increase.
+        self._windowSize = 1.0
+        # There is no slow start threshold until the first loss.
+        self._slowStartThreshold = float("inf")
+        # The highest segment number requested when the window was last
+        # decreased. A loss of a segment up to this doesn't decrease it again.
+        self._recoveryPoint = -1
+        self._fastRetransmitThreshold = 3
+        # The next segment to supply to onSegment while it is in flight, with
+        # its send sequence number, and the number of segments sent after it
+        # which were received.
+        self._gapSegmentNumber = -1
+        self._gapSendSequence = 0
+        self._gapLaterArrivalCount = 0
+        self._fastRetransmitCount = 0
+        self._timeoutRetransmitCount = 0
+        self._maxSegmentRetries = 3
+        # The key is the number of a segment whose Interest had a final
+        # timeout. The value is the number of final timeouts.
+        self._segmentRetryCounts = {}
+        # The message of the error which stopped the stream, or None.
+        self._errorMessage = None
         # The dictionary key is the callback ID. The value is the onSegment function.
         self._onSegmentCallbacks = {}
+        # The dictionary key is the callback ID. The value is the onError function.
+        self._onErrorCallbacks = {}
+        # The key is the number of a segment whose Interest is outstanding. The
+        # value is the send sequence number of its latest transmission.
+        self._inFlightSegments = {}
+        self._lastSendSequence = 0
+        # The key is the number of a received segment which is not yet
+        # supplied to onSegment. The value is the leaf Namespace node with the
+        # content.
+        self._receivedSegments = {}
+        # The next segment number which has never been requested.
+        self._nextSegmentNumber = 0
+        # A heap of segment numbers which timed out and must be requested again.
+        self._retrySegments = []
+        # The set of received segment Namespace nodes which this pinned in a
+        # ContentCache until they are supplied to onSegment.
+        self._pinnedSegments = set()
+        # The SegmentStreamScheduler which this was added to, or None.
+        self._scheduler = None
+        # When the Namespace has multiple Faces (see Namespace.setFaces), the
+        # key is the Face and the value is its pass for stride scheduling.
+        self._facePasses = {}
+        # When striping, the key is the number of an in-flight segment and the
+        # value is the Face of its Interest.
+        self._inFlightFaces = {}
 
         self._namespace.addOnContentSet(self._onContentSet)
 
@@ -68,6 +144,30 @@ class SegmentStream(object):
         self._onSegmentCallbacks[callbackId] = onSegment
         return callbackId
 
+    def addOnError(self, onError):
+        """
+        Add an onError callback. If the stream can't continue, for example
+        because a segment still times out after it is requested again
+        getMaxSegmentRetries() times, then this cancels the outstanding
+        Interests, stops fetching and calls onError as described below. After
+        this, onSegment is not called, not even for the "end of stream". You
+        can call seek() to try again.
+
+        :param onError: This calls onError(segmentStream, message, callbackId)
+          where segmentStream is this SegmentStream, message is a string
+          describing the error (also returned by getErrorMessage()), and
+          callbackId is the callback ID returned by this method.
+          NOTE: The library will log any exceptions raised by this callback, but
+          for better error handling the callback should catch and properly
+          handle any exceptions.
+        :type onError: function object
+        :return: The callback ID which you can use in removeCallback().
+        :rtype: int
+        """
+        callbackId = Namespace.getNextCallbackId()
+        self._onErrorCallbacks[callbackId] = onError
+        return callbackId
+
     def removeCallback(self, callbackId):
         """
         Remove the callback with the given callbackId. If the callbackId isn't
@@ -77,6 +177,7 @@ class SegmentStream(object):
           addOnSegment.
         """
         self._onSegmentCallbacks.pop(callbackId, None)
+        self._onErrorCallbacks.pop(callbackId, None)
 
     def getNamespace(self):
         """
@@ -109,7 +210,230 @@ class SegmentStream(object):
             raise RuntimeError("The interestPipelineSize must be at least 1")
         self._interestPipelineSize = interestPipelineSize
 
-    def start(self, interestCount = 1):
+    def getCongestionControl(self):
+        """
+        Get the congestion control flag. See setCongestionControl().
+
+        :return: True if congestion control is used.
+        :rtype: bool
+        """
+        return self._useCongestionControl
+
+    def setCongestionControl(self, useCongestionControl):
+        """
+        Set the congestion control flag. If True, the number of outstanding
+        interests is a congestion window instead of the fixed Interest pipeline
+        size. The window starts at the minimum window size and grows by one for
+        each received segment (slow start) until the slow start threshold, then
+        by about one for each window of received segments (additive increase).
+        On a timeout or network Nack, the window and threshold are halved
+        (multiplicative decrease), but at most once for each window of
+        requested segments. If False (the default), use the Interest pipeline
+        size.
+
+        :param bool useCongestionControl: True to use congestion control.
+        """
+        self._useCongestionControl = useCongestionControl
+
+    def getMinWindowSize(self):
+        """
+        Get the minimum congestion window when congestion control is used.
+
+        :return: The minimum window size.
+        :rtype: int
+        """
+        return self._minWindowSize
+
+    def setMinWindowSize(self, minWindowSize):
+        """
+        Set the minimum congestion window when congestion control is used.
+        This is also the initial window.
+
+        :param int minWindowSize: The minimum window size.
+        :raises RuntimeError: If minWindowSize is less than 1 or greater than
+          the maximum window size.
+        """
+        if minWindowSize < 1:
+            raise RuntimeError("The minWindowSize must be at least 1")
+        if minWindowSize > self._maxWindowSize:
+            raise RuntimeError(
+              "The minWindowSize must not be greater than the maxWindowSize")
+        self._minWindowSize = minWindowSize
+        self._windowSize = max(self._windowSize, float(minWindowSize))
+
+    def getMaxWindowSize(self):
+        """
+        Get the maximum congestion window when congestion control is used.
+
+        :return: The maximum window size.
+        :rtype: int
+        """
+        return self._maxWindowSize
+
+    def setMaxWindowSize(self, maxWindowSize):
+        """
+        Set the maximum congestion window when congestion control is used.
+
+        :param int maxWindowSize: The maximum window size.
+        :raises RuntimeError: If maxWindowSize is less than the minimum window
+          size.
+        """
+        if maxWindowSize < self._minWindowSize:
+            raise RuntimeError(
+              "The maxWindowSize must not be less than the minWindowSize")
+        self._maxWindowSize = maxWindowSize
+        self._windowSize = min(self._windowSize, float(maxWindowSize))
+
+    def getFastRetransmitThreshold(self):
+        """
+        Get the fast retransmit threshold. See setFastRetransmitThreshold().
+
+        :return: The fast retransmit threshold.
+        :rtype: int
+        """
+        return self._fastRetransmitThreshold
+
+    def setFastRetransmitThreshold(self, fastRetransmitThreshold):
+        """
+        Set the fast retransmit threshold. If the next segment to supply to
+        onSegment is still outstanding after this many segments which were
+        requested after it are received, then assume that it was lost and
+        retransmit its Interest without waiting for the timeout. If 0, don't
+        use fast retransmit. If not set, use 3.
+
+        :param int fastRetransmitThreshold: The fast retransmit threshold.
+        :raises RuntimeError: If fastRetransmitThreshold is negative.
+        """
+        if fastRetransmitThreshold < 0:
+            raise RuntimeError("The fastRetransmitThreshold must not be negative")
+        self._fastRetransmitThreshold = fastRetransmitThreshold
+
+    def getFastRetransmitCount(self):
+        """
+        Get the number of segment Interests which were retransmitted because
+        later segments were received (see setFastRetransmitThreshold).
+
+        :return: The fast retransmit count.
+        :rtype: int
+        """
+        return self._fastRetransmitCount
+
+    def getTimeoutRetransmitCount(self):
+        """
+        Get the number of segment Interests which were retransmitted after a
+        timeout or network Nack, including requesting a segment again after
+        the final timeout.
+
+        :return: The timeout retransmit count.
+        :rtype: int
+        """
+        return self._timeoutRetransmitCount
+
+    def getMaxSegmentRetries(self):
+        """
+        Get the maximum number of times that a segment is requested again after
+        a final timeout. See setMaxSegmentRetries().
+
+        :return: The maximum segment retries.
+        :rtype: int
+        """
+        return self._maxSegmentRetries
+
+    def setMaxSegmentRetries(self, maxSegmentRetries):
+        """
+        Set the maximum number of times that a segment is requested again after
+        the final timeout of its Interest (when Namespace.expressInterest gives
+        up retransmitting). On the next final timeout, the stream stops with an
+        error (see addOnError). If not set, use 3.
+
+        :param int maxSegmentRetries: The maximum segment retries.
+        :raises RuntimeError: If maxSegmentRetries is negative.
+        """
+        if maxSegmentRetries < 0:
+            raise RuntimeError("The maxSegmentRetries must not be negative")
+        self._maxSegmentRetries = maxSegmentRetries
+
+    def getErrorMessage(self):
+        """
+        Get the message of the error which stopped the stream. See addOnError().
+
+        :return: The error message, or None if the stream did not stop because
+          of an error (or seek() was called after the error).
+        :rtype: str
+        """
+        return self._errorMessage
+
+    def getWindowSize(self):
+        """
+        Get the current number of outstanding interests which this maintains
+        while fetching segments. This is the congestion window if congestion
+        control is used, otherwise the Interest pipeline size.
+
+        :return: The current window size.
+        :rtype: int
+        """
+        if self._useCongestionControl:
+            return int(self._windowSize)
+        else:
+            return self._interestPipelineSize
+
+    def getFinalSegmentNumber(self):
+        """
+        Get the final segment number if it is known, from the FinalBlockId of a
+        segment, setSegmentCountHint, or the timeout of the segment after the
+        highest received segment. (Without a FinalBlockId, this sends a
+        ChildSelector Interest to discover the rightmost segment which the
+        network has, then requests the next segment to check that there is no
+        segment after it. See also setProbeFinalSegment.)
+
+        :return: The final segment number, or None if not known yet.
+        :rtype: int
+        """
+        return self._finalSegmentNumber
+
+    def setSegmentCountHint(self, segmentCount):
+        """
+        Set the number of segments if the application already knows it, for
+        example from a manifest. Then start() immediately requests a full
+        window of segments and doesn't need to discover the final segment.
+        You should call this before start(). (A FinalBlockId in a received
+        segment overrides this.)
+
+        :param int segmentCount: The number of segments.
+        :raises RuntimeError: If segmentCount is less than 1.
+        """
+        if segmentCount < 1:
+            raise RuntimeError("The segmentCount must be at least 1")
+        self._finalSegmentNumber = segmentCount - 1
+
+    def getProbeFinalSegment(self):
+        """
+        Get the probe final segment flag. See setProbeFinalSegment().
+
+        :return: True if this probes for the final segment.
+        :rtype: bool
+        """
+        return self._probeFinalSegment
+
+    def setProbeFinalSegment(self, probeFinalSegment):
+        """
+        Set the probe final segment flag. If True and the final segment is not
+        known after the first segment is received (because the segments don't
+        have a FinalBlockId), then also probe for the final segment by
+        requesting segments 1, 3, 7, 15, ... until one times out, then doing a
+        binary search between the highest received segment and the lowest
+        segment which timed out. This is in parallel with the ChildSelector
+        Interest for the rightmost segment, for producers which don't answer
+        it. If False (the default), don't probe. A probe Interest is not
+        counted in the window or by a SegmentStreamScheduler, but only one is
+        outstanding at a time, and it is not sent while paused or while the
+        buffered bytes are at the maximum (see setMaxBufferedBytes).
+
+        :param bool probeFinalSegment: True to probe for the final segment.
+        """
+        self._probeFinalSegment = probeFinalSegment
+
+    def start(self, interestCount = 1, fromSegment = 0):
         """
         Start fetching segment Data packets and adding them as children of
         getNamespace(), calling any onSegment callbacks in order as the
@@ -123,10 +447,334 @@ class SegmentStream(object):
           segments, but if you know the number of segments you can reduce
           latency by initially requesting more segments. (However, you should
           not use a number larger than the Interest pipeline size.) If omitted,
-          use 1.
+          use 1. If the final segment number is known, for example from
+          setSegmentCountHint, this requests at least a full window.
+        :param int fromSegment: (optional) The segment number of the first
+          segment to supply to onSegment. If omitted, use 0.
+        :raises RuntimeError: If fromSegment is negative.
         """
+        if fromSegment < 0:
+            raise RuntimeError("The fromSegment must not be negative")
+        self._isStarted = True
+        self._setPosition(fromSegment)
+        if self._deliverSegments():
+            # All the segments already have content.
+            return
+
+        if (self._finalSegmentNumber == None and
+            self._lastRangeSegmentNumber == None and
+            not self._isDiscoveryPending):
+            # Discover the final segment in parallel with the first segment.
+            self._discoverFinalSegment()
+        else:
+            interestCount = max(interestCount, self.getWindowSize())
         self._requestNewSegments(interestCount)
 
+    def fetchRange(self, fromSegment, toSegment):
+        """
+        Fetch the segments from fromSegment up to but not including toSegment,
+        calling onSegment for each in order and then calling
+        onSegment(stream, None, callbackId) at the end of the range (or at the
+        final segment if it is before the end of the range). You can call this
+        instead of start(), or later to fetch a different range like seek().
+
+        :param int fromSegment: The segment number of the first segment.
+        :param int toSegment: The segment number after the last segment.
+        :raises RuntimeError: If fromSegment is negative or toSegment is not
+          greater than fromSegment.
+        """
+        if fromSegment < 0:
+            raise RuntimeError("The fromSegment must not be negative")
+        if toSegment <= fromSegment:
+            raise RuntimeError("The toSegment must be greater than fromSegment")
+
+        self._lastRangeSegmentNumber = toSegment - 1
+        self.seek(fromSegment)
+
+    def seek(self, segmentNumber):
+        """
+        Continue fetching from the given segment number so that the next
+        segment supplied to onSegment is segmentNumber, followed by the
+        following segments in order. This cancels the Interests for segments
+        which are outside the new window and keeps the received segments from
+        segmentNumber on. If the stream is finished, this fetches again up to
+        the final segment (or the end of the range from fetchRange). If
+        start() was not called, this calls start(1, segmentNumber).
+
+        :param int segmentNumber: The segment number of the next segment to
+          supply to onSegment.
+        :raises RuntimeError: If segmentNumber is negative.
+        """
+        if segmentNumber < 0:
+            raise RuntimeError("The segmentNumber must not be negative")
+        if not self._isStarted:
+            self.start(1, segmentNumber)
+            return
+
+        self._setPosition(segmentNumber)
+        if self._deliverSegments():
+            return
+        self._requestNewSegments(self.getWindowSize())
+
+    def pause(self):
+        """
+        Stop calling onSegment and stop sending Interests for more segments,
+        for example when the application's consumer of segments is busy. This
+        includes the Interests to discover the final segment. Segments whose
+        Interests are outstanding are still received and buffered. Call
+        resume() to continue.
+        """
+        self._isPaused = True
+
+    def resume(self):
+        """
+        Undo pause(), calling onSegment for the buffered segments and sending
+        Interests to fill the window. If not paused, do nothing.
+        """
+        if not self._isPaused:
+            return
+
+        self._isPaused = False
+        if not self._isStarted:
+            return
+        if self._deliverSegments():
+            return
+        if self._finalSegmentNumber == None and self._errorMessage == None:
+            if self._isDiscoveryDeferred:
+                self._discoverFinalSegment()
+            self._findFinalSegment()
+            if self._deliverSegments():
+                return
+        self._requestNewSegments(self.getWindowSize())
+
+    def isPaused(self):
+        """
+        Check if pause() was called without resume().
+
+        :return: True if paused.
+        :rtype: bool
+        """
+        return self._isPaused
+
+    def getMaxBufferedBytes(self):
+        """
+        Get the maximum buffered bytes. See setMaxBufferedBytes().
+
+        :return: The maximum buffered bytes, or None for no limit.
+        :rtype: int
+        """
+        return self._maxBufferedBytes
+
+    def setMaxBufferedBytes(self, maxBufferedBytes):
+        """
+        Set the maximum total content size of the received segments which are
+        not yet supplied to onSegment, for example because an earlier segment
+        is missing. While the buffered bytes are at or above this, don't send
+        Interests except for the next segment to supply to onSegment (not even
+        a probe, see setProbeFinalSegment), so that memory is bounded. (The
+        buffer can still grow by the segments whose Interests are already
+        outstanding, up to the window size.) If None (the default), there is
+        no limit.
+
+        :param int maxBufferedBytes: The maximum buffered bytes, or None for no
+          limit.
+        """
+        self._maxBufferedBytes = maxBufferedBytes
+
+    def getReleaseDeliveredSegments(self):
+        """
+        Get the release delivered segments flag. See
+        setReleaseDeliveredSegments().
+
+        :return: True if segment nodes are removed after they are supplied to
+          onSegment.
+        :rtype: bool
+        """
+        return self._releaseDeliveredSegments
+
+    def setReleaseDeliveredSegments(self, releaseDeliveredSegments):
+        """
+        Set the release delivered segments flag. If True, after all the
+        onSegment callbacks return for a segment, remove the segment node (and
+        its Data packet and content) from getNamespace() so that the memory
+        used by a long or live stream stays proportional to the window
+        instead of the size of the object. A callback which needs the content
+        later must keep a reference to it. If False (the default), keep the
+        segment nodes.
+
+        :param bool releaseDeliveredSegments: True to remove delivered segment
+          nodes.
+        """
+        self._releaseDeliveredSegments = releaseDeliveredSegments
+
+    def getBufferedBytes(self):
+        """
+        Get the total content size of the received segments which are not yet
+        supplied to onSegment.
+
+        :return: The buffered bytes.
+        :rtype: int
+        """
+        return self._bufferedBytes
+
+    def iterSegments(self, pollInterval = 0.001):
+        """
+        Get a generator which yields the segments in order, as an alternative
+        to addOnSegment. While no segment is available, this calls
+        processEvents() on the Face (or Faces) of getNamespace(). This calls
+        start() if it was not already called. The generator stops after the
+        final segment. If the stream stops because of an error (see
+        addOnError), the generator raises RuntimeError with the error message.
+        For example:
+        for segmentNamespace in segmentStream.iterSegments():
+            process(segmentNamespace.content)
+
+        :param float pollInterval: (optional) The number of seconds to sleep
+          after processEvents() when no segment is available, so that this
+          doesn't use 100% of the CPU. Use 0 if the Face processEvents() waits
+          for events. If omitted, use 0.001.
+        :return: A generator of the segment Namespace nodes, where you can use
+          segmentNamespace.content .
+        :rtype: generator
+        :raises RuntimeError: If getNamespace() has no Face, or if the stream
+          stops because of an error.
+        """
+        faces = self._namespace._getFaces()
+        if len(faces) == 0:
+            raise RuntimeError("SegmentStream.iterSegments: There is no Face")
+
+        segments = deque()
+        isFinished = [self._isFinished]
+        errorMessage = [self._errorMessage]
+        def onSegment(segmentStream, segmentNamespace, callbackId):
+            if segmentNamespace == None:
+                isFinished[0] = True
+            else:
+                segments.append(segmentNamespace)
+
+        def onError(segmentStream, message, callbackId):
+            errorMessage[0] = message
+
+        callbackId = self.addOnSegment(onSegment)
+        errorCallbackId = self.addOnError(onError)
+        try:
+            if not self._isStarted:
+                self.start()
+
+            while True:
+                while len(segments) > 0:
+                    yield segments.popleft()
+                if isFinished[0]:
+                    return
+                if errorMessage[0] != None:
+                    raise RuntimeError(
+                      "SegmentStream.iterSegments: " + errorMessage[0])
+
+                for face in faces:
+                    face.processEvents()
+                if (len(segments) == 0 and not isFinished[0] and
+                    errorMessage[0] == None and pollInterval > 0):
+                    time.sleep(pollInterval)
+        finally:
+            self.removeCallback(callbackId)
+            self.removeCallback(errorCallbackId)
+
+    def aiterSegments(self):
+        """
+        Get an asynchronous iterator for asyncio which yields the segments in
+        order, for use in async for. The Face of getNamespace() must be driven
+        by the asyncio event loop, for example ThreadsafeFace. This calls
+        start() if it was not already called. The iteration stops after the
+        final segment. If the stream stops because of an error (see
+        addOnError), the iteration raises RuntimeError with the error message.
+        (This requires Python 3.5 or later.) For example:
+        async for segmentNamespace in segmentStream.aiterSegments():
+            process(segmentNamespace.content)
+
+        :return: The asynchronous iterator of the segment Namespace nodes.
+        :rtype: an object with __aiter__ and __anext__
+        """
+        return SegmentStream._AsyncSegmentIterator(self)
+
+    class _AsyncSegmentIterator(object):
+        """
+        _AsyncSegmentIterator is returned by aiterSegments. __anext__ returns
+        an asyncio Future for the next segment so that this does not need the
+        async syntax.
+        """
+        def __init__(self, segmentStream):
+            self._segmentStream = segmentStream
+            self._segments = deque()
+            self._isFinished = segmentStream._isFinished
+            self._errorMessage = segmentStream._errorMessage
+            # The Future returned by __anext__ which is waiting for a segment.
+            self._future = None
+            self._callbackId = segmentStream.addOnSegment(self._onSegment)
+            self._errorCallbackId = segmentStream.addOnError(self._onError)
+            if not segmentStream._isStarted:
+                segmentStream.start()
+
+        def __aiter__(self):
+            return self
+
+        def __anext__(self):
+            # Import here since asyncio is not in Python 2.
+            import asyncio
+
+            future = asyncio.get_event_loop().create_future()
+            if not self._resolve(future):
+                self._future = future
+            return future
+
+        def _onSegment(self, segmentStream, segmentNamespace, callbackId):
+            if segmentNamespace == None:
+                self._isFinished = True
+            else:
+                self._segments.append(segmentNamespace)
+            self._resolvePending()
+
+        def _onError(self, segmentStream, message, callbackId):
+            self._errorMessage = message
+            self._resolvePending()
+
+        def _resolvePending(self):
+            """
+            If __anext__ returned a Future which is waiting, try to resolve it.
+            """
+            if self._future != None:
+                future = self._future
+                self._future = None
+                if not future.done():
+                    self._resolve(future)
+
+        def _resolve(self, future):
+            """
+            Set the result of the future to the next segment, or raise
+            StopAsyncIteration if finished, or RuntimeError if the stream
+            stopped because of an error.
+
+            :return: True if the future is resolved, or False if there is no
+              segment yet.
+            :rtype: bool
+            """
+            if len(self._segments) > 0:
+                future.set_result(self._segments.popleft())
+                return True
+            if self._isFinished:
+                self._removeCallbacks()
+                future.set_exception(StopAsyncIteration())
+                return True
+            if self._errorMessage != None:
+                self._removeCallbacks()
+                future.set_exception(RuntimeError(
+                  "SegmentStream.aiterSegments: " + self._errorMessage))
+                return True
+            return False
+
+        def _removeCallbacks(self):
+            self._segmentStream.removeCallback(self._callbackId)
+            self._segmentStream.removeCallback(self._errorCallbackId)
+
     @staticmethod
     def debugGetRightmostLeaf(namespace):
         """
@@ -139,15 +787,25 @@ class SegmentStream(object):
         """
         result = namespace
         while True:
-            childComponents = result.getChildComponents()
-            if len(childComponents) == 0:
+            lastComponent = result.getLastChildComponent()
+            if lastComponent == None:
                 return result
 
-            result = result[childComponents[-1]]
+            result = result[lastComponent]
 
     def _onContentSet(self, namespace, contentNamespace, callbackId):
-        if not (len(contentNamespace.name) >= len(self._namespace.name) + 1 and
-                contentNamespace.name[len(self._namespace.name)].isSegment()):
+        if self._errorMessage != None:
+            # Stopped because of an error. seek() will use the content.
+            return
+
+        # Find the child of self._namespace which is the ancestor of (or equal
+        # to) contentNamespace. Use the depth instead of contentNamespace.name
+        # so that we don't make the full name of every segment node.
+        segmentNamespace = contentNamespace
+        while segmentNamespace._depth > self._namespace._depth + 1:
+            segmentNamespace = segmentNamespace._parent
+        if not (segmentNamespace._parent is self._namespace and
+                segmentNamespace._component.isSegment()):
             # Not a segment, ignore.
             return
 
@@ -156,76 +814,590 @@ class SegmentStream(object):
         metaInfo = contentNamespace.data.metaInfo
         if (metaInfo.getFinalBlockId().getValue().size() > 0 and
              metaInfo.getFinalBlockId().isSegment()):
-            self._finalSegmentNumber = metaInfo.getFinalBlockId().toSegment()
+            self._setFinalSegmentNumber(metaInfo.getFinalBlockId().toSegment())
 
-        # Report as many segments as possible where the node already has content.
-        while True:
-            nextSegmentNumber = self._maxRetrievedSegmentNumber + 1
-            nextSegment = self.debugGetRightmostLeaf(
-              self._namespace[Name.Component.fromSegment(nextSegmentNumber)])
-            if nextSegment.content.isNull():
-                break
+        segmentNumber = segmentNamespace._component.toSegment()
+        if segmentNumber == self._probeSegmentNumber:
+            self._probeSegmentNumber = None
+        self._setHighestReceivedSegmentNumber(segmentNumber)
 
-            self._maxRetrievedSegmentNumber = nextSegmentNumber
-            self._fireOnSegment(nextSegment)
+        sendSequence = self._inFlightSegments.pop(segmentNumber, None)
+        face = self._inFlightFaces.pop(segmentNumber, None)
+        if len(self._segmentRetryCounts) > 0:
+            self._segmentRetryCounts.pop(segmentNumber, None)
+        if sendSequence != None and self._useCongestionControl:
+            self._increaseWindow()
+        if (segmentNumber > self._maxRetrievedSegmentNumber and
+            self._isWanted(segmentNumber)):
+            self._addReceivedSegment(segmentNumber, contentNamespace)
+
+        if self._deliverSegments():
+            # Finished.
+            return
+        if sendSequence != None:
+            self._detectGap(sendSequence, face)
 
-            if (self._finalSegmentNumber != None and
-                nextSegmentNumber == self._finalSegmentNumber):
-                # Finished.
-                self._fireOnSegment(None)
+        if self._finalSegmentNumber == None:
+            self._findFinalSegment()
+            if self._deliverSegments():
                 return
 
-        if self._finalSegmentNumber == None and not self._didRequestFinalSegment:
-            self._didRequestFinalSegment = True
-            # Try to determine the final segment now.
-            interestTemplate = Interest()
-            interestTemplate.setInterestLifetimeMilliseconds(4000)
-            interestTemplate.setChildSelector(1)
-            self._namespace.expressInterest(interestTemplate)
+        self._requestNewSegments(self.getWindowSize())
+
+    def _onDiscoveryData(self, namespace, data):
+        """
+        This is called when the Data for the ChildSelector Interest to discover
+        the final segment is received, after it is set on its node. (The
+        segment may have been received already by a segment Interest, in which
+        case setting it does nothing.) If the Data is a segment, it is the
+        rightmost segment which the network has, but not necessarily the final
+        segment since a cache may have only the first segments. So use it as
+        the highest received segment and probe the next segment. If that
+        times out, _findFinalSegment sets the final segment.
+        """
+        self._isDiscoveryPending = False
+        depth = self._namespace._depth
+        if not (data.name.size() > depth and data.name[depth].isSegment()):
+            # Not a segment, ignore.
+            return
+
+        if self._finalSegmentNumber == None:
+            segmentNumber = data.name[depth].toSegment()
+            self._setHighestReceivedSegmentNumber(segmentNumber)
+            self._sendProbe(segmentNumber + 1)
+            self._findFinalSegment()
+        if self._deliverSegments():
+            return
+        self._requestNewSegments(self.getWindowSize())
+
+    def _setHighestReceivedSegmentNumber(self, segmentNumber):
+        """
+        Update _highestReceivedSegmentNumber for a received segment, and forget
+        the missing segment if it is not past the segment.
+        """
+        if segmentNumber > self._highestReceivedSegmentNumber:
+            self._highestReceivedSegmentNumber = segmentNumber
+            if (self._missingSegmentNumber != None and
+                segmentNumber >= self._missingSegmentNumber):
+                # The missing segment was lost, not past the end.
+                self._missingSegmentNumber = None
+
+    def _setFinalSegmentNumber(self, finalSegmentNumber):
+        """
+        Set _finalSegmentNumber and stop counting requests for segments past
+        it as in flight.
+        """
+        if finalSegmentNumber == self._finalSegmentNumber:
+            return
+
+        self._finalSegmentNumber = finalSegmentNumber
+        self._missingSegmentNumber = None
+        self._cancelSegments(
+          [n for n in self._inFlightSegments if n > finalSegmentNumber])
+
+    def _setPosition(self, segmentNumber):
+        """
+        Set the next segment to supply to onSegment, forgetting the received
+        segments before it and cancelling the Interests for segments outside
+        the window from it.
+        """
+        if (segmentNumber == self._maxRetrievedSegmentNumber + 1 and
+            not self._isFinished and self._errorMessage == None):
+            # Already at the position.
+            return
+
+        self._maxRetrievedSegmentNumber = segmentNumber - 1
+        self._nextSegmentNumber = segmentNumber
+        self._retrySegments = []
+        self._segmentRetryCounts = {}
+        self._gapSegmentNumber = -1
+        self._isFinished = False
+        self._errorMessage = None
+
+        for receivedSegmentNumber in [
+            n for n in self._receivedSegments if n < segmentNumber]:
+            self._unpin(self._popReceivedSegment(receivedSegmentNumber))
+
+        windowEnd = segmentNumber + self.getWindowSize()
+        self._cancelSegments(
+          [n for n in self._inFlightSegments
+           if n < segmentNumber or n >= windowEnd or not self._isWanted(n)])
+
+    def _cancelSegments(self, segmentNumbers):
+        """
+        Cancel the Interests for the in-flight segments and remove them from
+        _inFlightSegments.
+        """
+        for segmentNumber in segmentNumbers:
+            del self._inFlightSegments[segmentNumber]
+            self._inFlightFaces.pop(segmentNumber, None)
+            segment = self._namespace.findChild(
+              Name.Component.fromSegment(segmentNumber))
+            if segment != None:
+                segment._cancelInterest(self._onTimeout, self._onRetransmit)
+
+    def _findFinalSegment(self):
+        """
+        This is called while the final segment is not known. If the highest
+        received segment is just before the lowest missing segment, then it is
+        the final segment. Otherwise, if setProbeFinalSegment is True, request
+        the next probe segment.
+        """
+        if (self._missingSegmentNumber != None and
+            self._missingSegmentNumber <= self._highestReceivedSegmentNumber + 1):
+            self._setFinalSegmentNumber(self._highestReceivedSegmentNumber)
+            return
+
+        if (not self._probeFinalSegment or self._probeSegmentNumber != None or
+            self._highestReceivedSegmentNumber < 0):
+            return
+        low = self._highestReceivedSegmentNumber
+        if self._missingSegmentNumber == None:
+            # Exponential probe.
+            segmentNumber = 2 * low + 1
+        else:
+            # Binary search.
+            segmentNumber = (low + self._missingSegmentNumber) // 2
+        self._sendProbe(segmentNumber)
+
+    def _discoverFinalSegment(self):
+        """
+        Send the ChildSelector Interest to discover the rightmost segment (see
+        _onDiscoveryData). If paused, let resume() send it.
+        """
+        if self._isPaused:
+            self._isDiscoveryDeferred = True
+            return
+
+        self._isDiscoveryDeferred = False
+        self._isDiscoveryPending = True
+        interestTemplate = Interest()
+        interestTemplate.setChildSelector(1)
+        self._namespace.expressInterest(
+          interestTemplate, self._onTimeout, None, None, self._onDiscoveryData)
+
+    def _sendProbe(self, segmentNumber):
+        """
+        Send the Interest for the segment to probe for the final segment, and
+        set _probeSegmentNumber. Don't send it if paused, stopped by an error
+        or the buffered bytes are at the maximum, if a probe is outstanding,
+        or if the segment is known not to exist or is already requested (in
+        which case its timeout also sets the missing segment).
+        """
+        if (self._isPaused or self._errorMessage != None or
+            self._isBufferFull() or self._probeSegmentNumber != None or
+            not self._mayExist(segmentNumber) or
+            segmentNumber in self._inFlightSegments):
+            return
+
+        segment = self._namespace[Name.Component.fromSegment(segmentNumber)]
+        self._probeSegmentNumber = segmentNumber
+        segment.expressInterest(None, self._onTimeout)
+
+    def _isBufferFull(self):
+        """
+        Check if the buffered bytes are at or above the maximum from
+        setMaxBufferedBytes.
+        """
+        return (self._maxBufferedBytes != None and
+                self._bufferedBytes >= self._maxBufferedBytes)
+
+    def _addReceivedSegment(self, segmentNumber, contentNamespace):
+        """
+        Add to _receivedSegments and pin the content in a ContentCache until
+        it is supplied to onSegment.
+        """
+        if segmentNumber in self._receivedSegments:
+            return
+        self._receivedSegments[segmentNumber] = contentNamespace
+        self._bufferedBytes += contentNamespace._content.size()
+        contentCache = contentNamespace._getContentCache()
+        if (contentCache != None and
+            not contentNamespace in self._pinnedSegments):
+            contentCache.pin(contentNamespace)
+            self._pinnedSegments.add(contentNamespace)
+
+    def _popReceivedSegment(self, segmentNumber):
+        """
+        Remove the segment from _receivedSegments.
+
+        :return: The leaf Namespace node with the content, or None if the
+          segment is not in _receivedSegments.
+        :rtype: Namespace
+        """
+        contentNamespace = self._receivedSegments.pop(segmentNumber, None)
+        if contentNamespace != None:
+            self._bufferedBytes -= contentNamespace._content.size()
+        return contentNamespace
+
+    def _unpin(self, contentNamespace):
+        """
+        If this pinned contentNamespace in a ContentCache, unpin it.
+        """
+        if contentNamespace in self._pinnedSegments:
+            self._pinnedSegments.remove(contentNamespace)
+            contentNamespace._getContentCache().unpin(contentNamespace)
+
+    def _deliverSegments(self):
+        """
+        Supply as many received segments as possible to onSegment in order,
+        unless paused.
+
+        :return: True if the final segment was supplied.
+        :rtype: bool
+        """
+        while True:
+            if self._isPaused or self._errorMessage != None:
+                return False
+
+            lastSegmentNumber = self._finalSegmentNumber
+            if (self._lastRangeSegmentNumber != None and
+                (lastSegmentNumber == None or
+                 self._lastRangeSegmentNumber < lastSegmentNumber)):
+                lastSegmentNumber = self._lastRangeSegmentNumber
+            if (lastSegmentNumber != None and
+                self._maxRetrievedSegmentNumber >= lastSegmentNumber):
+                if not self._isFinished:
+                    self._isFinished = True
+                    self._fireOnSegment(None)
+                    if self._scheduler != None:
+                        # This lets other streams use the Interests of this one.
+                        self._scheduler.removeStream(self)
+                return True
 
-        self._requestNewSegments(self._interestPipelineSize)
+            nextSegmentNumber = self._maxRetrievedSegmentNumber + 1
+            nextSegment = self._popReceivedSegment(nextSegmentNumber)
+            if nextSegment == None:
+                # As a fallback, check for content which was set before this
+                # was attached. Use findChild so that checking doesn't add a
+                # node.
+                nextSegment = self._namespace.findChild(
+                  Name.Component.fromSegment(nextSegmentNumber))
+                if nextSegment == None:
+                    return False
+                nextSegment = self.debugGetRightmostLeaf(nextSegment)
+                if nextSegment._content.isNull():
+                    return False
+
+            self._maxRetrievedSegmentNumber = nextSegmentNumber
+            self._fireOnSegment(nextSegment)
+            self._unpin(nextSegment)
+            if self._releaseDeliveredSegments:
+                self._namespace.removeChild(
+                  Name.Component.fromSegment(nextSegmentNumber))
 
     def _requestNewSegments(self, maxRequestedSegments):
+        """
+        Send Interests until maxRequestedSegments are in flight (see
+        _fillWindow). If this was added to a SegmentStreamScheduler, then let
+        it send Interests for other streams which are waiting.
+        """
+        self._fillWindow(maxRequestedSegments)
+        if self._scheduler != None:
+            self._scheduler._schedule()
+
+    def _fillWindow(self, maxRequestedSegments):
+        """
+        Send Interests for segments which timed out and then new segments until
+        maxRequestedSegments are in flight, or the SegmentStreamScheduler
+        doesn't allow more.
+        """
+        if self._isPaused or self._errorMessage != None:
+            return
         if maxRequestedSegments < 1:
             maxRequestedSegments = 1
 
-        childComponents = self._namespace.getChildComponents()
-        # First, count how many are already requested and not received.
-        nRequestedSegments = 0
-        for component in childComponents:
-            if not component.isSegment():
-                # The namespace contains a child other than a segment. Ignore.
-                continue
-
-            child = self._namespace[component]
-            # Debug: Check the leaf for content, but use the immediate child
-            # for _debugSegmentStreamDidExpressInterest.
-            if (self.debugGetRightmostLeaf(child).content.isNull() and
-                  hasattr(child, '_debugSegmentStreamDidExpressInterest') and
-                  child._debugSegmentStreamDidExpressInterest):
-                nRequestedSegments += 1
-                if nRequestedSegments >= maxRequestedSegments:
-                    # Already maxed out on requests.
+        while len(self._inFlightSegments) < maxRequestedSegments:
+            if (self._scheduler != None and
+                not self._scheduler._mayRequest(self)):
+                return
+
+            if self._isBufferFull():
+                # Only request the next segment to supply to onSegment, which
+                # lets the buffer drain.
+                segmentNumber = self._maxRetrievedSegmentNumber + 1
+                if (self._isWanted(segmentNumber) and
+                    segmentNumber not in self._receivedSegments and
+                    segmentNumber not in self._inFlightSegments):
+                    self._requestSegment(segmentNumber)
+                return
+
+            # Request segments which timed out before new segments.
+            if len(self._retrySegments) > 0:
+                segmentNumber = heapq.heappop(self._retrySegments)
+                if (segmentNumber <= self._maxRetrievedSegmentNumber or
+                    segmentNumber in self._receivedSegments or
+                    segmentNumber in self._inFlightSegments or
+                    not self._isWanted(segmentNumber)):
+                    continue
+            else:
+                segmentNumber = self._nextSegmentNumber
+                if segmentNumber <= self._maxRetrievedSegmentNumber:
+                    # The segments up to here were supplied from existing
+                    # content, so skip them.
+                    segmentNumber = self._maxRetrievedSegmentNumber + 1
+                if not self._isWanted(segmentNumber):
                     break
+                self._nextSegmentNumber = segmentNumber + 1
+                if (segmentNumber in self._receivedSegments or
+                    segmentNumber in self._inFlightSegments):
+                    continue
+
+            self._requestSegment(segmentNumber)
+
+    def _requestSegment(self, segmentNumber):
+        """
+        Send the Interest for the segment and add it to _inFlightSegments, or
+        if the segment node already has content, add it to _receivedSegments.
+        """
+        segment = self._namespace[Name.Component.fromSegment(segmentNumber)]
+        # Debug: Check the leaf for content, but use the immediate child
+        # for expressInterest.
+        leaf = self.debugGetRightmostLeaf(segment)
+        if not leaf._content.isNull():
+            # Already got the data packet, for example from a previous fetch.
+            self._addReceivedSegment(segmentNumber, leaf)
+            return
+
+        face = None
+        faces = segment._getFaces()
+        if len(faces) > 1:
+            face = self._chooseFace(faces)
+            self._inFlightFaces[segmentNumber] = face
+
+        if self._scheduler != None:
+            self._scheduler._onInterestSent(self)
+        self._lastSendSequence += 1
+        self._inFlightSegments[segmentNumber] = self._lastSendSequence
+        segment.expressInterest(None, self._onTimeout, self._onRetransmit, face)
+
+    def _chooseFace(self, faces):
+        """
+        Choose the Face for the next segment Interest by stride scheduling, so
+        that the Interests are striped over the faces in proportion to their
+        weights from _getFaceWeight.
+
+        :param list faces: The Faces from Namespace._getFaces().
+        :return: The chosen Face.
+        :rtype: Face
+        """
+        minPass = None
+        for face in faces:
+            facePass = self._facePasses.get(face)
+            if facePass != None and (minPass == None or facePass < minPass):
+                minPass = facePass
+        if minPass == None:
+            minPass = 0.0
+
+        chosenFace = None
+        for face in faces:
+            if not face in self._facePasses:
+                # A new face starts with the others so that it gets no burst.
+                self._facePasses[face] = minPass
+            if (chosenFace == None or
+                self._facePasses[face] < self._facePasses[chosenFace]):
+                chosenFace = face
+
+        self._facePasses[chosenFace] += (
+          1.0 / SegmentStream._getFaceWeight(chosenFace))
+        return chosenFace
+
+    @staticmethod
+    def _getFaceWeight(face):
+        """
+        Get the share of segment Interests for the Face, which is the fraction
+        of Interests not lost divided by the smoothed round-trip time, from
+        the RttEstimator of the Face. This is the expected rate of Data from
+        the Face for each outstanding Interest.
+        """
+        rttEstimator = RttEstimator.getFaceRttEstimator(face)
+        rtt = rttEstimator.getSmoothedRtt()
+        if rtt == None:
+            rtt = rttEstimator.getRto()
+
+        lossCount = rttEstimator.getLossCount()
+        sampleCount = lossCount + rttEstimator.getMeasurementCount()
+        lossRate = float(lossCount) / sampleCount if sampleCount > 0 else 0.0
+        # Keep a minimum share so that a Face which recovers is noticed.
+        return max(1.0 - lossRate, 0.05) / max(rtt, 1.0)
+
+    def _mayExist(self, segmentNumber):
+        """
+        Check if the segment is not past the final segment or, if the final
+        segment is not known, not at or past a segment which is missing.
+        """
+        if self._finalSegmentNumber != None:
+            return segmentNumber <= self._finalSegmentNumber
+        return (self._missingSegmentNumber == None or
+                segmentNumber < self._missingSegmentNumber)
+
+    def _isWanted(self, segmentNumber):
+        """
+        Check if the segment may exist (see _mayExist) and is not past the end
+        of the range from fetchRange.
+        """
+        return (self._mayExist(segmentNumber) and
+                (self._lastRangeSegmentNumber == None or
+                 segmentNumber <= self._lastRangeSegmentNumber))
+
+    def _detectGap(self, sendSequence, face):
+        """
+        This is called when a segment which this requested is received and
+        sendSequence is the send sequence number of its Interest. If the next
+        segment to supply to onSegment is still in flight and the
+        fast retransmit threshold of segments which were sent after it have
+        been received, then assume that it was lost and retransmit it now.
+        When striping, only count segments received on the same face as the
+        next segment, since segments on different faces arrive out of order.
+
+        :param int sendSequence: The send sequence number of the received
+          segment.
+        :param Face face: The Face of the received segment from
+          _inFlightFaces, or None if not striping.
+        """
+        if self._fastRetransmitThreshold < 1:
+            return
+        segmentNumber = self._maxRetrievedSegmentNumber + 1
+        gapSendSequence = self._inFlightSegments.get(segmentNumber)
+        if gapSendSequence == None or sendSequence <= gapSendSequence:
+            return
+        if self._inFlightFaces.get(segmentNumber) is not face:
+            return
+
+        if (segmentNumber != self._gapSegmentNumber or
+            gapSendSequence != self._gapSendSequence):
+            # A new gap, or the gap segment was retransmitted.
+            self._gapSegmentNumber = segmentNumber
+            self._gapSendSequence = gapSendSequence
+            self._gapLaterArrivalCount = 0
+        self._gapLaterArrivalCount += 1
+        if self._gapLaterArrivalCount < self._fastRetransmitThreshold:
+            return
 
-        # Now find unrequested segment numbers and request.
-        segmentNumber = self._maxRetrievedSegmentNumber
-        while nRequestedSegments < maxRequestedSegments:
-            segmentNumber += 1
-            if (self._finalSegmentNumber != None and
-                segmentNumber > self._finalSegmentNumber):
-                break
-
-            segment = self._namespace[Name.Component.fromSegment(segmentNumber)]
-            if (not self.debugGetRightmostLeaf(segment).content.isNull() or
-                (hasattr(segment, '_debugSegmentStreamDidExpressInterest') and
-                  segment._debugSegmentStreamDidExpressInterest)):
-                # Already got the data packet or already requested.
-                continue
-
-            nRequestedSegments += 1
-            segment._debugSegmentStreamDidExpressInterest = True
-            segment.expressInterest()
+        segment = self._namespace.findChild(
+          Name.Component.fromSegment(segmentNumber))
+        if segment != None and segment._retransmitInterest():
+            self._fastRetransmitCount += 1
+            self._lastSendSequence += 1
+            self._inFlightSegments[segmentNumber] = self._lastSendSequence
+            if self._useCongestionControl:
+                self._decreaseWindow(segmentNumber)
+
+    def _onTimeout(self, namespace):
+        """
+        This is called on the final timeout of an Interest sent by this. If
+        the final segment is not known, a segment past the highest received
+        segment may be missing because it is past the end. Otherwise request
+        the segment again ahead of new segments, or stop with an error if it
+        was already requested again getMaxSegmentRetries() times.
+        """
+        if namespace is self._namespace:
+            self._isDiscoveryPending = False
+            logging.getLogger(__name__).error(
+              "SegmentStream: Final timeout for the final segment discovery " +
+              namespace.name.toUri())
+            return
+        if not (namespace._parent is self._namespace and
+                namespace._component.isSegment()):
+            return
+
+        segmentNumber = namespace._component.toSegment()
+        if segmentNumber == self._probeSegmentNumber:
+            self._probeSegmentNumber = None
+        if (self._finalSegmentNumber == None and
+            segmentNumber > self._highestReceivedSegmentNumber and
+            (self._missingSegmentNumber == None or
+             segmentNumber < self._missingSegmentNumber)):
+            self._missingSegmentNumber = segmentNumber
+
+        if segmentNumber in self._inFlightSegments:
+            del self._inFlightSegments[segmentNumber]
+            self._inFlightFaces.pop(segmentNumber, None)
+            if self._isWanted(segmentNumber):
+                retryCount = self._segmentRetryCounts.get(segmentNumber, 0) + 1
+                if retryCount > self._maxSegmentRetries:
+                    self._fail(
+                      "Final timeout for " + namespace.name.toUri() +
+                      " after requesting it again " +
+                      str(self._maxSegmentRetries) + " times")
+                    return
+                self._segmentRetryCounts[segmentNumber] = retryCount
+                heapq.heappush(self._retrySegments, segmentNumber)
+                self._timeoutRetransmitCount += 1
+            if self._useCongestionControl:
+                self._decreaseWindow(segmentNumber)
+
+        if self._finalSegmentNumber == None:
+            self._findFinalSegment()
+        if self._deliverSegments():
+            return
+        self._requestNewSegments(self.getWindowSize())
+
+    def _fail(self, errorMessage):
+        """
+        Stop the stream because of an error: cancel the outstanding Interests,
+        stop sending Interests and supplying segments, and call the onError
+        callbacks.
+        """
+        self._errorMessage = errorMessage
+        self._cancelSegments(list(self._inFlightSegments))
+        self._retrySegments = []
+        if self._probeSegmentNumber != None:
+            segment = self._namespace.findChild(
+              Name.Component.fromSegment(self._probeSegmentNumber))
+            if segment != None:
+                segment._cancelInterest(self._onTimeout)
+            self._probeSegmentNumber = None
+        self._isDiscoveryDeferred = False
+        if self._isDiscoveryPending:
+            self._isDiscoveryPending = False
+            self._namespace._cancelInterest(
+              self._onTimeout, None, self._onDiscoveryData)
+
+        logging.getLogger(__name__).error("SegmentStream: " + errorMessage)
+        self._fireOnError(errorMessage)
+        if self._scheduler != None:
+            # This lets other streams use the Interests of this one.
+            self._scheduler.removeStream(self)
+
+    def _onRetransmit(self, segmentNamespace):
+        """
+        This is called before Namespace.expressInterest retransmits the
+        Interest for a segment after a timeout or network Nack.
+        """
+        segmentNumber = segmentNamespace._component.toSegment()
+        if segmentNumber in self._inFlightSegments:
+            self._timeoutRetransmitCount += 1
+            # Update the send sequence number for gap detection.
+            self._lastSendSequence += 1
+            self._inFlightSegments[segmentNumber] = self._lastSendSequence
+        if self._useCongestionControl:
+            self._decreaseWindow(segmentNumber)
+
+    def _increaseWindow(self):
+        """
+        Increase the congestion window for a received segment.
+        """
+        if self._windowSize < self._slowStartThreshold:
+            # Slow start.
+            self._windowSize += 1.0
+        else:
+            # Additive increase.
+            self._windowSize += 1.0 / self._windowSize
+        self._windowSize = min(self._windowSize, float(self._maxWindowSize))
+
+    def _decreaseWindow(self, segmentNumber):
+        """
+        Decrease the congestion window for the loss of the segment, unless it
+        was already decreased for a loss in the same window.
+        """
+        if segmentNumber <= self._recoveryPoint:
+            return
+
+        self._slowStartThreshold = max(
+          self._windowSize / 2, float(self._minWindowSize))
+        self._windowSize = self._slowStartThreshold
+        self._recoveryPoint = self._nextSegmentNumber - 1
 
     def _fireOnSegment(self, segmentNamespace):
         # Copy the keys before iterating since callbacks can change the list.
@@ -237,5 +1409,27 @@ class SegmentStream(object):
                 except:
                     logging.exception("Error in onSegment")
 
+    def _fireOnError(self, errorMessage):
+        # Copy the keys before iterating since callbacks can change the list.
+        for id in list(self._onErrorCallbacks.keys()):
+            # A callback on a previous pass may have removed this callback, so check.
+            if id in self._onErrorCallbacks.keys():
+                try:
+                    self._onErrorCallbacks[id](self, errorMessage, id)
+                except:
+                    logging.exception("Error in onError")
+
     namespace = property(getNamespace)
     interestPipelineSize = property(getInterestPipelineSize, setInterestPipelineSize)
+    congestionControl = property(getCongestionControl, setCongestionControl)
+    minWindowSize = property(getMinWindowSize, setMinWindowSize)
+    maxWindowSize = property(getMaxWindowSize, setMaxWindowSize)
+    windowSize = property(getWindowSize)
+    finalSegmentNumber = property(getFinalSegmentNumber)
+    probeFinalSegment = property(getProbeFinalSegment, setProbeFinalSegment)
+    maxBufferedBytes = property(getMaxBufferedBytes, setMaxBufferedBytes)
+    releaseDeliveredSegments = property(
+      getReleaseDeliveredSegments, setReleaseDeliveredSegments)
+    fastRetransmitThreshold = property(
+      getFastRetransmitThreshold, setFastRetransmitThreshold)
+    maxSegmentRetries = property(getMaxSegmentRetries, setMaxSegmentRetries)
@@ -0,0 +1,263 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2017 Regents of the University of California.
+# Author: Jeff Thompson <jefft0@remap.ucla.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# A copy of the GNU Lesser General Public License is in the file COPYING.
+
+"""
+This module defines the SegmentStreamScheduler class which shares a budget of
+outstanding Interests among the SegmentStream objects added to it.
+"""
+
+class SegmentStreamScheduler(object):
+    def __init__(self, maxOutstandingInterests = 64):
+        """
+        Create a SegmentStreamScheduler with the given budget. Use addStream to
+        add each SegmentStream, for example the streams which fetch on the same
+        Face. The total number of outstanding segment Interests of the added
+        streams is not more than maxOutstandingInterests (and each stream
+        still keeps within its own window). When the budget is used up, the
+        next Interest goes to the waiting stream with the highest priority,
+        and among streams with the same priority to the stream which has sent
+        the fewest Interests in proportion to its weight (by start-time fair
+        queuing), so that the budget is shared fairly. A stream is removed
+        from this scheduler when it finishes or stops with an error. The
+        Interests which a stream sends to find the final segment (see
+        SegmentStream.getFinalSegmentNumber) are not limited or counted by
+        this scheduler. Each stream has at most one ChildSelector Interest and
+        one probe Interest outstanding.
+
+        :param int maxOutstandingInterests: (optional) The maximum total number
+          of outstanding segment Interests of the added streams. If omitted,
+          use 64.
+        :raises RuntimeError: If maxOutstandingInterests is less than 1.
+        """
+        if maxOutstandingInterests < 1:
+            raise RuntimeError("The maxOutstandingInterests must be at least 1")
+        self._maxOutstandingInterests = maxOutstandingInterests
+        # The key is the SegmentStream and the value is its weight.
+        self._weights = {}
+        # The key is the SegmentStream and the value is its priority.
+        self._priorities = {}
+        # The key is the SegmentStream and the value is its virtual time, which
+        # advances by 1 / weight for each Interest it sends (see
+        # _onInterestSent).
+        self._virtualTimes = {}
+        # The virtual time of the last Interest sent. A stream which was idle
+        # starts from here so that it doesn't get a burst for the idle time.
+        self._virtualTime = 0.0
+        # The number of times that _mayRequest returned False.
+        self._refusalCount = 0
+        # The list of streams which could not send an Interest because of the
+        # budget or a stream which goes first.
+        self._waitingStreams = []
+
+    def addStream(self, segmentStream, weight = 1.0, priority = 0):
+        """
+        Add the SegmentStream so that its Interests are limited by this
+        scheduler. If the stream was already added, update its weight and
+        priority. When the stream finishes (after supplying the final segment
+        or the end of the range from fetchRange) or stops with an error (see
+        SegmentStream.addOnError), it is removed from this scheduler, so if you
+        call seek() or fetchRange() after that, you should add it again first.
+
+        :param SegmentStream segmentStream: The SegmentStream to add.
+        :param float weight: (optional) The share of the budget of this stream
+          relative to the other streams with the same priority. For example, a
+          stream with weight 2 gets twice the outstanding Interests of a stream
+          with weight 1. If omitted, use 1.
+        :param int priority: (optional) The priority of this stream. A waiting
+          stream with a higher priority always sends before a stream with a
+          lower priority. If omitted, use 0.
+        :raises RuntimeError: If weight is not positive, or the stream was
+          added to another SegmentStreamScheduler.
+        """
+        if not weight > 0:
+            raise RuntimeError("The weight must be positive")
+        if (segmentStream._scheduler != None and
+            segmentStream._scheduler is not self):
+            raise RuntimeError(
+              "The SegmentStream was added to another SegmentStreamScheduler")
+
+        segmentStream._scheduler = self
+        self._weights[segmentStream] = float(weight)
+        self._priorities[segmentStream] = priority
+        if not segmentStream in self._virtualTimes:
+            self._virtualTimes[segmentStream] = self._virtualTime
+        self._schedule()
+
+    def removeStream(self, segmentStream):
+        """
+        Remove the SegmentStream so that its Interests are only limited by its
+        own window. If the stream was not added, do nothing.
+
+        :param SegmentStream segmentStream: The SegmentStream to remove.
+        """
+        if not segmentStream in self._weights:
+            return
+
+        del self._weights[segmentStream]
+        del self._priorities[segmentStream]
+        del self._virtualTimes[segmentStream]
+        if segmentStream in self._waitingStreams:
+            self._waitingStreams.remove(segmentStream)
+        segmentStream._scheduler = None
+
+        if segmentStream._isStarted and not segmentStream._isFinished:
+            segmentStream._requestNewSegments(segmentStream.getWindowSize())
+        self._schedule()
+
+    def getMaxOutstandingInterests(self):
+        """
+        Get the maximum total number of outstanding segment Interests of the
+        added streams.
+
+        :return: The maximum number of outstanding Interests.
+        :rtype: int
+        """
+        return self._maxOutstandingInterests
+
+    def setMaxOutstandingInterests(self, maxOutstandingInterests):
+        """
+        Set the maximum total number of outstanding segment Interests of the
+        added streams. If the maximum is increased, this sends Interests for
+        waiting streams. If it is decreased, outstanding Interests are not
+        cancelled but new Interests wait until the total is below the maximum.
+
+        :param int maxOutstandingInterests: The maximum number of outstanding
+          Interests.
+        :raises RuntimeError: If maxOutstandingInterests is less than 1.
+        """
+        if maxOutstandingInterests < 1:
+            raise RuntimeError("The maxOutstandingInterests must be at least 1")
+        self._maxOutstandingInterests = maxOutstandingInterests
+        self._schedule()
+
+    def getOutstandingInterestCount(self):
+        """
+        Get the total number of outstanding segment Interests of the added
+        streams. This does not count the Interests which a SegmentStream sends
+        to find the final segment.
+
+        :return: The number of outstanding Interests.
+        :rtype: int
+        """
+        count = 0
+        for segmentStream in self._weights:
+            count += len(segmentStream._inFlightSegments)
+        return count
+
+    def _mayRequest(self, segmentStream):
+        """
+        This is called by the SegmentStream before it sends an Interest for a
+        segment. If the budget is used up or a waiting stream goes first, add
+        segmentStream to the waiting streams. If the stream then sends the
+        Interest, it calls _onInterestSent.
+
+        :param SegmentStream segmentStream: The stream which wants to send.
+        :return: True if the stream may send the Interest.
+        :rtype: bool
+        """
+        mayRequest = (self.getOutstandingInterestCount() <
+                      self._maxOutstandingInterests)
+        if mayRequest:
+            for waitingStream in self._waitingStreams:
+                if (waitingStream is not segmentStream and
+                    self._goesBefore(waitingStream, segmentStream)):
+                    mayRequest = False
+                    break
+
+        if not mayRequest:
+            self._refusalCount += 1
+            if not segmentStream in self._waitingStreams:
+                self._virtualTimes[segmentStream] = self._getStartTime(
+                  segmentStream)
+                self._waitingStreams.append(segmentStream)
+        return mayRequest
+
+    def _onInterestSent(self, segmentStream):
+        """
+        This is called by the SegmentStream when it sends an Interest for a
+        segment which _mayRequest allowed, before adding it to the in-flight
+        segments. Advance the virtual time of the stream and remove it from the
+        waiting streams. (A stream which _mayRequest allowed but which has
+        nothing to send doesn't use virtual time.)
+
+        :param SegmentStream segmentStream: The stream which sent.
+        """
+        startTime = self._getStartTime(segmentStream)
+        if segmentStream in self._waitingStreams:
+            self._waitingStreams.remove(segmentStream)
+        self._virtualTime = max(self._virtualTime, startTime)
+        self._virtualTimes[segmentStream] = (
+          startTime + 1.0 / self._weights[segmentStream])
+
+    def _schedule(self):
+        """
+        Give any Interests left in the budget to the waiting streams, in the
+        order of _goesBefore. This is called by a SegmentStream after it sends
+        Interests and when it finishes.
+        """
+        while (len(self._waitingStreams) > 0 and
+               self.getOutstandingInterestCount() <
+                 self._maxOutstandingInterests):
+            nextStream = self._waitingStreams[0]
+            for waitingStream in self._waitingStreams:
+                if self._goesBefore(waitingStream, nextStream):
+                    nextStream = waitingStream
+
+            refusalCount = self._refusalCount
+            # _onInterestSent removes the stream from the waiting streams when
+            # it sends.
+            nextStream._fillWindow(nextStream.getWindowSize())
+            if (self._refusalCount == refusalCount and
+                nextStream in self._waitingStreams):
+                # The stream didn't ask to send, so it has sent all the
+                # Interests it wants.
+                self._waitingStreams.remove(nextStream)
+
+    def _goesBefore(self, segmentStream1, segmentStream2):
+        """
+        Check if segmentStream1 should send its next Interest before
+        segmentStream2, because it has a higher priority or the virtual time
+        after its next Interest is earlier.
+        """
+        priority1 = self._priorities[segmentStream1]
+        priority2 = self._priorities[segmentStream2]
+        if priority1 != priority2:
+            return priority1 > priority2
+
+        return (self._getStartTime(segmentStream1) +
+                  1.0 / self._weights[segmentStream1] <
+                self._getStartTime(segmentStream2) +
+                  1.0 / self._weights[segmentStream2])
+
+    def _getStartTime(self, segmentStream):
+        """
+        Get the virtual time of the next Interest of the stream. If the stream
+        is idle (not waiting and no outstanding Interests), this is not before
+        the virtual time of the last Interest sent. Otherwise, the stream can
+        catch up by at most the budget.
+        """
+        virtualTime = self._virtualTimes[segmentStream]
+        if (segmentStream in self._waitingStreams or
+            len(segmentStream._inFlightSegments) > 0):
+            return max(virtualTime, self._virtualTime -
+              self._maxOutstandingInterests / self._weights[segmentStream])
+        return max(virtualTime, self._virtualTime)
+
+    maxOutstandingInterests = property(
+      getMaxOutstandingInterests, setMaxOutstandingInterests)
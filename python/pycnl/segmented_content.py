@@ -19,10 +19,18 @@
 
 """
 This module defines the SegmentedContent class which assembles the contents of
-child segment packets into a single block of memory.
+child segment packets into a single block of memory, or writes them to a file.
 """
 
+import os
+import sys
+import json
+import hashlib
+import logging
+import mmap
+import tempfile
 from pyndn.util import Blob
+from pycnl.namespace import Namespace
 from pycnl.segment_stream import SegmentStream
 
 class SegmentedContent(object):
@@ -30,8 +38,9 @@ class SegmentedContent(object):
         """
         Create a SegmentedContent object to use a SegmentStream to assemble
         content. You should use getNamespace().addOnContentSet to add the
-        callback which is called when the content is complete. Then you should
-        call start().
+        callback which is called when the content is complete, and addOnError
+        to add the callback which is called if it can't be completed. Then you
+        should call start().
 
         :param segmentStreamOrNamespace: A SegmentStream where its
           Namespace is a node whose children are the names of segment Data
@@ -46,8 +55,89 @@ class SegmentedContent(object):
 
         self._segments = []
         self._totalSize = 0
+        self._pruneSegments = False
+        self._preallocate = True
+        # The preallocated buffer for the content, or None if not allocated.
+        self._buffer = None
+        # The content size of the first segment, which is the size of each
+        # segment except the final one when the segment sizes are regular.
+        self._segmentSize = None
+        # False if a segment before the final one has a different size.
+        self._isRegular = True
+        self._useMemoryMap = False
+        # The memory map which this writes segments to, or None.
+        self._memoryMap = None
+        # The temporary file of _memoryMap, which is kept open to enlarge it.
+        self._memoryMapFile = None
+        # The file path or writable stream from setSink, or None.
+        self._sink = None
+        # The stream which this writes segments to, or None if not writing.
+        self._sinkStream = None
+        self._checkpointPath = None
+        self._checkpointInterval = 1000
+        # The sha256 digest of the content from setExpectedDigest, or None.
+        self._expectedDigest = None
+        # The list of sha256 digests from setExpectedSegmentDigests, or None.
+        self._expectedSegmentDigests = None
+        # The sha256 hash object which is updated with each segment, or None.
+        self._hash = None
+        # The segment number of the next segment supplied to _onSegment.
+        self._nextSegmentNumber = 0
+        self._isDigestVerified = None
+        # The number of segments written to the sink, including the segments
+        # from a checkpoint.
+        self._sinkSegmentCount = 0
+        # The message of the error which stopped assembling, or None.
+        self._errorMessage = None
+        # The dictionary key is the callback ID. The value is the onError function.
+        self._onErrorCallbacks = {}
 
-        self._segmentStream.addOnSegment(self._onSegment)
+        self._onSegmentCallbackId = self._segmentStream.addOnSegment(
+          self._onSegment)
+        self._onSegmentStreamErrorCallbackId = self._segmentStream.addOnError(
+          self._onSegmentStreamError)
+
+    def addOnError(self, onError):
+        """
+        Add an onError callback. If the content can't be completed, for example
+        because the SegmentStream stopped with an error (see
+        SegmentStream.addOnError), then this frees the content assembled so far
+        and calls onError as described below instead of the addOnContentSet
+        callbacks of getNamespace().
+
+        :param onError: This calls onError(segmentedContent, message, callbackId)
+          where segmentedContent is this SegmentedContent, message is a string
+          describing the error (also returned by getErrorMessage()), and
+          callbackId is the callback ID returned by this method.
+          NOTE: The library will log any exceptions raised by this callback, but
+          for better error handling the callback should catch and properly
+          handle any exceptions.
+        :type onError: function object
+        :return: The callback ID which you can use in removeCallback().
+        :rtype: int
+        """
+        callbackId = Namespace.getNextCallbackId()
+        self._onErrorCallbacks[callbackId] = onError
+        return callbackId
+
+    def removeCallback(self, callbackId):
+        """
+        Remove the callback with the given callbackId. If the callbackId isn't
+        found, do nothing.
+
+        :param int callbackId: The callback ID returned from addOnError.
+        """
+        self._onErrorCallbacks.pop(callbackId, None)
+
+    def getErrorMessage(self):
+        """
+        Get the message of the error which stopped assembling the content. See
+        addOnError().
+
+        :return: The error message, or None if there is no error.
+        :rtype: str
+        """
+        return self._errorMessage
 
     def getSegmentStream(self):
         """
@@ -67,34 +157,348 @@ class SegmentedContent(object):
         """
         return self._segmentStream.getNamespace()
 
+    def getPruneSegments(self):
+        """
+        Get the prune segments flag. See setPruneSegments().
+
+        :return: True if the segment nodes are removed when the content is
+          assembled.
+        :rtype: bool
+        """
+        return self._pruneSegments
+
+    def setPruneSegments(self, pruneSegments):
+        """
+        Set the prune segments flag. If True, remove the segment child nodes
+        (and their Data packets) so that the memory can be freed. Each node is
+        removed when its segment is supplied by the SegmentStream (see
+        SegmentStream.setReleaseDeliveredSegments) and any remaining segment
+        nodes are removed after the content is assembled and set on
+        getNamespace(). If False (the default), keep the segment nodes. You
+        must call this before start().
+
+        :param bool pruneSegments: True to remove the segment nodes.
+        """
+        self._pruneSegments = pruneSegments
+
+    def getPreallocate(self):
+        """
+        Get the preallocate flag. See setPreallocate().
+
+        :return: True if the content is assembled in a preallocated buffer
+          when possible.
+        :rtype: bool
+        """
+        return self._preallocate
+
+    def setPreallocate(self, preallocate):
+        """
+        Set the preallocate flag. If True (the default), when the final segment
+        number is known (for example from the FinalBlockId) and each segment
+        so far has the size of the first segment, allocate a buffer for the
+        whole content and copy each segment into its offset as it is supplied,
+        instead of keeping a list of the segments and copying them at the end.
+        If a segment has a different size, this falls back to the list. If
+        False, always use the list.
+
+        :param bool preallocate: True to use a preallocated buffer when
+          possible.
+        """
+        self._preallocate = preallocate
+
+    def getMemoryMap(self):
+        """
+        Get the memory map flag. See setMemoryMap().
+
+        :return: True if the content is assembled in a memory-mapped temporary
+          file.
+        :rtype: bool
+        """
+        return self._useMemoryMap
+
+    def setMemoryMap(self, useMemoryMap):
+        """
+        Set the memory map flag. If True, assemble the content in a
+        memory-mapped temporary file (in the directory from
+        tempfile.gettempdir()) instead of a bytearray, for objects which may
+        be larger than memory. This copies each segment to its offset in the
+        mapping as it is supplied by the SegmentStream, and releases the
+        delivered segments (see SegmentStream.setReleaseDeliveredSegments).
+        When done, the content of getNamespace() is a Blob of a memoryview of
+        the mapping, so that you can read or slice it without a copy and the
+        operating system pages it in and out as needed. The temporary file is
+        deleted when the content is no longer used. If False (the default),
+        assemble in memory. You must call this before start(). (If there is a
+        sink from setSink, this is ignored.)
+
+        :param bool useMemoryMap: True to assemble in a memory-mapped file.
+        """
+        self._useMemoryMap = useMemoryMap
+
+    def getSink(self):
+        """
+        Get the sink given to setSink.
+
+        :return: The file path or writable stream, or None for no sink.
+        :rtype: str or an object with a write method
+        """
+        return self._sink
+
+    def setSink(self, sink):
+        """
+        Set the sink so that, instead of assembling the content in memory, this
+        writes the content of each segment in order as it is supplied by the
+        SegmentStream, and releases the delivered segments (see
+        SegmentStream.setReleaseDeliveredSegments), so that only the segments
+        which arrive out of order are held in memory. When done, this sets the
+        content of getNamespace() to the file path encoded as UTF-8, or to an
+        empty Blob if the sink is a stream, and calls the addOnContentSet
+        callbacks. You must call this before start().
+
+        :param sink: The path of the file to create (or overwrite), or a
+          writable stream such as an open file which this writes to but doesn't
+          close. If None, assemble the content in memory (the default).
+        :type sink: str or an object with a write method
+        """
+        self._sink = sink
+
+    def getCheckpointPath(self):
+        """
+        Get the checkpoint file path given to setCheckpoint.
+
+        :return: The checkpoint file path, or None for no checkpoint.
+        :rtype: str
+        """
+        return self._checkpointPath
+
+    def setCheckpoint(self, checkpointPath, checkpointInterval = 1000):
+        """
+        Set the checkpoint file so that a download to a sink file (see
+        setSink) can be resumed after the process restarts. Every
+        checkpointInterval segments, this flushes the sink file to disk and
+        replaces the checkpoint file with a JSON object which has the name of
+        getNamespace() and the number of segments and bytes written. When
+        start() finds a checkpoint file for the same name, it truncates the
+        sink file to the recorded size and continues from the next segment, so
+        you should use a versioned name. When the download is complete, this
+        deletes the checkpoint file. You must call this before start().
+
+        :param str checkpointPath: The path of the checkpoint file, or None for
+          no checkpoint. The checkpoint is written to checkpointPath + ".tmp"
+          and renamed so that it is never partly written.
+        :param int checkpointInterval: (optional) The number of segments
+          between checkpoints. If omitted, use 1000.
+        :raises RuntimeError: If checkpointInterval is less than 1.
+        """
+        if checkpointInterval < 1:
+            raise RuntimeError("The checkpointInterval must be at least 1")
+        self._checkpointPath = checkpointPath
+        self._checkpointInterval = checkpointInterval
+
+    def setExpectedDigest(self, expectedDigest):
+        """
+        Set the expected sha256 digest of the whole content. As each segment is
+        supplied in order, this updates the hash of the content so that the
+        content doesn't need a second pass. At the end of the content, this
+        compares the digest. If it does not match then, instead of setting the
+        content of getNamespace(), this calls the addOnError callbacks, where
+        getDigestVerified() returns False. You must call this before start().
+
+        :param expectedDigest: The 32-byte sha256 digest, or None to not
+          check.
+        :type expectedDigest: Blob or bytes
+        """
+        self._expectedDigest = (None if expectedDigest == None
+                                else Blob(expectedDigest).toBytes())
+
+    def setExpectedSegmentDigests(self, expectedSegmentDigests):
+        """
+        Set the expected sha256 digest of the content of each segment. If the
+        digest of a segment does not match, this stops the SegmentStream
+        (cancelling its outstanding Interests), frees the content assembled so
+        far and, instead of setting the content of getNamespace(), calls the
+        addOnError callbacks, where getDigestVerified() returns False. A
+        segment past the end of the list is also a mismatch, and so is a
+        final segment before the end of the list. You must call this before
+        start().
+
+        :param expectedSegmentDigests: The list of 32-byte sha256 digests where
+          the index is the segment number, or None to not check.
+        :type expectedSegmentDigests: list of Blob or bytes
+        """
+        if expectedSegmentDigests == None:
+            self._expectedSegmentDigests = None
+        else:
+            self._expectedSegmentDigests = [
+              Blob(digest).toBytes() for digest in expectedSegmentDigests]
+
+    def getDigestVerified(self):
+        """
+        Get the result of checking the digests from setExpectedDigest and
+        setExpectedSegmentDigests. You can call this in the addOnContentSet
+        callback, or in the addOnError callback for a mismatch.
+
+        :return: True if the content and segments match the expected digests,
+          False if there is a mismatch, or None if there are no expected
+          digests or the content is not finished.
+        :rtype: bool
+        """
+        return self._isDigestVerified
+
+    def getTotalSize(self):
+        """
+        Get the total size of the content of the segments supplied so far.
+
+        :return: The size in bytes.
+        :rtype: int
+        """
+        return self._totalSize
+
     def start(self):
         """
         Start fetching segment Data packets. When done, the library will call
-        the callback given to getNamespace().addOnContentSet .
+        the callback given to getNamespace().addOnContentSet, or the callback
+        given to addOnError if there is an error.
+
+        :raises IOError: If the sink is a file path which can't be opened.
+        :raises RuntimeError: If there is a checkpoint file path but the sink
+          is not a file path.
         """
-        self._segmentStream.start()
+        fromSegment = 0
+        if self._expectedDigest != None:
+            self._hash = hashlib.sha256()
+        if self._checkpointPath != None and (
+              self._sink == None or hasattr(self._sink, "write")):
+            raise RuntimeError(
+              "SegmentedContent: A checkpoint requires a sink file path")
+
+        if self._sink != None:
+            if hasattr(self._sink, "write"):
+                self._sinkStream = self._sink
+            else:
+                checkpoint = self._readCheckpoint()
+                if checkpoint != None:
+                    # Resume after the segments in the checkpoint.
+                    fromSegment, size = checkpoint
+                    self._sinkStream = open(self._sink, "r+b")
+                    self._sinkStream.truncate(size)
+                    self._sinkStream.seek(size)
+                    self._sinkSegmentCount = fromSegment
+                    self._totalSize = size
+                    if self._hash != None:
+                        self._updateHashFromSink(size)
+                else:
+                    self._sinkStream = open(self._sink, "wb")
+            self._segments = None
+            self._segmentStream.setReleaseDeliveredSegments(True)
+        elif self._useMemoryMap:
+            self._segmentStream.setReleaseDeliveredSegments(True)
+        elif self._pruneSegments:
+            # The segment nodes will be removed anyway, so remove each one
+            # when it is supplied to free the memory sooner.
+            self._segmentStream.setReleaseDeliveredSegments(True)
+
+        self._nextSegmentNumber = fromSegment
+        self._segmentStream.start(1, fromSegment)
 
     def _onSegment(self, segmentStream, segmentNamespace, callbackId):
+        if segmentNamespace != None:
+            if not self._checkSegmentDigest(segmentNamespace.content):
+                self._onDigestMismatch()
+                return
+        elif (self._expectedDigest != None or
+              self._expectedSegmentDigests != None):
+            # Finished, so check before calling onContentSet.
+            errorMessage = None
+            if (self._expectedSegmentDigests != None and
+                self._nextSegmentNumber != len(self._expectedSegmentDigests)):
+                errorMessage = (
+                  "Received " + str(self._nextSegmentNumber) +
+                  " segments but expected " +
+                  str(len(self._expectedSegmentDigests)) +
+                  " segment digests for " + self.getNamespace().name.toUri())
+            elif (self._hash != None and
+                  self._hash.digest() != self._expectedDigest):
+                errorMessage = ("The content digest does not match for " +
+                                self.getNamespace().name.toUri())
+
+            self._isDigestVerified = errorMessage == None
+            if errorMessage != None:
+                # The SegmentStream is finished, so it doesn't log the error.
+                logging.getLogger(__name__).error(
+                  "SegmentedContent: " + errorMessage)
+                self._stop(errorMessage)
+                return
+
+        if self._sinkStream != None:
+            self._onSinkSegment(segmentStream, segmentNamespace, callbackId)
+            return
+        if self._useMemoryMap and self._sink == None:
+            self._onMemoryMapSegment(segmentStream, segmentNamespace, callbackId)
+            return
         if self._segments == None:
             # We already finished and called onContent. (We don't expect this.)
             return
-          
+
+        try:
+            self._onMemorySegment(segmentStream, segmentNamespace, callbackId)
+        except MemoryError:
+            self._onWriteError("Out of memory assembling the content of")
+
+    def _onMemorySegment(self, segmentStream, segmentNamespace, callbackId):
+        """
+        Add the segment content to _buffer or _segments or, at the end of the
+        stream, set the content of the Namespace to the assembled content.
+
+        :raises MemoryError: If the memory can't be allocated.
+        """
         if segmentNamespace != None:
-            self._segments.append(segmentNamespace.content)
-            self._totalSize += segmentNamespace.content.size()
+            segment = segmentNamespace.content
+            if self._segmentSize == None:
+                self._segmentSize = segment.size()
+            if self._preallocate and self._buffer == None and self._isRegular:
+                self._allocateBuffer()
+
+            if self._buffer != None:
+                offset = self._totalSize
+                if (offset % self._segmentSize == 0 and
+                    offset + segment.size() <= len(self._buffer)):
+                    self._buffer[offset:offset + segment.size()] = (
+                      segment.toBuffer())
+                else:
+                    # The sizes are irregular. Use the buffer up to here as
+                    # the first segment of the list.
+                    del self._buffer[offset:]
+                    self._segments.append(Blob(self._buffer, False))
+                    self._buffer = None
+                    self._isRegular = False
+                    self._segments.append(segment)
+            else:
+                if len(self._segments) > 0 and (
+                      self._segments[-1].size() != self._segmentSize):
+                    # A segment before this one has a different size.
+                    self._isRegular = False
+                self._segments.append(segment)
+            self._totalSize += segment.size()
         else:
             # Finished. We don't need the callback anymore.
             segmentStream.removeCallback(callbackId)
 
-            # Concatenate the segments.
-            content = bytearray(self._totalSize)
-            offset = 0
-            for i in range(len(self._segments)):
-                buffer = self._segments[i].toBuffer()
-                content[offset:offset + len(buffer)] = buffer
-                offset += len(buffer)
-                # Free the memory.
-                self._segments[i] = None
+            if self._buffer != None:
+                # The final segment may be shorter than the others.
+                del self._buffer[self._totalSize:]
+                content = self._buffer
+                self._buffer = None
+            else:
+                # Concatenate the segments.
+                content = bytearray(self._totalSize)
+                offset = 0
+                for i in range(len(self._segments)):
+                    buffer = self._segments[i].toBuffer()
+                    content[offset:offset + len(buffer)] = buffer
+                    offset += len(buffer)
+                    # Free the memory.
+                    self._segments[i] = None
                 
             # Free memory.
             self._segments = None
@@ -104,3 +508,322 @@ class SegmentedContent(object):
             # so?
             self._segmentStream.namespace._onContentTransformed(
               None, Blob(content, False))
+
+            if self._pruneSegments:
+                namespace = self._segmentStream.namespace
+                for component in namespace.getChildComponents():
+                    if component.isSegment():
+                        namespace.removeChild(component)
+
+    def _onWriteError(self, errorMessage):
+        """
+        This is called in an except block when writing or assembling the
+        content fails. Log the exception, stop the SegmentStream so that it
+        doesn't fetch more segments, and fail with the error.
+
+        :param str errorMessage: The start of the error message, which is
+          followed by the name of getNamespace() and the exception.
+        """
+        exception = sys.exc_info()[1]
+        # For example, str(MemoryError()) is empty.
+        errorMessage += (" " + self.getNamespace().name.toUri() + ": " +
+                         (str(exception) or type(exception).__name__))
+        logging.exception("SegmentedContent: " + errorMessage)
+        self._stop(errorMessage)
+
+    def _stop(self, errorMessage):
+        """
+        Stop the SegmentStream with the error if it is still fetching, which
+        cancels its outstanding Interests, and fail with the error (see
+        _fail).
+        """
+        if (self._segmentStream.getErrorMessage() == None and
+            not self._segmentStream._isFinished):
+            # The SegmentStream logs the error and calls _onSegmentStreamError.
+            self._segmentStream._fail(errorMessage)
+        # If the stream didn't call _onSegmentStreamError, fail now.
+        self._fail(errorMessage)
+
+    def _onSegmentStreamError(self, segmentStream, errorMessage, callbackId):
+        """
+        This is called when the SegmentStream stops with an error.
+        """
+        self._fail(errorMessage)
+
+    def _fail(self, errorMessage):
+        """
+        Stop assembling the content because of an error: free the content
+        assembled so far, close the sink file (but not a writable stream from
+        setSink) and call the onError callbacks. This doesn't set the content
+        of getNamespace(). If a checkpoint was written, it is kept so that the
+        download can be resumed.
+        """
+        if self._errorMessage != None:
+            # Already failed.
+            return
+
+        self._errorMessage = errorMessage
+        self._segmentStream.removeCallback(self._onSegmentCallbackId)
+        self._segmentStream.removeCallback(self._onSegmentStreamErrorCallbackId)
+        if self._sinkStream != None and not (self._sinkStream is self._sink):
+            try:
+                self._sinkStream.close()
+            except (IOError, OSError):
+                logging.exception("SegmentedContent: Error closing the sink")
+        self._sinkStream = None
+        self._closeMemoryMap()
+        self._buffer = None
+        self._segments = None
+
+        # Copy the keys before iterating since callbacks can change the list.
+        for id in list(self._onErrorCallbacks.keys()):
+            # A callback on a previous pass may have removed this callback, so check.
+            if id in self._onErrorCallbacks.keys():
+                try:
+                    self._onErrorCallbacks[id](self, errorMessage, id)
+                except:
+                    logging.exception("Error in onError")
+
+    def _checkSegmentDigest(self, segment):
+        """
+        Update the content hash with the segment and check its digest in the
+        expected segment digests.
+
+        :param Blob segment: The content of the next segment.
+        :return: False if the segment digest does not match, otherwise True.
+        :rtype: bool
+        """
+        segmentNumber = self._nextSegmentNumber
+        self._nextSegmentNumber += 1
+        if self._hash != None:
+            self._hash.update(segment.toBuffer())
+
+        if self._expectedSegmentDigests == None:
+            return True
+        return (segmentNumber < len(self._expectedSegmentDigests) and
+                hashlib.sha256(segment.toBuffer()).digest() ==
+                  self._expectedSegmentDigests[segmentNumber])
+
+    def _onDigestMismatch(self):
+        """
+        Set getDigestVerified() to False, then stop the SegmentStream and fail
+        with the error, so that the content is not set.
+        """
+        self._isDigestVerified = False
+        self._stop(
+          "The digest of segment " + str(self._nextSegmentNumber - 1) +
+          " does not match for " + self.getNamespace().name.toUri())
+
+    def _updateHashFromSink(self, size):
+        """
+        Update the content hash with the first size bytes of the sink file,
+        which were written before resuming from a checkpoint.
+        """
+        with open(self._sink, "rb") as sinkFile:
+            while size > 0:
+                buffer = sinkFile.read(min(size, 1024 * 1024))
+                if len(buffer) == 0:
+                    break
+                self._hash.update(buffer)
+                size -= len(buffer)
+
+    def _allocateBuffer(self):
+        """
+        If the final segment number is known, allocate _buffer for the maximum
+        content size and move the segments from _segments into it.
+        """
+        finalSegmentNumber = self._segmentStream.getFinalSegmentNumber()
+        if finalSegmentNumber == None or self._segmentSize == 0:
+            return
+        for segment in self._segments:
+            if segment.size() != self._segmentSize:
+                self._isRegular = False
+                return
+
+        self._buffer = bytearray((finalSegmentNumber + 1) * self._segmentSize)
+        offset = 0
+        for segment in self._segments:
+            self._buffer[offset:offset + segment.size()] = segment.toBuffer()
+            offset += segment.size()
+        self._segments = []
+
+    def _onMemoryMapSegment(self, segmentStream, segmentNamespace, callbackId):
+        """
+        Copy the segment content to _memoryMap at the end of the content so
+        far, enlarging the mapping as needed. At the end of the stream, set the
+        content of the Namespace to a view of the mapping.
+        """
+        try:
+            if segmentNamespace != None:
+                segment = segmentNamespace.content
+                end = self._totalSize + segment.size()
+                if self._memoryMap == None:
+                    self._createMemoryMap(max(
+                      end, self._estimateContentSize(segment.size())))
+                elif end > len(self._memoryMap):
+                    # Double the size so that enlarging is amortized.
+                    self._enlargeMemoryMap(max(end, 2 * len(self._memoryMap)))
+
+                self._memoryMap[self._totalSize:end] = segment.toBuffer()
+                self._totalSize = end
+                return
+
+            # Finished.
+            segmentStream.removeCallback(callbackId)
+            if self._totalSize == 0:
+                content = Blob(bytearray(0), False)
+                self._closeMemoryMap()
+            else:
+                # The mapping may be larger than the content, so use a view of
+                # the content instead of trimming the mapping with
+                # mmap.resize, which is not supported on all platforms. The
+                # view keeps the mapping, which has its own file descriptor, so
+                # close the file.
+                content = Blob(
+                  memoryview(self._memoryMap)[:self._totalSize], False)
+                self._memoryMap = None
+                self._memoryMapFile.close()
+                self._memoryMapFile = None
+        except Exception:
+            self._onWriteError("Error writing to the memory-mapped file for")
+            return
+
+        self._segmentStream.namespace._onContentTransformed(None, content)
+
+    def _estimateContentSize(self, segmentSize):
+        """
+        Estimate the content size from the final segment number (if known) and
+        the size of the first segment, or return 1 MB.
+        """
+        finalSegmentNumber = self._segmentStream.getFinalSegmentNumber()
+        if finalSegmentNumber != None and segmentSize > 0:
+            return (finalSegmentNumber + 1) * segmentSize
+        return 1024 * 1024
+
+    def _createMemoryMap(self, size):
+        """
+        Create a new temporary file with the given size and set _memoryMap to
+        a memory map of it. The file is deleted when it and the memory map are
+        closed or freed.
+
+        :param int size: The initial size in bytes, which must be positive.
+        """
+        self._memoryMapFile = tempfile.TemporaryFile()
+        self._memoryMapFile.truncate(size)
+        self._memoryMap = mmap.mmap(self._memoryMapFile.fileno(), size)
+
+    def _enlargeMemoryMap(self, size):
+        """
+        Enlarge the temporary file to the given size and replace _memoryMap
+        with a memory map of the whole file. The content written so far is in
+        the file, so this doesn't copy it. (We don't use mmap.resize because it
+        is not supported on all platforms.)
+
+        :param int size: The new size in bytes.
+        """
+        # Close the old mapping first because some platforms can't change the
+        # size of a mapped file.
+        self._memoryMap.close()
+        self._memoryMap = None
+        self._memoryMapFile.truncate(size)
+        self._memoryMap = mmap.mmap(self._memoryMapFile.fileno(), size)
+
+    def _closeMemoryMap(self):
+        """
+        Close _memoryMap and its temporary file, if open, which deletes the
+        file.
+        """
+        if self._memoryMap != None:
+            self._memoryMap.close()
+            self._memoryMap = None
+        if self._memoryMapFile != None:
+            self._memoryMapFile.close()
+            self._memoryMapFile = None
+
+    def _onSinkSegment(self, segmentStream, segmentNamespace, callbackId):
+        """
+        Write the segment content to _sinkStream or, at the end of the stream,
+        finish writing and set the content of the Namespace.
+        """
+        try:
+            if segmentNamespace != None:
+                content = segmentNamespace.content
+                self._sinkStream.write(content.toBuffer())
+                self._totalSize += content.size()
+                self._sinkSegmentCount += 1
+                if (self._checkpointPath != None and
+                    self._sinkSegmentCount % self._checkpointInterval == 0):
+                    self._writeCheckpoint()
+                return
+
+            if self._sinkStream is self._sink:
+                if hasattr(self._sinkStream, "flush"):
+                    self._sinkStream.flush()
+            else:
+                self._sinkStream.close()
+        except Exception:
+            # The sink may be any writable stream, so catch any error.
+            self._onWriteError("Error writing to the sink for")
+            return
+
+        # Finished.
+        segmentStream.removeCallback(callbackId)
+        self._sinkStream = None
+        if self._checkpointPath != None:
+            try:
+                os.remove(self._checkpointPath)
+            except OSError:
+                # There is no checkpoint yet.
+                pass
+        if hasattr(self._sink, "write"):
+            content = Blob(bytearray(0), False)
+        else:
+            content = Blob(self._sink)
+        self._segmentStream.namespace._onContentTransformed(None, content)
+
+    def _readCheckpoint(self):
+        """
+        Read the checkpoint file for the sink file.
+
+        :return: A tuple of the number of segments and the number of bytes
+          written, or None if there is no valid checkpoint for the name of
+          getNamespace() and the sink file.
+        :rtype: tuple
+        """
+        try:
+            with open(self._checkpointPath, "r") as checkpointFile:
+                checkpoint = json.load(checkpointFile)
+            segmentCount = int(checkpoint["segmentCount"])
+            size = int(checkpoint["size"])
+            if (checkpoint["name"] != self.getNamespace().name.toUri() or
+                os.path.getsize(self._sink) < size):
+                return None
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+        return segmentCount, size
+
+    def _writeCheckpoint(self):
+        """
+        Flush the sink file to disk, then write the checkpoint file for the
+        segments written so far. If there is an error, log it and continue.
+        """
+        try:
+            self._sinkStream.flush()
+            os.fsync(self._sinkStream.fileno())
+
+            tempPath = self._checkpointPath + ".tmp"
+            with open(tempPath, "w") as checkpointFile:
+                json.dump({
+                  "name": self.getNamespace().name.toUri(),
+                  "segmentCount": self._sinkSegmentCount,
+                  "size": self._totalSize }, checkpointFile)
+                checkpointFile.flush()
+                os.fsync(checkpointFile.fileno())
+            if hasattr(os, "replace"):
+                os.replace(tempPath, self._checkpointPath)
+            else:
+                # Python 2. This replaces the file on POSIX.
+                os.rename(tempPath, self._checkpointPath)
+        except (IOError, OSError):
+            logging.exception("SegmentedContent: Error writing the checkpoint")